@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Load test of the threaded WSGI server against the ASGI mode (uvicorn with
+async database access): p50/p99 latency and throughput with 500 concurrent
+keep-alive clients requesting workout details and pages.
+
+    python benchmarks/bench_asgi.py --clients 500 --seconds 15
+
+Needs uvicorn and aiosqlite for the ASGI run.
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+from common import make_app, populate, report
+
+SERVER_CONFIG = {
+    'RESPONSE_CACHE_BACKEND': None,
+    'DB_POOL_SIZE': 20,
+    'DB_MAX_OVERFLOW': 20,
+}
+
+
+def serve(mode, database_path, port):
+    """Run one server in this process (invoked through --serve)"""
+    from app import create_app
+
+    app = create_app({'SQLALCHEMY_DATABASE_URI': f'sqlite:///{database_path}', **SERVER_CONFIG})
+    if mode == 'wsgi':
+        from werkzeug.serving import run_simple
+        run_simple('127.0.0.1', port, app, threaded=True)
+    else:
+        import uvicorn
+        from asgi import AsgiApp
+        uvicorn.run(AsgiApp(app), host='127.0.0.1', port=port, log_level='warning', backlog=2048)
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def wait_for(port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"server on port {port} did not start")
+
+
+async def fetch(reader, writer, path):
+    """Send one GET on an open connection; returns (status, keep_alive)"""
+    writer.write(f'GET {path} HTTP/1.1\r\nHost: localhost\r\n\r\n'.encode('ascii'))
+    await writer.drain()
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError("connection closed")
+    version, status = status_line.split()[:2]
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b''):
+            break
+        name, _, value = line.decode('latin1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+    if 'content-length' in headers:
+        await reader.readexactly(int(headers['content-length']))
+    else:
+        await reader.read()
+    keep_alive = version == b'HTTP/1.1' and headers.get('connection', '').lower() != 'close'
+    return int(status), keep_alive
+
+
+async def load(port, clients, seconds, workouts):
+    latencies, errors = [], 0
+    deadline = time.perf_counter() + seconds
+
+    async def client(seed):
+        nonlocal errors
+        rng = random.Random(seed)
+        connection = None
+        while time.perf_counter() < deadline:
+            path = (f'/workouts/{rng.randint(1, workouts)}' if rng.random() < 0.7
+                    else f'/workouts?limit=20&start_date=2020-01-{rng.randint(10, 28)}')
+            start = time.perf_counter()
+            try:
+                if connection is None:
+                    connection = await asyncio.open_connection('127.0.0.1', port)
+                status, keep_alive = await fetch(*connection, path)
+            except (OSError, ConnectionError, asyncio.IncompleteReadError, ValueError):
+                errors += 1
+                connection = None
+                await asyncio.sleep(0.05)
+                continue
+            latencies.append((time.perf_counter() - start) * 1000)
+            errors += status != 200
+            if not keep_alive:
+                connection[1].close()
+                connection = None
+        if connection is not None:
+            connection[1].close()
+
+    await asyncio.gather(*[client(i) for i in range(clients)])
+    latencies.sort()
+    pick = lambda fraction: round(latencies[min(len(latencies) - 1, int(len(latencies) * fraction))], 3) if latencies else None
+    return {
+        'requests': len(latencies),
+        'requests_per_second': round(len(latencies) / seconds, 1),
+        'p50_ms': pick(0.5),
+        'p99_ms': pick(0.99),
+        'errors': errors,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--clients', type=int, default=500)
+    parser.add_argument('--seconds', type=float, default=15)
+    parser.add_argument('--exercises', type=int, default=200)
+    parser.add_argument('--workouts', type=int, default=20000)
+    parser.add_argument('--per-workout', type=int, default=5)
+    parser.add_argument('--modes', nargs='+', default=['wsgi', 'asgi'])
+    parser.add_argument('--serve', choices=['wsgi', 'asgi'], help=argparse.SUPPRESS)
+    parser.add_argument('--database', help=argparse.SUPPRESS)
+    parser.add_argument('--port', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.serve, args.database, args.port)
+        return
+
+    database_path = os.path.join(tempfile.mkdtemp(prefix='workout-bench-'), 'bench.db')
+    populate(make_app(database_path), args.exercises, args.workouts, args.per_workout)
+
+    results = {'clients': args.clients, 'seconds': args.seconds}
+    for mode in args.modes:
+        port = free_port()
+        server = subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), '--serve', mode, '--database', database_path, '--port', str(port)],
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        try:
+            wait_for(port)
+            results[mode] = asyncio.run(load(port, args.clients, args.seconds, args.workouts))
+        finally:
+            server.terminate()
+            server.wait()
+
+    report('asgi', results)
+
+
+if __name__ == '__main__':
+    main()
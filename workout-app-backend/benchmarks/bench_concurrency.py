@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Read throughput while writes are going on: reader threads page through
+GET /workouts and GET /exercises/<id> while writer threads POST workouts,
+once with SQLite's stock settings (rollback journal, synchronous=FULL) and
+once with the tuned defaults (WAL, synchronous=NORMAL, mmap, larger cache).
+
+    python benchmarks/bench_concurrency.py --readers 8 --writers 2 --seconds 10
+"""
+
+import argparse
+import random
+import threading
+import time
+
+from common import make_app, populate, report
+
+PROFILES = {
+    'sqlite_stock': {
+        'SQLITE_JOURNAL_MODE': 'DELETE',
+        'SQLITE_SYNCHRONOUS': 'FULL',
+        'SQLITE_MMAP_SIZE': 0,
+        'SQLITE_CACHE_SIZE': -2000,
+    },
+    'tuned': {},
+}
+
+
+def percentile(values, fraction):
+    if not values:
+        return None
+    values = sorted(values)
+    return round(values[min(len(values) - 1, int(len(values) * fraction))], 3)
+
+
+def run(profile, args):
+    app = make_app(RESPONSE_CACHE_BACKEND=None, **PROFILES[profile])
+    populate(app, args.exercises, args.workouts, args.per_workout)
+
+    stop = threading.Event()
+    lock = threading.Lock()
+    results = {'reads': [], 'writes': [], 'read_errors': 0, 'write_errors': 0}
+
+    def reader(seed):
+        client = app.test_client()
+        rng = random.Random(seed)
+        latencies, errors = [], 0
+        while not stop.is_set():
+            url = (f'/exercises/{rng.randint(1, args.exercises)}' if rng.random() < 0.5
+                   else '/workouts?limit=50&start_date=2020-01-01&order=desc')
+            start = time.perf_counter()
+            status = client.get(url).status_code
+            latencies.append((time.perf_counter() - start) * 1000)
+            errors += status != 200
+        with lock:
+            results['reads'].extend(latencies)
+            results['read_errors'] += errors
+
+    def writer(seed):
+        client = app.test_client()
+        rng = random.Random(seed)
+        latencies, errors = [], 0
+        while not stop.is_set():
+            start = time.perf_counter()
+            status = client.post('/workouts', json={
+                'date': '2024-06-01',
+                'duration_minutes': rng.randint(10, 120),
+                'notes': 'Concurrent write'
+            }).status_code
+            latencies.append((time.perf_counter() - start) * 1000)
+            errors += status != 201
+        with lock:
+            results['writes'].extend(latencies)
+            results['write_errors'] += errors
+
+    threads = [threading.Thread(target=reader, args=(i,)) for i in range(args.readers)]
+    threads += [threading.Thread(target=writer, args=(1000 + i,)) for i in range(args.writers)]
+    for thread in threads:
+        thread.start()
+    time.sleep(args.seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    return {
+        'reads_per_second': round(len(results['reads']) / args.seconds, 1),
+        'read_p50_ms': percentile(results['reads'], 0.5),
+        'read_p99_ms': percentile(results['reads'], 0.99),
+        'read_errors': results['read_errors'],
+        'writes_per_second': round(len(results['writes']) / args.seconds, 1),
+        'write_p50_ms': percentile(results['writes'], 0.5),
+        'write_p99_ms': percentile(results['writes'], 0.99),
+        'write_errors': results['write_errors'],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--exercises', type=int, default=200)
+    parser.add_argument('--workouts', type=int, default=20000)
+    parser.add_argument('--per-workout', type=int, default=5)
+    parser.add_argument('--readers', type=int, default=8)
+    parser.add_argument('--writers', type=int, default=2)
+    parser.add_argument('--seconds', type=float, default=10)
+    args = parser.parse_args()
+
+    report('concurrency', {
+        'readers': args.readers,
+        'writers': args.writers,
+        'seconds': args.seconds,
+        **{profile: run(profile, args) for profile in PROFILES}
+    })
+
+
+if __name__ == '__main__':
+    main()
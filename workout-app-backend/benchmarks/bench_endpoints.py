@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+"""
+Endpoint benchmark suite: drives every endpoint in routes/workouts.py and
+routes/exercises.py through the Flask test client against a synthetic
+history from server/datagen.py, and reports throughput, latency percentiles,
+SQL statements per request and response size as JSON.
+
+    python benchmarks/bench_endpoints.py --workout-exercises 10000000 \\
+        --database /tmp/history.db --output endpoints.json
+
+An existing --database is reused, so the data set is generated once. The
+response cache is off unless --cache is given, so reads measure the handlers.
+Writes clean up after themselves: every row they create, bulk workouts
+included, is deleted again by the DELETE benchmarks, which run until none is
+left, so a reused --database stays the same from one run to the next.
+"""
+
+import argparse
+import json
+import os
+import random
+import re
+import tempfile
+import time
+from datetime import date, timedelta
+
+from sqlalchemy import event
+
+from common import make_app, report, summarize
+
+import datagen
+from extensions import db
+from models import Exercise, Workout
+
+
+def workout_body(rng, exercise_ids=None, count=0):
+    body = {
+        'date': (date.today() - timedelta(days=rng.randint(0, 365))).isoformat(),
+        'duration_minutes': rng.randint(20, 90),
+        'notes': 'Benchmark workout'
+    }
+    if exercise_ids is not None:
+        body['exercises'] = [
+            {'exercise_id': exercise_id, 'reps': rng.randint(5, 12), 'sets': rng.randint(2, 5)}
+            for exercise_id in rng.sample(exercise_ids, count)
+        ]
+    return body
+
+
+def endpoint_suite(args, exercise_ids, workout_ids, first_date, last_date, rng):
+    """
+    (name, expected status, runs, request factory) for every endpoint, in run order.
+    Each factory yields (method, path, json body); writes share the ids they create
+    so later steps update and delete the rows earlier steps made.
+    """
+    created_exercises, created_workouts = [], []
+    span = (last_date - first_date).days
+
+    def window():
+        start = first_date + timedelta(days=rng.randint(0, max(span - 30, 0)))
+        return start, start + timedelta(days=30)
+
+    def reads(path_fn):
+        def factory():
+            while True:
+                yield 'GET', path_fn(), None
+        return factory
+
+    def date_range_page():
+        start, end = window()
+        return f'/workouts?start_date={start}&end_date={end}'
+
+    def stats_window():
+        start, end = window()
+        return f'/exercises/stats?start_date={start}&end_date={end}'
+
+    def create_exercises():
+        for i in range(args.requests):
+            yield 'POST', '/exercises', {
+                'name': f'Benchmark Exercise {time.time_ns()} {i}',
+                'category': 'strength',
+                'equipment_needed': True
+            }
+
+    def update_exercises():
+        for exercise_id in created_exercises:
+            yield 'PUT', f'/exercises/{exercise_id}', {'category': 'core'}
+
+    def create_workouts():
+        for _ in range(args.requests):
+            yield 'POST', '/workouts', workout_body(rng)
+
+    def workout_exercise_requests(method, body):
+        def factory():
+            for i, workout_id in enumerate(created_workouts):
+                exercise_id = exercise_ids[i % len(exercise_ids)]
+                yield method, f'/workouts/{workout_id}/exercises/{exercise_id}/workout_exercises', body
+        return factory
+
+    def bulk_create():
+        for _ in range(max(1, args.requests // 10)):
+            yield 'POST', '/workouts/bulk', [
+                workout_body(rng, exercise_ids, min(6, len(exercise_ids))) for _ in range(args.bulk_size)
+            ]
+
+    def delete_workouts():
+        for workout_id in created_workouts:
+            yield 'DELETE', f'/workouts/{workout_id}', None
+
+    def delete_exercises():
+        for exercise_id in created_exercises:
+            yield 'DELETE', f'/exercises/{exercise_id}', None
+
+    heavy = args.heavy_runs
+    suite = [
+        ('GET /workouts', 200, args.requests, reads(lambda: '/workouts')),
+        ('GET /workouts?order=desc', 200, args.requests, reads(lambda: '/workouts?order=desc&limit=100')),
+        ('GET /workouts?start_date&end_date', 200, args.requests, reads(date_range_page)),
+        ('GET /workouts/<id>', 200, args.requests, reads(lambda: f'/workouts/{rng.choice(workout_ids)}')),
+        ('GET /workouts/batch?ids', 200, args.requests, reads(
+            lambda: f"/workouts/batch?ids={','.join(map(str, rng.sample(workout_ids, 40)))}"
+        )),
+        ('GET /workouts/export', 200, args.export_runs, reads(lambda: '/workouts/export')),
+        ('GET /exercises', 200, args.requests, reads(lambda: '/exercises')),
+        ('GET /exercises?category', 200, args.requests, reads(lambda: '/exercises?category=strength&limit=100')),
+        ('GET /exercises/stats', 200, heavy, reads(lambda: '/exercises/stats')),
+        ('GET /exercises/stats?start_date&end_date', 200, heavy, reads(stats_window)),
+        ('GET /exercises/<id>', 200, args.requests, reads(lambda: f'/exercises/{rng.choice(exercise_ids)}')),
+        ('POST /exercises', 201, args.requests, create_exercises),
+        ('PUT /exercises/<id>', 200, args.requests, update_exercises),
+        ('POST /workouts', 201, args.requests, create_workouts),
+        ('POST /workouts/<id>/exercises/<id>/workout_exercises', 201, args.requests,
+         workout_exercise_requests('POST', {'reps': 10, 'sets': 3})),
+        ('PUT /workouts/<id>/exercises/<id>/workout_exercises', 200, args.requests,
+         workout_exercise_requests('PUT', {'reps': 12, 'sets': 4})),
+        ('DELETE /workouts/<id>/exercises/<id>/workout_exercises', 200, args.requests,
+         workout_exercise_requests('DELETE', None)),
+        ('POST /workouts/bulk', 201, args.requests, bulk_create),
+        # No run limit: these go through every row created above
+        ('DELETE /workouts/<id>', 200, None, delete_workouts),
+        ('DELETE /exercises/<id>', 200, None, delete_exercises),
+    ]
+    created = {
+        'POST /exercises': created_exercises,
+        'POST /workouts': created_workouts,
+        'POST /workouts/bulk': created_workouts
+    }
+    return suite, created
+
+
+def created_ids(body):
+    """Ids of the rows a create request made: the one returned, or each of a bulk request's"""
+    if 'created' in body:
+        return [item['id'] for item in body['created']]
+    return [body['id']]
+
+
+def run_endpoint(client, statements, requests, runs, expected_status, created=None):
+    timings, query_counts, sizes, errors = [], [], [], 0
+    started = time.perf_counter()
+    for method, path, body in requests:
+        if len(timings) == runs:
+            break
+        statements[0] = 0
+        request_started = time.perf_counter()
+        # Read the body as it streams rather than buffering it, so a full export fits in memory
+        response = client.open(path, method=method, json=body, buffered=False)
+        size, chunks = 0, []
+        for chunk in response.iter_encoded():
+            size += len(chunk)
+            if created is not None:
+                chunks.append(chunk)
+        response.close()
+        timings.append((time.perf_counter() - request_started) * 1000)
+        query_counts.append(statements[0])
+        sizes.append(size)
+        if response.status_code != expected_status:
+            errors += 1
+        # A partly failed bulk request (207) still created rows that need deleting
+        if created is not None and 200 <= response.status_code < 300:
+            created.extend(created_ids(json.loads(b''.join(chunks))))
+    elapsed = time.perf_counter() - started
+    if not timings:
+        return None
+    return {
+        **summarize(timings),
+        'errors': errors,
+        'requests_per_second': round(len(timings) / elapsed, 3),
+        'queries_mean': round(sum(query_counts) / len(query_counts), 2),
+        'queries_max': max(query_counts),
+        'response_bytes_mean': round(sum(sizes) / len(sizes))
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--database', help="SQLite file to use; generated if missing or empty")
+    parser.add_argument('--exercises', type=int, default=1000)
+    parser.add_argument('--workout-exercises', type=int, default=200000)
+    parser.add_argument('--years', type=float, default=3)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--requests', type=int, default=200, help="Requests per endpoint")
+    parser.add_argument('--heavy-runs', type=int, default=10, help="Requests for the full-history aggregates")
+    parser.add_argument('--export-runs', type=int, default=2, help="Requests for the full export")
+    parser.add_argument('--bulk-size', type=int, default=50, help="Workouts per bulk request")
+    parser.add_argument('--only', help="Regular expression selecting endpoints by name")
+    parser.add_argument('--cache', action='store_true', help="Leave the response cache on")
+    parser.add_argument('--output', help="Also write the JSON report to this file")
+    args = parser.parse_args()
+
+    database_path = args.database or os.path.join(tempfile.mkdtemp(prefix='workout-bench-'), 'bench.db')
+    config = {} if args.cache else {'RESPONSE_CACHE_BACKEND': None}
+    app = make_app(database_path, **config)
+
+    with app.app_context():
+        if not db.session.scalar(db.select(db.func.count()).select_from(Exercise)):
+            datagen.generate(args.exercises, args.workout_exercises, args.years, args.seed)
+        exercise_ids = db.session.scalars(db.select(Exercise.id)).all()
+        workout_ids = db.session.scalars(db.select(Workout.id)).all()
+        first_date, last_date = db.session.execute(
+            db.select(db.func.min(Workout.date), db.func.max(Workout.date))
+        ).one()
+        engine = db.engine
+        db.session.remove()
+
+    statements = [0]
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def count_statement(*args):
+        statements[0] += 1
+
+    rng = random.Random(args.seed)
+    suite, created = endpoint_suite(args, exercise_ids, workout_ids, first_date, last_date, rng)
+    client = app.test_client()
+    results = {}
+    for name, expected_status, runs, requests in suite:
+        if args.only and not re.search(args.only, name):
+            continue
+        result = run_endpoint(client, statements, requests(), runs, expected_status, created.get(name))
+        if result is not None:
+            results[name] = result
+
+    document = {
+        'dataset': {
+            'exercises': len(exercise_ids),
+            'workouts': len(workout_ids),
+            'first_date': first_date,
+            'last_date': last_date,
+            'response_cache': args.cache
+        },
+        'endpoints': results
+    }
+    report('endpoints', document)
+    if args.output:
+        with open(args.output, 'w') as output:
+            json.dump({'benchmark': 'endpoints', 'results': document}, output, indent=2, default=str)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Per-exercise stats: the per-row model methods (two queries per exercise)
+versus the single grouped query behind GET /exercises/stats.
+
+    python benchmarks/bench_exercise_stats.py --exercises 200 --workouts 50000
+"""
+
+import argparse
+
+from common import Exercise, make_app, measure, populate, report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--exercises', type=int, default=200)
+    parser.add_argument('--workouts', type=int, default=50000)
+    parser.add_argument('--per-workout', type=int, default=10)
+    parser.add_argument('--repeat', type=int, default=10)
+    args = parser.parse_args()
+
+    app = make_app()
+    populate(app, args.exercises, args.workouts, args.per_workout)
+    client = app.test_client()
+
+    def per_row_methods():
+        with app.app_context():
+            for exercise in Exercise.query.all():
+                exercise.get_workout_count()
+                exercise.get_total_reps()
+
+    def grouped_query():
+        with app.app_context():
+            Exercise.get_stats()
+
+    def endpoint():
+        assert client.get('/exercises/stats').status_code == 200
+
+    report('exercise_stats', {
+        'exercises': args.exercises,
+        'workout_exercises_rows': args.workouts * args.per_workout,
+        'per_row_methods': measure(per_row_methods, args.repeat),
+        'grouped_query': measure(grouped_query, args.repeat),
+        'endpoint': measure(endpoint, args.repeat)
+    })
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Query plans and timings for the workout_exercises/workouts hot paths,
+with and without the secondary indexes.
+
+    python benchmarks/bench_indexes.py --workouts 100000 --per-workout 10
+"""
+
+import argparse
+
+from sqlalchemy import text
+
+from common import db, make_app, measure, populate, report
+
+# Index definitions added by the 5cdc965f6077 migration
+INDEXES = {
+    'ix_workout_exercises_exercise_id_workout_id':
+        'CREATE INDEX ix_workout_exercises_exercise_id_workout_id ON workout_exercises (exercise_id, workout_id)',
+    'ix_workouts_date_id':
+        'CREATE INDEX ix_workouts_date_id ON workouts (date, id)',
+}
+
+QUERIES = {
+    'get_exercise': 'SELECT * FROM workout_exercises WHERE exercise_id = :exercise_id',
+    'get_workout_count': 'SELECT count(*) FROM workout_exercises WHERE exercise_id = :exercise_id',
+    'get_total_reps': 'SELECT sum(reps) FROM workout_exercises WHERE exercise_id = :exercise_id AND reps IS NOT NULL',
+    'history_page': 'SELECT * FROM workouts WHERE date >= :start_date ORDER BY date, id LIMIT 50',
+    'delete_exercise_cascade': 'DELETE FROM exercises WHERE id = :exercise_id',
+}
+
+
+def run_queries(connection, params, repeat):
+    results = {}
+    for name, sql in QUERIES.items():
+        plan = [row[-1] for row in connection.execute(text(f'EXPLAIN QUERY PLAN {sql}'), params)]
+
+        def run():
+            # Destructive statements run in a savepoint that is rolled back
+            savepoint = connection.begin_nested()
+            result = connection.execute(text(sql), params)
+            if result.returns_rows:
+                result.fetchall()
+            savepoint.rollback()
+
+        results[name] = {'plan': plan, **measure(run, repeat)}
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--exercises', type=int, default=1000)
+    parser.add_argument('--workouts', type=int, default=100000)
+    parser.add_argument('--per-workout', type=int, default=10)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    app = make_app()
+    populate(app, args.exercises, args.workouts, args.per_workout)
+
+    with app.app_context():
+        connection = db.session.connection()
+        start_date = connection.execute(text('SELECT date FROM workouts WHERE id = :id'), {'id': args.workouts // 2}).scalar()
+        params = {'exercise_id': args.exercises // 2, 'start_date': start_date}
+
+        for name in INDEXES:
+            connection.execute(text(f'DROP INDEX {name}'))
+        before = run_queries(connection, params, args.repeat)
+
+        for sql in INDEXES.values():
+            connection.execute(text(sql))
+        connection.execute(text('ANALYZE'))
+        after = run_queries(connection, params, args.repeat)
+        db.session.rollback()
+
+    report('indexes', {
+        'workout_exercises_rows': args.workouts * args.per_workout,
+        'before': before,
+        'after': after
+    })
+
+
+if __name__ == '__main__':
+    main()
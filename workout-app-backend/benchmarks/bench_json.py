@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+JSON encoding on the list endpoints: payload size and time for the old
+pretty-printed stdlib output, compact stdlib output and compact output from
+the accelerated encoder (when orjson is installed).
+
+    python benchmarks/bench_json.py --workouts 20000 --limit 500
+"""
+
+import argparse
+
+from common import make_app, measure, populate, report
+from serializers import exercise_serializer, workout_serializer
+from extensions import db
+from models import Exercise, Workout
+
+MODES = {
+    'stdlib_pretty': (False, 2),
+    'stdlib_compact': (False, None),
+    'accelerated_compact': (True, None),
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--exercises', type=int, default=500)
+    parser.add_argument('--workouts', type=int, default=20000)
+    parser.add_argument('--limit', type=int, default=500)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    app = make_app(RESPONSE_CACHE_BACKEND=None)
+    populate(app, args.exercises, args.workouts, exercises_per_workout=0)
+    client = app.test_client()
+    accelerated_available = app.json.accelerated
+
+    with app.app_context():
+        payloads = {
+            'workouts': workout_serializer.dump_many(db.session.execute(
+                db.select(*workout_serializer.columns).order_by(Workout.id)
+            )),
+            'exercises': exercise_serializer.dump_many(db.session.execute(
+                db.select(*exercise_serializer.columns).order_by(Exercise.id)
+            )),
+        }
+
+    results = {'accelerated_available': accelerated_available}
+    for mode, (accelerated, indent) in MODES.items():
+        if accelerated and not accelerated_available:
+            continue
+        app.json.accelerated = accelerated
+        pretty = '&pretty=1' if indent else ''
+        mode_results = results[mode] = {}
+        for name, payload in payloads.items():
+            url = f'/{name}?limit={args.limit}{pretty}'
+            with app.app_context():
+                body = app.json.encode(payload, indent)
+                mode_results[name] = {
+                    'rows': len(payload),
+                    'bytes': len(body),
+                    'encode': measure(lambda: app.json.encode(payload, indent), args.repeat),
+                    'endpoint_bytes': len(client.get(url).get_data()),
+                    'endpoint': measure(lambda: client.get(url), args.repeat)
+                }
+
+    report('json', results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Full-text search latency: GET /search against a million workout notes (and
+the exercise catalog), next to the LIKE '%...%' scans it replaces.
+
+    python benchmarks/bench_search.py --notes 1000000 --database /tmp/search.db
+
+Notes are built from the history generator's templates and exercise names,
+with a Zipf-distributed tail of free-text words so queries range from very
+common to rare. Loading goes through the same triggers as every other
+write, so the reported load time includes indexing. An existing --database
+is reused. The response cache is off, so every request runs the search.
+"""
+
+import argparse
+import itertools
+import os
+import random
+import time
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import func, select, text
+
+from common import make_app, measure, report
+
+import datagen
+import fulltext
+from extensions import db
+from models import Exercise, Workout
+
+BATCH_SIZE = 50000
+
+SYLLABLES = [consonant + vowel for consonant in 'bdfgklmnprstvz' for vowel in 'aeiou']
+
+
+def vocabulary(size, rng):
+    """size distinct made-up words of two to four syllables"""
+    words = set()
+    while len(words) < size:
+        words.add(''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))))
+    return sorted(words)
+
+
+def load(app, notes, seed):
+    rng = random.Random(seed)
+    catalog = datagen.exercise_catalog(1000, rng)
+    names = [name for name, *_ in catalog]
+    words = vocabulary(20000, rng)
+    cumulative = list(itertools.accumulate(1 / (rank + 1) for rank in range(len(words))))
+    now = datetime.utcnow()
+    start = date.today() - timedelta(days=3650)
+
+    def note():
+        parts = [rng.choice(datagen.NOTES).format(exercise=rng.choice(names))]
+        if rng.random() < 0.6:
+            parts.append(' '.join(rng.choices(words, cum_weights=cumulative, k=rng.randint(3, 15))))
+        return '. '.join(parts)
+
+    with app.app_context():
+        connection = db.session.connection()
+        connection.execute(db.insert(Exercise.__table__), [
+            {'name': name, 'category': category, 'equipment_needed': equipment, 'created_at': now, 'updated_at': now}
+            for name, category, equipment, _ in catalog
+        ])
+        for offset in range(0, notes, BATCH_SIZE):
+            connection.execute(db.insert(Workout.__table__), [
+                {
+                    'date': start + timedelta(days=(offset + i) * 3650 // notes),
+                    'duration_minutes': rng.randint(20, 90),
+                    'notes': note(),
+                    'created_at': now,
+                    'updated_at': now
+                }
+                for i in range(min(BATCH_SIZE, notes - offset))
+            ])
+        db.session.commit()
+    return words
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--database', help="SQLite file to use; loaded if missing or empty")
+    parser.add_argument('--notes', type=int, default=1000000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--repeat', type=int, default=50)
+    parser.add_argument('--like-repeat', type=int, default=5, help="Runs of each LIKE scan")
+    args = parser.parse_args()
+
+    app = make_app(args.database, RESPONSE_CACHE_BACKEND=None)
+    client = app.test_client()
+    results = {}
+
+    with app.app_context():
+        existing = db.session.scalar(select(func.count()).select_from(Workout.__table__))
+    if not existing:
+        started = time.perf_counter()
+        load(app, args.notes, args.seed)
+        results['load_seconds'] = round(time.perf_counter() - started, 1)
+        with app.app_context():
+            started = time.perf_counter()
+            fulltext.optimize(db.session.connection())
+            db.session.commit()
+            results['optimize_seconds'] = round(time.perf_counter() - started, 1)
+            db.session.execute(text('ANALYZE'))
+            db.session.commit()
+
+    with app.app_context():
+        results['workouts_with_notes'] = db.session.scalar(
+            select(func.count()).select_from(Workout.__table__).where(Workout.notes.isnot(None))
+        )
+        # A long word (so few other words share it as a prefix) found in only a handful of notes
+        db.session.execute(text(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS temp.workouts_vocabulary USING fts5vocab(main, workouts_fts, row)"
+        ))
+        rare = db.session.scalar(text(
+            "SELECT term FROM temp.workouts_vocabulary WHERE doc BETWEEN 2 AND 20 AND length(term) >= 8 "
+            "ORDER BY term LIMIT 1"
+        ))
+    results['database_mb'] = round(os.path.getsize(app.config['SQLALCHEMY_DATABASE_URI'][len('sqlite:///'):]) / 2**20)
+
+    queries = {
+        'common_word': 'day',
+        'exercise_name': 'squat',
+        'two_words': 'felt heavy',
+        'short_prefix': 'ba',
+        'rare_word': rare,
+        'no_match': 'zzyzx',
+        'exercises_only': 'barbell',
+    }
+
+    def search(q, **params):
+        response = client.get('/search', query_string={'q': q, **params})
+        assert response.status_code == 200, response.get_json()
+        return response
+
+    searches = {}
+    for name, q in queries.items():
+        params = {'type': 'exercise'} if name == 'exercises_only' else {}
+        with app.app_context():
+            matches = fulltext.matches(fulltext.terms(q), (params['type'],) if params else fulltext.TYPES)
+            total = db.session.scalar(select(func.count()).select_from(matches))
+        searches[name] = {'q': q, 'matches': total, **measure(lambda: search(q, **params), args.repeat)}
+    results['search'] = searches
+
+    # Following the cursor twenty pages deep into the most common word
+    def deep_page():
+        cursor = None
+        for _ in range(20):
+            cursor = search('day', limit=50, **({'cursor': cursor} if cursor else {})).headers['X-Next-Cursor']
+    results['search_twenty_pages_deep'] = measure(deep_page, max(args.repeat // 10, 3))
+
+    # What the same lookups cost without the index: the first page by id, and every match
+    like = {}
+    with app.app_context():
+        for name in ('common_word', 'rare_word', 'no_match'):
+            pattern = f'%{queries[name]}%'
+            first_page = select(Workout.id).where(Workout.notes.ilike(pattern)).order_by(Workout.id).limit(50)
+            every_match = select(func.count()).select_from(Workout.__table__).where(Workout.notes.ilike(pattern))
+            like[name] = {
+                'first_page': measure(lambda: db.session.execute(first_page).all(), args.like_repeat),
+                'count_matches': measure(lambda: db.session.scalar(every_match), args.like_repeat)
+            }
+    results['like_scan'] = like
+
+    report('search', results)
+
+
+if __name__ == '__main__':
+    main()
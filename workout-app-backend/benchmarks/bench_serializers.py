@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Serializing workout lists: marshmallow over ORM objects versus the compiled
+row serializers over Core rows, at 10k and 100k workouts by default.
+
+    python benchmarks/bench_serializers.py --sizes 10000 100000
+"""
+
+import argparse
+
+from flask import json
+
+from common import Workout, db, make_app, measure, populate, report
+from schemas.workout_schema import workouts_schema
+from serializers import workout_serializer
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    results = {}
+    for size in args.sizes:
+        app = make_app()
+        populate(app, exercises=10, workouts=size, exercises_per_workout=0)
+
+        def orm_marshmallow():
+            with app.app_context():
+                return json.dumps(workouts_schema.dump(Workout.query.order_by(Workout.id).all()))
+
+        def rows_compiled():
+            with app.app_context():
+                rows = db.session.execute(db.select(*workout_serializer.columns).order_by(Workout.id))
+                return json.dumps(workout_serializer.dump_many(rows))
+
+        with app.app_context():
+            assert orm_marshmallow() == rows_compiled()
+
+        results[size] = {
+            'orm_marshmallow': measure(orm_marshmallow, args.repeat),
+            'rows_compiled': measure(rows_compiled, args.repeat)
+        }
+        results[size]['speedup'] = round(
+            results[size]['orm_marshmallow']['p50_ms'] / results[size]['rows_compiled']['p50_ms'], 2
+        )
+
+    report('serializers', results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,123 @@
+"""Shared helpers for the benchmark scripts in this directory"""
+
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+# The server modules use flat imports (e.g. `from extensions import db`)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'server'))
+
+from app import create_app
+from extensions import db
+from models import Exercise, Workout, WorkoutExercise
+
+CATEGORIES = ['cardio', 'strength', 'flexibility', 'balance', 'core']
+
+
+def make_app(database_path=None, **config):
+    """Create the app against a throwaway SQLite file with an empty schema"""
+    if database_path is None:
+        database_path = os.path.join(tempfile.mkdtemp(prefix='workout-bench-'), 'bench.db')
+    app = create_app({
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{database_path}',
+        **config
+    })
+    with app.app_context():
+        db.create_all()
+    return app
+
+
+def populate(app, exercises=1000, workouts=100000, exercises_per_workout=10, seed=42):
+    """
+    Fill the tables with simple synthetic rows using executemany.
+
+    Each workout gets exercises_per_workout distinct exercises, so
+    workout_exercises ends up with workouts * exercises_per_workout rows.
+    """
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+    start = date.today() - timedelta(days=workouts // 2)
+
+    with app.app_context():
+        connection = db.session.connection()
+        connection.execute(db.insert(Exercise.__table__), [
+            {
+                'name': f'Exercise {i}',
+                'category': CATEGORIES[i % len(CATEGORIES)],
+                'equipment_needed': i % 3 == 0,
+                'created_at': now,
+                'updated_at': now
+            }
+            for i in range(exercises)
+        ])
+        connection.execute(db.insert(Workout.__table__), [
+            {
+                'date': start + timedelta(days=i // 2),
+                'duration_minutes': rng.randint(10, 120),
+                'notes': f'Workout {i}',
+                'created_at': now,
+                'updated_at': now
+            }
+            for i in range(workouts)
+        ])
+
+        def workout_exercise_rows():
+            for workout_id in range(1, workouts + 1):
+                for exercise_id in rng.sample(range(1, exercises + 1), exercises_per_workout):
+                    timed = exercise_id % 4 == 0
+                    yield {
+                        'workout_id': workout_id,
+                        'exercise_id': exercise_id,
+                        'reps': None if timed else rng.randint(5, 20),
+                        'sets': None if timed else rng.randint(1, 5),
+                        'duration_seconds': rng.randint(30, 1800) if timed else None,
+                        'created_at': now,
+                        'updated_at': now
+                    }
+
+        # Insert in chunks so the parameter list never has to fit in memory at once
+        rows = workout_exercise_rows()
+        while True:
+            chunk = [row for _, row in zip(range(50000), rows)]
+            if not chunk:
+                break
+            connection.execute(db.insert(WorkoutExercise.__table__), chunk)
+        db.session.commit()
+
+
+def percentile(sorted_values, fraction):
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+def summarize(timings):
+    """Min, percentiles and max of a list of millisecond timings"""
+    timings = sorted(timings)
+    return {
+        'runs': len(timings),
+        'min_ms': round(timings[0], 3),
+        'p50_ms': round(statistics.median(timings), 3),
+        'p90_ms': round(percentile(timings, 0.90), 3),
+        'p95_ms': round(percentile(timings, 0.95), 3),
+        'p99_ms': round(percentile(timings, 0.99), 3),
+        'max_ms': round(timings[-1], 3)
+    }
+
+
+def measure(fn, repeat=20):
+    """Run fn repeat times and summarize wall time in milliseconds"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return summarize(timings)
+
+
+def report(name, results):
+    """Print benchmark results as a single JSON document"""
+    print(json.dumps({'benchmark': name, 'results': results}, indent=2, default=str))
@@ -0,0 +1,55 @@
+import sys
+import os
+from contextlib import contextmanager
+
+# The server modules use flat imports (e.g. `from extensions import db`)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'server'))
+
+import pytest
+from sqlalchemy import event
+
+from app import create_app
+from extensions import db
+
+
+@pytest.fixture
+def app():
+    app = create_app({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': 'sqlite://',
+    })
+    
+    with app.app_context():
+        db.create_all()
+    
+    yield app
+    
+    with app.app_context():
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def count_queries(app):
+    """Context manager yielding a list that collects every SQL statement executed"""
+    @contextmanager
+    def counter():
+        statements = []
+        
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+        
+        with app.app_context():
+            engine = db.engine
+        event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+        try:
+            yield statements
+        finally:
+            event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+    
+    return counter
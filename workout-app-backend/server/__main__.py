@@ -0,0 +1,37 @@
+"""
+Command line entry point, run from the project directory:
+
+    python -m server serve [--bind HOST:PORT] [--workers N] [--threads N]
+    python -m server generate [--exercises N] [--workout-exercises N] [--years N] [--reset]
+"""
+
+import argparse
+import os
+import sys
+
+# The server modules use flat imports (e.g. `from extensions import db`)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import datagen
+import serve
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m server')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    serve_parser = commands.add_parser('serve', help="Run the production WSGI server (gunicorn)")
+    serve.add_arguments(serve_parser)
+
+    generate_parser = commands.add_parser('generate', help="Fill the database with a synthetic training history")
+    datagen.add_arguments(generate_parser)
+
+    args = parser.parse_args(argv)
+    if args.command == 'serve':
+        serve.serve(args)
+    elif args.command == 'generate':
+        datagen.main(args)
+
+
+if __name__ == '__main__':
+    main()
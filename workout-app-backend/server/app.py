@@ -1,28 +1,88 @@
 from flask import Flask, jsonify
 from extensions import db, migrate
+import database
+import json_provider
+import metrics
+import routing
 
-def create_app():
+def create_app(test_config=None):
     app = Flask(__name__)
+    app.json = json_provider.FastJSONProvider(app)
     
     # Configuration
     app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///workout_app.db'
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-    app.config['JSONIFY_PRETTYPRINT_REGULAR'] = True
+    
+    # Database URL, pool sizing and SQLite tuning from the environment (see database.py)
+    app.config.update(database.settings_from_env())
+    
+    # Allow tests to override configuration (e.g. an in-memory database)
+    if test_config:
+        app.config.update(test_config)
+    
+    # Refuse databases the upserts can't be written for now, not on the first write
+    database.check_backends(app.config)
+    
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+        **database.engine_options(app.config),
+        **app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {})
+    }
     
     # Initialize extensions with app
     db.init_app(app)
+    database.init_app(app)
     migrate.init_app(app, db)
+    json_provider.init_app(app)
+    
+    # Time every request and its SQL first, so the measurement covers the other hooks
+    metrics.init_app(app)
+    
+    # Send GET requests to the read replica when DATABASE_REPLICA_URL is set
+    routing.init_app(app)
     
     # Import models to ensure they're registered with SQLAlchemy
     import models
     print("Models imported successfully")
     
+    # Register the listeners that keep the training rollups up to date
+    import rollups
+    app.cli.add_command(rollups.rollups_cli)
+    
+    # And the ones that keep personal records and progression series up to date
+    import progression
+    app.cli.add_command(progression.progression_cli)
+    
+    # Create the full-text search index with its tables and keep it in sync
+    import fulltext
+    app.cli.add_command(fulltext.search_cli)
+    
+    # Register the listener that versions tables for ETags, and the response cache
+    import http_cache
+    import response_cache
+    response_cache.init_app(app)
+    
+    # Stored responses for writes retried with an Idempotency-Key
+    import idempotency
+    app.cli.add_command(idempotency.idempotency_cli)
+    
+    # Compress responses for clients that accept gzip/deflate/br
+    import compression
+    compression.init_app(app)
+    
+    # On-demand profiling for admins; not installed at all unless PROFILER_TOKEN is set
+    import profiler
+    profiler.init_app(app)
+    
     # Register blueprints
     from routes.workouts import workout_bp
     from routes.exercises import exercise_bp
+    from routes.stats import stats_bp
+    from routes.search import search_bp
     
     app.register_blueprint(workout_bp, url_prefix='/workouts')
     app.register_blueprint(exercise_bp, url_prefix='/exercises')
+    app.register_blueprint(stats_bp, url_prefix='/stats')
+    app.register_blueprint(search_bp, url_prefix='/search')
     
     # Health check endpoint
     @app.route('/')
@@ -0,0 +1,195 @@
+"""
+ASGI entry point serving the app from create_app with async database access.
+
+Each request runs the unchanged Flask handlers in a greenlet on the event
+loop, with db.session bound to an async engine (aiosqlite or asyncpg).
+Whenever a handler waits on the database the greenlet yields to the loop, so
+one process overlaps the database I/O of many concurrent requests instead of
+holding a thread per request.
+
+    cd server && uvicorn --factory asgi:create_asgi_app --port 5555
+"""
+
+import asyncio
+import io
+import sys
+import weakref
+
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.util import await_only, greenlet_spawn
+
+import database
+from app import create_app
+from extensions import async_engines, db
+
+# Async driver used for each database backend
+ASYNC_DRIVERS = {
+    'sqlite': 'aiosqlite',
+    'postgresql': 'asyncpg',
+}
+
+
+def async_url(url):
+    """The same database URL with the backend's async driver"""
+    url = make_url(url)
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver configured for {backend}")
+    if backend == 'sqlite' and url.database in (None, '', ':memory:'):
+        raise ValueError("ASGI mode needs a database file or server, not in-memory SQLite")
+    return url.set(drivername=f'{backend}+{ASYNC_DRIVERS[backend]}')
+
+
+def enable_foreign_keys(dbapi_connection, connection_record):
+    # The Engine-wide listener in extensions.py only recognizes sqlite3 connections
+    cursor = dbapi_connection.cursor()
+    cursor.execute('PRAGMA foreign_keys=ON')
+    cursor.close()
+
+
+def build_environ(scope, body):
+    """Translate an ASGI HTTP scope and its request body into a WSGI environ"""
+    server = scope.get('server') or ('localhost', 80)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', '').encode('utf-8').decode('latin1'),
+        'PATH_INFO': scope['path'].encode('utf-8').decode('latin1'),
+        'QUERY_STRING': scope['query_string'].decode('ascii'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1] or 80),
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': False,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    if scope.get('client'):
+        environ['REMOTE_ADDR'], environ['REMOTE_PORT'] = scope['client'][0], str(scope['client'][1])
+
+    for name, value in scope['headers']:
+        name = name.decode('latin1')
+        if name == 'content-length':
+            key = 'CONTENT_LENGTH'
+        elif name == 'content-type':
+            key = 'CONTENT_TYPE'
+        else:
+            key = 'HTTP_' + name.upper().replace('-', '_')
+        value = value.decode('latin1')
+        environ[key] = f'{environ[key]},{value}' if key in environ else value
+    return environ
+
+
+class AsgiApp:
+    """ASGI application running a Flask app's requests in greenlets over async engines"""
+
+    def __init__(self, flask_app):
+        self.flask_app = flask_app
+        # Lets extensions that depend on one thread per request (the stack sampler) opt out
+        flask_app.extensions['asgi'] = self
+        # Async connections belong to the loop that opened them, so engines are per loop
+        self._engines = weakref.WeakKeyDictionary()
+
+    def _create_engines(self):
+        app = self.flask_app
+        with app.app_context():
+            urls = {'primary': db.engine.url}
+        replica = app.extensions.get('read_replica')
+        if replica is not None:
+            urls['replica'] = replica.url
+
+        engines = {}
+        for name, url in urls.items():
+            url = async_url(url)
+            options = database.engine_options({
+                **app.config, 'SQLALCHEMY_DATABASE_URI': url.render_as_string(hide_password=False)
+            })
+            engine = create_async_engine(url, **options)
+            if url.get_backend_name() == 'sqlite':
+                database.configure_sqlite(engine.sync_engine, app.config)
+                event.listen(engine.sync_engine, 'connect', enable_foreign_keys)
+            engines[name] = engine
+        return engines
+
+    def engines(self):
+        loop = asyncio.get_running_loop()
+        engines = self._engines.get(loop)
+        if engines is None:
+            engines = self._engines[loop] = self._create_engines()
+        return engines
+
+    async def dispose(self):
+        engines = self._engines.pop(asyncio.get_running_loop(), {})
+        for engine in engines.values():
+            await engine.dispose()
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+            return
+        if scope['type'] != 'http':
+            raise ValueError(f"Unsupported ASGI scope type: {scope['type']}")
+
+        body = bytearray()
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                return
+            body += message.get('body', b'')
+            if not message.get('more_body'):
+                break
+
+        # The greenlet shares this task's context, so the session sees these engines
+        token = async_engines.set(self.engines())
+        try:
+            await greenlet_spawn(self._respond, build_environ(scope, bytes(body)), send)
+        finally:
+            async_engines.reset(token)
+
+    def _respond(self, environ, send):
+        """Run the WSGI app; database calls inside it await on the event loop"""
+        response_start = {}
+
+        def start_response(status, headers, exc_info=None):
+            response_start.update({
+                'type': 'http.response.start',
+                'status': int(status.split(' ', 1)[0]),
+                'headers': [(name.lower().encode('latin1'), value.encode('latin1')) for name, value in headers]
+            })
+
+        chunks = self.flask_app(environ, start_response)
+        try:
+            started = False
+            for chunk in chunks:
+                if not chunk:
+                    continue
+                if not started:
+                    await_only(send(response_start))
+                    started = True
+                await_only(send({'type': 'http.response.body', 'body': chunk, 'more_body': True}))
+            if not started:
+                await_only(send(response_start))
+            await_only(send({'type': 'http.response.body', 'body': b'', 'more_body': False}))
+        finally:
+            close = getattr(chunks, 'close', None)
+            if close is not None:
+                close()
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await self.dispose()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+
+def create_asgi_app(test_config=None):
+    """ASGI counterpart of app.create_app"""
+    return AsgiApp(create_app(test_config))
@@ -0,0 +1,211 @@
+"""
+Response compression negotiated through Accept-Encoding.
+
+gzip and deflate come from zlib; br is offered when the brotli (or
+brotlicffi) package is installed. Buffered responses under
+COMPRESS_MIN_SIZE are sent as they are. Streamed responses are compressed
+chunk by chunk as the generator produces them, since their size is not
+known up front, with a sync flush after every COMPRESS_STREAM_FLUSH_SIZE
+bytes of input so the compressor's buffering doesn't hold the body back.
+"""
+
+import threading
+import time
+import zlib
+
+from flask import g, has_app_context, request
+
+try:
+    import brotli
+except ImportError:
+    try:
+        import brotlicffi as brotli
+    except ImportError:
+        brotli = None
+
+COMPRESSIBLE_MIMETYPES = {'application/json', 'application/x-ndjson', 'text/plain', 'text/html', 'text/csv'}
+
+# zlib window bits selecting the gzip and zlib ("deflate" in HTTP) containers
+ZLIB_WBITS = {'gzip': 31, 'deflate': 15}
+
+
+def available_encodings():
+    """Encodings in server preference order, best first"""
+    encodings = ['br'] if brotli is not None else []
+    return encodings + ['gzip', 'deflate']
+
+
+class Compressor:
+    """Incremental compressor with the same compress()/flush() interface for every encoding"""
+
+    def __init__(self, encoding, level, brotli_quality):
+        if encoding == 'br':
+            self._compressor = brotli.Compressor(quality=brotli_quality)
+            self._compress = self._compressor.process
+            self._sync_flush = self._compressor.flush
+            self._flush = self._compressor.finish
+        else:
+            self._compressor = zlib.compressobj(level, zlib.DEFLATED, ZLIB_WBITS[encoding])
+            self._compress = self._compressor.compress
+            self._sync_flush = lambda: self._compressor.flush(zlib.Z_SYNC_FLUSH)
+            self._flush = self._compressor.flush
+
+    def compress(self, data):
+        return self._compress(data)
+
+    def sync_flush(self):
+        """Emit everything compressed so far without ending the stream"""
+        return self._sync_flush()
+
+    def flush(self):
+        return self._flush()
+
+
+class CompressionStats:
+    """Totals of bytes in, bytes out and CPU time spent compressing, per encoding"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._totals = {}
+
+    def record(self, encoding, bytes_in, bytes_out, cpu_seconds):
+        with self._lock:
+            totals = self._totals.setdefault(encoding, {
+                'responses': 0, 'bytes_in': 0, 'bytes_out': 0, 'cpu_seconds': 0.0
+            })
+            totals['responses'] += 1
+            totals['bytes_in'] += bytes_in
+            totals['bytes_out'] += bytes_out
+            totals['cpu_seconds'] += cpu_seconds
+
+    def stats(self):
+        with self._lock:
+            return {
+                encoding: {
+                    **totals,
+                    'ratio': round(totals['bytes_in'] / totals['bytes_out'], 3) if totals['bytes_out'] else None,
+                    'cpu_ms_per_response': round(totals['cpu_seconds'] * 1000 / totals['responses'], 3)
+                }
+                for encoding, totals in self._totals.items()
+            }
+
+
+def choose_encoding(accept_encodings, encodings):
+    """The acceptable encoding with the highest client quality, ties going to server preference"""
+    best, best_quality = None, 0
+    for encoding in encodings:
+        quality = accept_encodings[encoding]
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+class ResponseCompression:
+    def __init__(self, app):
+        self.min_size = app.config.get('COMPRESS_MIN_SIZE', 1024)
+        self.level = app.config.get('COMPRESS_LEVEL', 6)
+        self.brotli_quality = app.config.get('COMPRESS_BROTLI_QUALITY', 4)
+        # Each sync flush costs a few bytes of ratio, so streams flush per block of input, not per chunk
+        self.stream_flush_size = app.config.get('COMPRESS_STREAM_FLUSH_SIZE', 16 * 1024)
+        self.mimetypes = app.config.get('COMPRESS_MIMETYPES', COMPRESSIBLE_MIMETYPES)
+        self.encodings = [
+            encoding for encoding in app.config.get('COMPRESS_ENCODINGS', available_encodings())
+            if encoding in available_encodings()
+        ]
+        self.metrics = CompressionStats()
+
+    def stats(self):
+        return self.metrics.stats()
+
+    def _compressible(self, response):
+        return (
+            response.status_code == 200
+            and request.method != 'HEAD'
+            and response.mimetype in self.mimetypes
+            and 'Content-Encoding' not in response.headers
+            and not response.direct_passthrough
+            and 'no-transform' not in response.headers.get('Cache-Control', '')
+        )
+
+    def after_request(self, response):
+        if not self._compressible(response):
+            return response
+        response.vary.add('Accept-Encoding')
+
+        encoding = choose_encoding(request.accept_encodings, self.encodings)
+        if encoding is None:
+            return response
+        if not response.is_streamed and response.calculate_content_length() < self.min_size:
+            return response
+
+        response.headers['Content-Encoding'] = encoding
+        # The compressed bytes are a different representation of the same resource
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+
+        if response.is_streamed:
+            response.response = self._compress_stream(response.response, encoding)
+            response.headers.pop('Content-Length', None)
+            return response
+
+        start = time.thread_time()
+        data = response.get_data()
+        compressor = Compressor(encoding, self.level, self.brotli_quality)
+        body = compressor.compress(data) + compressor.flush()
+        cpu_seconds = time.thread_time() - start
+
+        response.set_data(body)
+        self._record(encoding, len(data), len(body), cpu_seconds)
+        response.headers.add('Server-Timing', f'compress;dur={cpu_seconds * 1000:.3f};desc="{encoding}"')
+        return response
+
+    def _compress_stream(self, chunks, encoding):
+        compressor = Compressor(encoding, self.level, self.brotli_quality)
+        bytes_in = bytes_out = unflushed = 0
+        cpu_seconds = 0.0
+        try:
+            for chunk in chunks:
+                if isinstance(chunk, str):
+                    chunk = chunk.encode('utf-8')
+                start = time.thread_time()
+                output = compressor.compress(chunk)
+                unflushed += len(chunk)
+                if unflushed >= self.stream_flush_size:
+                    output += compressor.sync_flush()
+                    unflushed = 0
+                cpu_seconds += time.thread_time() - start
+                bytes_in += len(chunk)
+                if output:
+                    bytes_out += len(output)
+                    yield output
+            start = time.thread_time()
+            output = compressor.flush()
+            cpu_seconds += time.thread_time() - start
+            bytes_out += len(output)
+            yield output
+            self._record(encoding, bytes_in, bytes_out, cpu_seconds)
+        finally:
+            close = getattr(chunks, 'close', None)
+            if close is not None:
+                close()
+
+    def _record(self, encoding, bytes_in, bytes_out, cpu_seconds):
+        self.metrics.record(encoding, bytes_in, bytes_out, cpu_seconds)
+        if has_app_context():
+            g.compression = {
+                'encoding': encoding,
+                'bytes_in': bytes_in,
+                'bytes_out': bytes_out,
+                'cpu_seconds': cpu_seconds
+            }
+
+
+def init_app(app):
+    """
+    Compress responses, exposing the middleware and its metrics as
+    app.extensions['compression']. Set COMPRESS_ENCODINGS = [] to disable.
+    """
+    compression = ResponseCompression(app)
+    app.extensions['compression'] = compression
+    app.after_request(compression.after_request)
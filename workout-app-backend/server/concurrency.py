@@ -0,0 +1,64 @@
+"""
+Optimistic concurrency for the update routes.
+
+Exercises, workouts and workout exercises carry a version column (see
+BaseModel) that every update increments. A row's entity tag names its table,
+id and version ("exercises-3-2"); GET /exercises/<id> and the update routes
+send it in ETag, and a client echoing it in If-Match has an update based on
+an older version refused with 409 Conflict instead of overwriting the change
+it never saw. The UPDATE itself also matches on the version the row was
+loaded with, so of two writers racing between the read and the commit only
+one succeeds, and nothing is locked.
+"""
+
+from flask import request
+from sqlalchemy import select
+from werkzeug.http import quote_etag
+
+from extensions import db
+
+# For StaleDataError, raised when the row changed between loading it and committing
+STALE_MESSAGE = "The resource was modified by another request; reload it and retry"
+
+
+class VersionConflict(Exception):
+    """The row has moved on from the entity tag named in If-Match"""
+
+    def __init__(self, obj):
+        super().__init__(f"The resource is at version {obj.version}, not the one in If-Match; reload it and retry")
+        self.current = obj.version
+        self.headers = etag_header(obj)
+
+
+def row_etag(model, id, version):
+    """Entity tag of one version of a row"""
+    return f'{model.__tablename__}-{id}-{version}'
+
+
+def etag_header(obj):
+    """The ETag header naming obj's current version"""
+    return {'ETag': quote_etag(row_etag(type(obj), obj.id, obj.version))}
+
+
+def resource_etag(model):
+    """
+    For conditional(resource=...): look up the row tag of the model instance
+    the view's id names, or None when there is no such row.
+    """
+    def lookup(id, **kwargs):
+        version = db.session.scalar(select(model.version).where(model.id == id))
+        return None if version is None else row_etag(model, id, version)
+    return lookup
+
+
+def check_version(obj):
+    """
+    Raise VersionConflict unless the request's If-Match is absent, * or names
+    obj's current version, either by its row tag or by a GET ETag built on it.
+    """
+    if 'If-Match' not in request.headers or request.if_match.star_tag:
+        return
+    etag = row_etag(type(obj), obj.id, obj.version)
+    tags = request.if_match.as_set(include_weak=True)
+    if not any(tag == etag or tag.startswith(f'{etag}.') for tag in tags):
+        raise VersionConflict(obj)
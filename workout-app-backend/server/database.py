@@ -0,0 +1,181 @@
+"""
+Database settings read from the environment, and per-connection tuning.
+
+DATABASE_URL selects the database, SQLite (the default) or PostgreSQL; other
+backends are refused when the app is created, since the rollups, caches and
+idempotency keys are written with INSERT ... ON CONFLICT. Pool sizing and the
+statement timeout apply to either backend; on SQLite every new connection is
+switched to WAL journaling so readers are not blocked by a writer, and given
+a busy timeout so writers wait for each other instead of failing with
+"database is locked".
+"""
+
+import os
+import sqlite3
+import time
+
+from sqlalchemy import event
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import make_url
+
+from extensions import db
+
+# Environment variable -> (config key, type)
+ENVIRONMENT_SETTINGS = {
+    'DATABASE_URL': ('SQLALCHEMY_DATABASE_URI', str),
+    'DATABASE_REPLICA_URL': ('DATABASE_REPLICA_URL', str),
+    'REPLICA_STICKY_SECONDS': ('REPLICA_STICKY_SECONDS', int),
+    'DB_POOL_SIZE': ('DB_POOL_SIZE', int),
+    'DB_MAX_OVERFLOW': ('DB_MAX_OVERFLOW', int),
+    'DB_POOL_TIMEOUT': ('DB_POOL_TIMEOUT', int),
+    'DB_POOL_RECYCLE': ('DB_POOL_RECYCLE', int),
+    'DB_STATEMENT_TIMEOUT': ('DB_STATEMENT_TIMEOUT', int),
+    'SQLITE_JOURNAL_MODE': ('SQLITE_JOURNAL_MODE', str),
+    'SQLITE_SYNCHRONOUS': ('SQLITE_SYNCHRONOUS', str),
+    'SQLITE_BUSY_TIMEOUT': ('SQLITE_BUSY_TIMEOUT', int),
+    'SQLITE_MMAP_SIZE': ('SQLITE_MMAP_SIZE', int),
+    'SQLITE_CACHE_SIZE': ('SQLITE_CACHE_SIZE', int),
+}
+
+# Pragmas applied to every SQLite connection; set one to None to keep SQLite's default
+SQLITE_DEFAULTS = {
+    'SQLITE_JOURNAL_MODE': 'WAL',
+    'SQLITE_SYNCHRONOUS': 'NORMAL',  # Durable across application crashes; WAL keeps the file consistent
+    'SQLITE_BUSY_TIMEOUT': 5000,  # Milliseconds a writer waits for the lock
+    'SQLITE_MMAP_SIZE': 256 * 1024 * 1024,  # Bytes of the file read through mmap
+    'SQLITE_CACHE_SIZE': -64000,  # Negative values are KiB, i.e. a 64MB page cache
+}
+
+SQLITE_PRAGMAS = {
+    'SQLITE_JOURNAL_MODE': 'journal_mode',
+    'SQLITE_SYNCHRONOUS': 'synchronous',
+    'SQLITE_BUSY_TIMEOUT': 'busy_timeout',
+    'SQLITE_MMAP_SIZE': 'mmap_size',
+    'SQLITE_CACHE_SIZE': 'cache_size',
+}
+
+# Backend name -> dialect module providing insert() with on_conflict_do_update()
+UPSERT_DIALECTS = {
+    'sqlite': sqlite,
+    'postgresql': postgresql,
+}
+
+POOL_OPTIONS = {
+    'DB_POOL_SIZE': 'pool_size',
+    'DB_MAX_OVERFLOW': 'max_overflow',
+    'DB_POOL_TIMEOUT': 'pool_timeout',
+    'DB_POOL_RECYCLE': 'pool_recycle',
+}
+
+
+def settings_from_env(environ=os.environ):
+    """App config entries for the database variables set in environ"""
+    settings = {}
+    for variable, (key, kind) in ENVIRONMENT_SETTINGS.items():
+        value = environ.get(variable)
+        if value is None or value == '':
+            continue
+        try:
+            settings[key] = kind(value)
+        except ValueError:
+            raise ValueError(f"{variable} must be an integer")
+
+    # Heroku-style URLs use a scheme SQLAlchemy no longer accepts
+    for key in ('SQLALCHEMY_DATABASE_URI', 'DATABASE_REPLICA_URL'):
+        url = settings.get(key)
+        if url and url.startswith('postgres://'):
+            settings[key] = 'postgresql://' + url[len('postgres://'):]
+    return settings
+
+
+def check_backends(config):
+    """Raise ValueError unless the primary and replica databases are supported backends"""
+    for key in ('SQLALCHEMY_DATABASE_URI', 'DATABASE_REPLICA_URL'):
+        if config.get(key):
+            backend = make_url(config[key]).get_backend_name()
+            if backend not in UPSERT_DIALECTS:
+                raise ValueError(
+                    f"{key} uses {backend}; supported databases are {', '.join(UPSERT_DIALECTS)}"
+                )
+
+
+def insert_for(connection):
+    """The insert() construct supporting on_conflict_do_update() for connection's backend"""
+    dialect = UPSERT_DIALECTS.get(connection.dialect.name)
+    if dialect is None:
+        raise ValueError(f"INSERT ... ON CONFLICT is not supported on {connection.dialect.name}")
+    return dialect.insert
+
+
+def _is_memory_sqlite(url):
+    return url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:')
+
+
+def engine_options(config):
+    """SQLALCHEMY_ENGINE_OPTIONS for the configured database URL"""
+    url = make_url(config['SQLALCHEMY_DATABASE_URI'])
+    options = {}
+
+    # In-memory SQLite shares one connection, so there is no pool to size
+    if not _is_memory_sqlite(url):
+        for key, option in POOL_OPTIONS.items():
+            if config.get(key) is not None:
+                options[option] = config[key]
+
+    if url.get_backend_name() != 'sqlite':
+        # Drop connections the server closed while they sat in the pool
+        options['pool_pre_ping'] = True
+
+    timeout = config.get('DB_STATEMENT_TIMEOUT')
+    if timeout and url.get_backend_name() == 'postgresql':
+        options['connect_args'] = {'options': f'-c statement_timeout={timeout}'}
+
+    return options
+
+
+def configure_sqlite(engine, config):
+    pragmas = [
+        (SQLITE_PRAGMAS[key], config.get(key, default))
+        for key, default in SQLITE_DEFAULTS.items()
+    ]
+    timeout = config.get('DB_STATEMENT_TIMEOUT')
+
+    @event.listens_for(engine, 'connect')
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for pragma, value in pragmas:
+            if value is not None:
+                cursor.execute(f'PRAGMA {pragma}={value}')
+        cursor.close()
+
+        # Only the stdlib driver exposes the progress handler (not aiosqlite)
+        if timeout and isinstance(dbapi_connection, sqlite3.Connection):
+            # SQLite has no statement timeout; abort from the progress handler
+            # once the deadline set before each statement has passed
+            info = connection_record.info
+            dbapi_connection.set_progress_handler(
+                lambda: time.monotonic() > info.get('statement_deadline', float('inf')), 10000
+            )
+
+    if timeout:
+        @event.listens_for(engine, 'before_cursor_execute')
+        def start_statement_timer(conn, cursor, statement, parameters, context, executemany):
+            conn.info['statement_deadline'] = time.monotonic() + timeout / 1000
+
+        @event.listens_for(engine, 'after_cursor_execute')
+        def stop_statement_timer(conn, cursor, statement, parameters, context, executemany):
+            conn.info.pop('statement_deadline', None)
+
+        @event.listens_for(engine, 'handle_error')
+        def clear_statement_timer(context):
+            # Otherwise the rollback after a timed out statement would be interrupted too
+            if context.connection is not None:
+                context.connection.info.pop('statement_deadline', None)
+
+
+def init_app(app):
+    """Install per-connection settings on every engine of the app (call after db.init_app)"""
+    with app.app_context():
+        for engine in db.engines.values():
+            if engine.dialect.name == 'sqlite':
+                configure_sqlite(engine, app.config)
@@ -0,0 +1,290 @@
+"""
+Synthetic training history for load testing and benchmarks.
+
+Generates a realistic-looking data set at any scale: an exercise catalog
+whose popularity follows a Zipf distribution, workouts spread over several
+years with weekly and seasonal rhythm and a gradual rise in frequency, 1-15
+exercises per workout, and reps and durations that progress over time.
+Rows are written with executemany in large batches and the rollups are
+rebuilt once at the end, so tens of millions of rows load in minutes.
+
+    python -m server generate --exercises 1000 --workout-exercises 10000000 --years 5
+"""
+
+import bisect
+import itertools
+import math
+import random
+import time
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import func, select, text
+
+import fulltext
+import progression
+import rollups
+from extensions import db
+from http_cache import bump_versions
+from models import Exercise, Workout, WorkoutExercise
+
+BATCH_SIZE = 50000
+
+# Share of the catalog per category, then the movements and variations its names combine
+CATALOG = {
+    'strength': (0.5, [
+        'Bench Press', 'Squat', 'Deadlift', 'Overhead Press', 'Row', 'Curl', 'Lunge', 'Pull-up',
+        'Dip', 'Shrug', 'Calf Raise', 'Hip Thrust', 'Leg Press', 'Lateral Raise', 'Tricep Extension',
+        'Face Pull', 'Good Morning', 'Step-up', 'Chest Fly', 'Pullover', 'Split Squat', 'Reverse Fly'
+    ], [
+        'Barbell', 'Dumbbell', 'Kettlebell', 'Cable', 'Machine', 'Smith Machine', 'Band', 'Bodyweight',
+        'Single-arm', 'Paused', 'Tempo', 'Incline', 'Decline', 'Close-grip', 'Wide-grip'
+    ]),
+    'cardio': (0.2, [
+        'Running', 'Cycling', 'Rowing', 'Swimming', 'Elliptical', 'Stair Climb', 'Jump Rope',
+        'Sprints', 'Hiking', 'Walking', 'Ski Erg', 'Assault Bike'
+    ], [
+        'Easy', 'Tempo', 'Interval', 'Long', 'Hill', 'Treadmill', 'Outdoor', 'Indoor', 'Recovery',
+        'Fartlek', 'Steady-state', 'Morning'
+    ]),
+    'core': (0.15, [
+        'Plank', 'Crunch', 'Sit-up', 'Russian Twist', 'Leg Raise', 'Dead Bug', 'Ab Wheel Rollout',
+        'Hollow Hold', 'Mountain Climber', 'Side Plank', 'Pallof Press', 'Bird Dog'
+    ], [
+        'Weighted', 'Decline', 'Stability Ball', 'Bodyweight', 'Cable', 'Hanging', 'Band', 'Slow',
+        'Kneeling', 'Alternating'
+    ]),
+    'flexibility': (0.1, [
+        'Hamstring Stretch', 'Hip Flexor Stretch', 'Yoga Flow', 'Shoulder Stretch', 'Pigeon Pose',
+        'Foam Rolling', 'Cat-Cow', "Child's Pose", 'Thoracic Rotation', 'Couch Stretch'
+    ], [
+        'Static', 'Dynamic', 'Assisted', 'PNF', 'Morning', 'Evening', 'Band', 'Partner', 'Deep'
+    ]),
+    'balance': (0.05, [
+        'Single-leg Stand', 'Bosu Squat', 'Tandem Walk', 'Single-leg Deadlift', 'Tree Pose',
+        'Y Balance Reach', 'Slackline Walk', 'Pistol Squat'
+    ], [
+        'Eyes-closed', 'Bosu', 'Foam Pad', 'Weighted', 'Bodyweight', 'Dynamic', 'Reaching', 'Slow'
+    ])
+}
+
+# Exercises logged by time rather than reps and sets
+TIMED_CATEGORIES = {'cardio', 'flexibility', 'balance'}
+TIMED_MOVEMENTS = {'Plank', 'Side Plank', 'Hollow Hold', 'Mountain Climber'}
+
+# Relative training frequency Monday..Sunday and January..December
+WEEKDAY_WEIGHTS = [1.25, 1.2, 1.1, 1.05, 0.75, 0.9, 0.6]
+MONTH_WEIGHTS = [1.35, 1.2, 1.1, 1.0, 1.0, 0.9, 0.85, 0.85, 1.05, 1.0, 0.95, 0.75]
+
+NOTES = [
+    "Felt strong today", "Leg day", "Push day", "Pull day", "Upper body focus",
+    "Easy recovery session", "Short on time", "Gym was packed", "Great energy",
+    "Tired from work, kept it light", "Deload week", "New PR on {exercise}",
+    "{exercise} felt heavy", "Worked on {exercise} technique", "Morning session before work",
+    "Lunch break workout", "Tempo run along the river", "Travel workout in the hotel gym",
+    "Back after a week off", "Form check on {exercise}"
+]
+
+
+def exercise_catalog(count, rng):
+    """count exercises as (name, category, equipment_needed, timed) tuples with unique names"""
+    catalog = []
+    for category, (share, movements, variations) in CATALOG.items():
+        names = [(f'{variation} {movement}', variation, movement)
+                 for variation in variations for movement in movements]
+        rng.shuffle(names)
+        wanted = math.ceil(count * share)
+        for index in range(wanted):
+            name, variation, movement = names[index % len(names)]
+            if index >= len(names):
+                name = f'{name} {index // len(names) + 1}'
+            catalog.append((
+                name,
+                category,
+                variation not in ('Bodyweight', 'Outdoor', 'Static', 'Dynamic', 'Eyes-closed'),
+                category in TIMED_CATEGORIES or movement in TIMED_MOVEMENTS
+            ))
+    rng.shuffle(catalog)
+    return catalog[:count]
+
+
+def exercises_per_workout(total, catalog_size, rng):
+    """Exercise counts per workout (mean 6, 1-15) adding up to exactly total"""
+    counts, emitted = [], 0
+    while emitted < total:
+        count = min(max(1, round(rng.gauss(6, 2.2))), 15, catalog_size, total - emitted)
+        counts.append(count)
+        emitted += count
+    return counts
+
+
+def workout_dates(count, start, end, rng):
+    """count sorted dates between start and end, weighted by weekday, month and a growth trend"""
+    days = (end - start).days + 1
+    cumulative, total = [], 0.0
+    for offset in range(days):
+        day = start + timedelta(days=offset)
+        total += WEEKDAY_WEIGHTS[day.weekday()] * MONTH_WEIGHTS[day.month - 1] * (1 + offset / days)
+        cumulative.append(total)
+    offsets = sorted(bisect.bisect_left(cumulative, rng.random() * total) for _ in range(count))
+    return [start + timedelta(days=min(offset, days - 1)) for offset in offsets]
+
+
+def _insert(table, rows):
+    """
+    executemany in BATCH_SIZE chunks so the parameter list never has to fit in
+    memory, committing each so SQLite can checkpoint its WAL as the load goes
+    """
+    rows = iter(rows)
+    inserted = 0
+    while True:
+        batch = list(itertools.islice(rows, BATCH_SIZE))
+        if not batch:
+            return inserted
+        db.session.execute(table.insert(), batch)
+        db.session.commit()
+        inserted += len(batch)
+
+
+def _new_ids(table, after):
+    return db.session.execute(
+        select(table.c.id).where(table.c.id > after).order_by(table.c.id)
+    ).scalars().all()
+
+
+def generate(exercises=1000, workout_exercises=100000, years=3, seed=42, end=None, progress=print):
+    """
+    Add a synthetic history to the database of the current app context.
+    Exercise names must not clash with existing rows, so start from empty tables.
+    Returns the number of rows created per table.
+    """
+    rng = random.Random(seed)
+    end = end or date.today()
+    start = end - timedelta(days=round(365.25 * years) - 1)
+    started = time.perf_counter()
+
+    def step(message):
+        if progress is not None:
+            progress(f'[{time.perf_counter() - started:7.1f}s] {message}')
+
+    exercise_table, workout_table = Exercise.__table__, Workout.__table__
+    workout_exercise_table = WorkoutExercise.__table__
+    last_exercise_id = db.session.scalar(select(func.coalesce(func.max(exercise_table.c.id), 0)))
+    last_workout_id = db.session.scalar(select(func.coalesce(func.max(workout_table.c.id), 0)))
+
+    # Exercises, each with a popularity weight and a baseline for its reps or duration
+    catalog = exercise_catalog(exercises, rng)
+    created_at = datetime.combine(start, datetime.min.time())
+    _insert(exercise_table, (
+        {'name': name, 'category': category, 'equipment_needed': equipment,
+         'created_at': created_at, 'updated_at': created_at}
+        for name, category, equipment, _ in catalog
+    ))
+    exercise_ids = _new_ids(exercise_table, last_exercise_id)
+    step(f'{len(exercise_ids)} exercises')
+
+    names = {exercise_id: entry[0] for exercise_id, entry in zip(exercise_ids, catalog)}
+    timed = {exercise_id: entry[3] for exercise_id, entry in zip(exercise_ids, catalog)}
+    baseline = {
+        exercise_id: (
+            rng.randint(900, 3600) if timed[exercise_id] and entry[1] == 'cardio'
+            else rng.randint(30, 300) if timed[exercise_id]
+            else rng.randint(5, 12)
+        )
+        for exercise_id, entry in zip(exercise_ids, catalog)
+    }
+    popularity = list(itertools.accumulate(1 / (rank + 1) ** 1.07 for rank in range(len(exercise_ids))))
+    popularity_order = rng.sample(exercise_ids, len(exercise_ids))
+
+    def pick_exercises(count):
+        chosen = set()
+        while len(chosen) < count:
+            picks = rng.choices(popularity_order, cum_weights=popularity, k=count - len(chosen))
+            chosen.update(picks)
+        return chosen
+
+    # Workouts, in date order so ids ascend with time as they would in real use
+    counts = exercises_per_workout(workout_exercises, len(exercise_ids), rng)
+    dates = workout_dates(len(counts), start, end, rng)
+    plans = [(day, sorted(pick_exercises(count))) for day, count in zip(dates, counts)]
+
+    def workout_rows():
+        for day, chosen in plans:
+            stamp = datetime.combine(day, datetime.min.time()) + timedelta(hours=rng.choice((6, 7, 12, 17, 18, 19)))
+            note = None
+            if rng.random() < 0.35:
+                note = rng.choice(NOTES).format(exercise=names[rng.choice(chosen)])
+            minutes = round(len(chosen) * 7 * rng.lognormvariate(0, 0.25))
+            yield {
+                'date': day, 'duration_minutes': min(max(minutes, 10), 240), 'notes': note,
+                'created_at': stamp, 'updated_at': stamp
+            }
+
+    _insert(workout_table, workout_rows())
+    workout_ids = _new_ids(workout_table, last_workout_id)
+    step(f'{len(workout_ids)} workouts from {start} to {end}')
+
+    span = max((end - start).days, 1)
+
+    def workout_exercise_rows():
+        for workout_id, (day, chosen) in zip(workout_ids, plans):
+            # 0 at the start of the history, 1 at the end: numbers creep up with training age
+            trained = (day - start).days / span
+            stamp = datetime.combine(day, datetime.min.time())
+            for exercise_id in chosen:
+                if timed[exercise_id]:
+                    seconds = round(baseline[exercise_id] * (1 + 0.3 * trained) * rng.lognormvariate(0, 0.2))
+                    reps, sets, duration = None, None, min(max(seconds, 10), 36000)
+                else:
+                    reps = max(1, round(baseline[exercise_id] + 3 * trained + rng.gauss(0, 1.5)))
+                    sets, duration = rng.choice((2, 3, 3, 3, 4, 4, 5)), None
+                yield {
+                    'workout_id': workout_id, 'exercise_id': exercise_id,
+                    'reps': reps, 'sets': sets, 'duration_seconds': duration,
+                    'created_at': stamp, 'updated_at': stamp
+                }
+
+    inserted = _insert(workout_exercise_table, workout_exercise_rows())
+    step(f'{inserted} workout exercises')
+
+    # Core inserts bypass the ORM listeners, so rebuild the rollups and progression
+    # series and bump the ETag versions
+    rollups.rebuild(db.session.connection())
+    progression.rebuild(db.session.connection())
+    bump_versions(db.session, ['exercises', 'workouts', 'workout_exercises'])
+    db.session.commit()
+    step('rollups and progression rebuilt')
+
+    # The search index was filled by triggers in many small segments; merge them
+    if db.session.connection().dialect.name == 'sqlite':
+        fulltext.optimize(db.session.connection())
+        db.session.commit()
+        step('search index optimized')
+
+    with db.engine.connect() as analyze_connection:
+        analyze_connection.execute(text('ANALYZE'))
+        analyze_connection.commit()
+    step('statistics analyzed')
+
+    return {'exercises': len(exercise_ids), 'workouts': len(workout_ids), 'workout_exercises': inserted}
+
+
+def add_arguments(parser):
+    parser.add_argument('--exercises', type=int, default=1000, help="Exercises in the catalog (default 1000)")
+    parser.add_argument('--workout-exercises', type=int, default=100000,
+                        help="Exercise entries across all workouts (default 100000)")
+    parser.add_argument('--years', type=float, default=3, help="Years of history ending today (default 3)")
+    parser.add_argument('--seed', type=int, default=42, help="Random seed, for reproducible data sets")
+    parser.add_argument('--reset', action='store_true', help="Drop and recreate all tables first")
+
+
+def main(args):
+    from app import create_app
+
+    app = create_app()
+    with app.app_context():
+        if args.reset:
+            db.drop_all()
+            db.create_all()
+        elif db.session.scalar(select(func.count()).select_from(Exercise.__table__)):
+            raise SystemExit("The exercises table is not empty; pass --reset to replace the data")
+        generate(args.exercises, args.workout_exercises, args.years, args.seed)
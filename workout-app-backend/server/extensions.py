@@ -1,6 +1,56 @@
+import sqlite3
+from contextvars import ContextVar
+from flask import current_app
 from flask_sqlalchemy import SQLAlchemy
+from flask_sqlalchemy.session import Session
 from flask_migrate import Migrate
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.sql.dml import UpdateBase
+
+
+# The async engines ({'primary': ..., 'replica': ...}) serving the current ASGI request, see asgi.py
+async_engines = ContextVar('async_engines', default=None)
+
+
+class RoutingSession(Session):
+    """
+    Session that sends reads to the replica engine while info['read_replica']
+    is set (see routing.py). Flushes and INSERT/UPDATE/DELETE statements always
+    go to the primary. Under ASGI the same choice is made between async engines.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is not None:
+            return bind
+
+        use_replica = (
+            self.info.get('read_replica')
+            and not self._flushing
+            and not isinstance(clause, UpdateBase)
+        )
+
+        engines = async_engines.get()
+        if engines is not None:
+            engine = engines.get('replica') if use_replica else None
+            return (engine or engines['primary']).sync_engine
+
+        if use_replica:
+            replica = current_app.extensions.get('read_replica')
+            if replica is not None:
+                return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
 
 # Initialize extensions here to avoid circular imports
-db = SQLAlchemy()
-migrate = Migrate()
\ No newline at end of file
+db = SQLAlchemy(session_options={'class_': RoutingSession})
+migrate = Migrate()
+
+
+# SQLite only enforces foreign keys (and ON DELETE CASCADE) when asked to, per connection
+@event.listens_for(Engine, 'connect')
+def enable_sqlite_foreign_keys(dbapi_connection, connection_record):
+    if isinstance(dbapi_connection, sqlite3.Connection):
+        cursor = dbapi_connection.cursor()
+        cursor.execute('PRAGMA foreign_keys=ON')
+        cursor.close()
@@ -0,0 +1,186 @@
+"""
+Full-text search over exercise names and categories and workout notes.
+
+On SQLite the text is indexed by two FTS5 tables that use exercises and
+workouts as external content, so the index stores only tokens, never a
+second copy of the notes. Triggers on the content tables keep the index in
+sync, which covers every write path: ORM flushes, the bulk route's Core
+inserts, ON DELETE CASCADE and the history generator all go through them.
+On PostgreSQL the same searches run against tsvector expressions, indexed
+with GIN by the migration.
+
+Every word of a query longer than one letter is matched as a prefix ("squ
+ben" finds "Barbell Squat" and "Bench day") and results are ordered by
+relevance (bm25 on SQLite, ts_rank on PostgreSQL), then by type and id so
+pages are stable. Ranking scores every match, so a query costs time in
+proportion to how many rows it matches.
+"""
+
+import re
+
+import click
+from sqlalchemy import (
+    DDL, Float, Integer, String, column, event, func, literal, literal_column, select, table, text, union_all
+)
+
+from extensions import db
+from models import Exercise, Workout
+
+TYPES = ('exercise', 'workout')
+
+# Shorter words only match whole words: a one-letter prefix would expand to most of the vocabulary
+MIN_PREFIX_LENGTH = 2
+
+# Prefix indexes for 2 and 3 characters make short prefix queries index lookups
+SQLITE_SCHEMA = {
+    'exercises': [
+        "CREATE VIRTUAL TABLE IF NOT EXISTS exercises_fts USING fts5("
+        "name, category, content='exercises', content_rowid='id', "
+        "tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+        "CREATE TRIGGER IF NOT EXISTS exercises_fts_insert AFTER INSERT ON exercises BEGIN "
+        "INSERT INTO exercises_fts(rowid, name, category) VALUES (new.id, new.name, new.category); "
+        "END",
+        "CREATE TRIGGER IF NOT EXISTS exercises_fts_delete AFTER DELETE ON exercises BEGIN "
+        "INSERT INTO exercises_fts(exercises_fts, rowid, name, category) "
+        "VALUES ('delete', old.id, old.name, old.category); "
+        "END",
+        "CREATE TRIGGER IF NOT EXISTS exercises_fts_update AFTER UPDATE OF name, category ON exercises BEGIN "
+        "INSERT INTO exercises_fts(exercises_fts, rowid, name, category) "
+        "VALUES ('delete', old.id, old.name, old.category); "
+        "INSERT INTO exercises_fts(rowid, name, category) VALUES (new.id, new.name, new.category); "
+        "END",
+    ],
+    # Most workouts have no notes, so those rows never touch the index
+    'workouts': [
+        "CREATE VIRTUAL TABLE IF NOT EXISTS workouts_fts USING fts5("
+        "notes, content='workouts', content_rowid='id', "
+        "tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+        "CREATE TRIGGER IF NOT EXISTS workouts_fts_insert AFTER INSERT ON workouts "
+        "WHEN new.notes IS NOT NULL BEGIN "
+        "INSERT INTO workouts_fts(rowid, notes) VALUES (new.id, new.notes); "
+        "END",
+        "CREATE TRIGGER IF NOT EXISTS workouts_fts_delete AFTER DELETE ON workouts "
+        "WHEN old.notes IS NOT NULL BEGIN "
+        "INSERT INTO workouts_fts(workouts_fts, rowid, notes) VALUES ('delete', old.id, old.notes); "
+        "END",
+        "CREATE TRIGGER IF NOT EXISTS workouts_fts_update AFTER UPDATE OF notes ON workouts BEGIN "
+        "INSERT INTO workouts_fts(workouts_fts, rowid, notes) "
+        "SELECT 'delete', old.id, old.notes WHERE old.notes IS NOT NULL; "
+        "INSERT INTO workouts_fts(rowid, notes) SELECT new.id, new.notes WHERE new.notes IS NOT NULL; "
+        "END",
+    ],
+}
+
+FTS_TABLES = {'exercises': 'exercises_fts', 'workouts': 'workouts_fts'}
+
+# The text each row is searched by on PostgreSQL; the GIN indexes are built on these same expressions
+POSTGRESQL_DOCUMENTS = {
+    'exercises': "to_tsvector('simple', coalesce(name, '') || ' ' || coalesce(category, ''))",
+    'workouts': "to_tsvector('simple', coalesce(notes, ''))",
+}
+
+# create_all() and drop_all() (tests, `python -m server generate --reset`) manage the
+# SQLite index alongside its content table; migrations create it explicitly
+for name, model in (('exercises', Exercise), ('workouts', Workout)):
+    for statement in SQLITE_SCHEMA[name]:
+        event.listen(model.__table__, 'after_create', DDL(statement).execute_if(dialect='sqlite'))
+    event.listen(
+        model.__table__, 'before_drop',
+        DDL(f'DROP TABLE IF EXISTS {FTS_TABLES[name]}').execute_if(dialect='sqlite')
+    )
+
+
+def terms(query):
+    """The words of a search query, lowercased; punctuation and FTS operators are ignored"""
+    return re.findall(r'[^\W_]+', query.lower())
+
+
+def _sqlite_matches(words, types):
+    """One select per searched table yielding (rank, type, id), best matches having the lowest rank"""
+    match = ' '.join(f'"{word}"*' if len(word) >= MIN_PREFIX_LENGTH else f'"{word}"' for word in words)
+    selects = []
+    for kind, name, weights in (('exercise', 'exercises', '10.0, 2.0'), ('workout', 'workouts', '1.0')):
+        if kind not in types:
+            continue
+        fts = table(FTS_TABLES[name], column('rowid', Integer))
+        selects.append(
+            select(
+                literal_column(f'bm25({FTS_TABLES[name]}, {weights})', Float).label('rank'),
+                literal(kind, String).label('type'),
+                fts.c.rowid.label('id')
+            ).select_from(fts).where(text(f'{FTS_TABLES[name]} MATCH :match_{kind}').bindparams(
+                **{f'match_{kind}': match}
+            ))
+        )
+    return selects
+
+
+def _postgresql_matches(words, types):
+    query = func.to_tsquery('simple', ' & '.join(
+        f'{word}:*' if len(word) >= MIN_PREFIX_LENGTH else word for word in words
+    ))
+    selects = []
+    for kind, model, name in (('exercise', Exercise, 'exercises'), ('workout', Workout, 'workouts')):
+        if kind not in types:
+            continue
+        document = literal_column(POSTGRESQL_DOCUMENTS[name])
+        selects.append(
+            select(
+                # Negated so that, as with bm25, lower ranks are better matches
+                (-func.ts_rank(document, query)).cast(Float).label('rank'),
+                literal(kind, String).label('type'),
+                model.id.label('id')
+            ).where(document.op('@@')(query))
+        )
+    return selects
+
+
+def matches(words, types=TYPES):
+    """
+    A subquery of (rank, type, id) for every exercise and workout matching all
+    of words as prefixes, to be ordered by rank, type, id.
+    """
+    if db.session.get_bind().dialect.name == 'postgresql':
+        selects = _postgresql_matches(words, types)
+    else:
+        selects = _sqlite_matches(words, types)
+    return union_all(*selects).subquery('matches') if len(selects) > 1 else selects[0].subquery('matches')
+
+
+def rebuild(connection):
+    """Reindex every exercise and workout from the content tables (SQLite only)"""
+    for fts in FTS_TABLES.values():
+        connection.execute(text(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')"))
+
+
+def optimize(connection):
+    """Merge the index segments left by many small writes into one per table (SQLite only)"""
+    for fts in FTS_TABLES.values():
+        connection.execute(text(f"INSERT INTO {fts}({fts}) VALUES ('optimize')"))
+
+
+### CLI ###
+
+@click.group('search')
+def search_cli():
+    """Manage the full-text search index."""
+
+@search_cli.command('rebuild')
+def rebuild_command():
+    """Reindex all exercises and workout notes."""
+    connection = db.session.connection()
+    if connection.dialect.name != 'sqlite':
+        raise click.ClickException("Only the SQLite index needs rebuilding; PostgreSQL indexes the columns directly")
+    rebuild(connection)
+    db.session.commit()
+    click.echo("Rebuilt the search index")
+
+@search_cli.command('optimize')
+def optimize_command():
+    """Merge the search index into as few segments as possible."""
+    connection = db.session.connection()
+    if connection.dialect.name != 'sqlite':
+        raise click.ClickException("Only the SQLite index needs optimizing")
+    optimize(connection)
+    db.session.commit()
+    click.echo("Optimized the search index")
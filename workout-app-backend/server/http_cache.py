@@ -0,0 +1,154 @@
+"""
+ETags, conditional GET and response caching for the read endpoints.
+
+Every commit that changed a tracked table bumps that table's row in
+resource_versions. A GET's ETag is derived from the request URL and the
+versions of the tables it reads, so revalidating a cached response costs one
+primary-key lookup and no serialization, and the ETag doubles as the response
+cache key.
+
+The bump runs in a short transaction of its own right after the write
+commits, not inside it: every writer to a table increments the same row, and
+holding its lock until the write commits would queue all concurrent writers
+on it (PostgreSQL row locks). The ETag therefore changes a moment after the
+data does, and a process dying in between leaves the old versions in place
+until the table's next write.
+"""
+
+import hashlib
+from functools import wraps
+
+from flask import current_app, make_response, request
+from sqlalchemy import event, select
+
+import database
+from extensions import db
+from models import Exercise, Workout, WorkoutExercise, ResourceVersion
+
+# Deleting these also removes workout_exercises rows through ON DELETE CASCADE
+CASCADES_TO_WORKOUT_EXERCISES = (Workout, Exercise)
+
+TRACKED_MODELS = (Workout, Exercise, WorkoutExercise)
+
+# Set per response rather than replayed from the cache
+UNCACHED_HEADERS = {'Content-Length', 'ETag', 'Cache-Control', 'X-Cache'}
+
+resource_versions = ResourceVersion.__table__
+
+
+def bump_versions(session, names):
+    """
+    Remember the named tables as changed by the session's transaction. Once
+    it commits their versions are bumped and cached responses built from them
+    dropped; a rollback forgets them.
+    """
+    session.info.setdefault('changed_tables', set()).update(names)
+    # The engine the write went to, so the bump reaches the same database
+    session.info['changed_engine'] = session.connection().engine
+
+
+def increment_versions(connection, names):
+    """Increment the version of each named table, creating missing rows"""
+    statement = database.insert_for(connection)(resource_versions)
+    statement = statement.on_conflict_do_update(
+        index_elements=['name'],
+        set_={'version': resource_versions.c.version + 1}
+    )
+    connection.execute(statement, [{'name': name, 'version': 1} for name in sorted(names)])
+
+
+def get_versions(names):
+    rows = db.session.execute(
+        select(resource_versions.c.name, resource_versions.c.version)
+        .where(resource_versions.c.name.in_(names))
+    )
+    versions = dict(rows.all())
+    return [versions.get(name, 0) for name in names]
+
+
+@event.listens_for(db.session, 'after_flush')
+def bump_changed_tables(session, flush_context):
+    changed = set()
+    for obj in list(session.new) + list(session.dirty):
+        if isinstance(obj, TRACKED_MODELS) and session.is_modified(obj):
+            changed.add(obj.__tablename__)
+    for obj in session.deleted:
+        if isinstance(obj, TRACKED_MODELS):
+            changed.add(obj.__tablename__)
+        if isinstance(obj, CASCADES_TO_WORKOUT_EXERCISES):
+            changed.add(WorkoutExercise.__tablename__)
+    if changed:
+        bump_versions(session, changed)
+
+
+@event.listens_for(db.session, 'after_commit')
+def publish_changed_tables(session):
+    changed = session.info.pop('changed_tables', None)
+    engine = session.info.pop('changed_engine', None)
+    if not changed:
+        return
+    try:
+        with engine.begin() as connection:
+            increment_versions(connection, changed)
+    except Exception:
+        # The write itself has committed, so don't fail the request over its ETag
+        current_app.logger.exception("Could not bump resource versions for %s", ', '.join(sorted(changed)))
+
+    cache = current_app.extensions.get('response_cache') if current_app else None
+    if cache is not None:
+        cache.invalidate(changed)
+
+
+@event.listens_for(db.session, 'after_rollback')
+def forget_changed_tables(session):
+    session.info.pop('changed_tables', None)
+    session.info.pop('changed_engine', None)
+
+
+def conditional(*tables, resource=None):
+    """
+    Give a GET view an ETag built from the versions of the tables it reads,
+    answering 304 Not Modified when the client already has that version and
+    serving repeat requests from the response cache. For a single row, resource
+    looks up its row tag from the view's arguments (see concurrency.py), which
+    then prefixes the ETag so it can be sent back in If-Match.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            versions = get_versions(tables)
+            key = f"{request.full_path}|{','.join(map(str, versions))}"
+            etag = hashlib.sha1(key.encode('utf-8')).hexdigest()
+            row = resource(**kwargs) if resource is not None else None
+            if row is not None:
+                etag = f'{row}.{etag}'
+
+            max_age = current_app.config.get('HTTP_CACHE_MAX_AGE', 0)
+            cache_control = f'private, max-age={max_age}' if max_age else 'private, no-cache'
+            cache = current_app.extensions.get('response_cache')
+
+            # Weak comparison, since compression turns the ETag weak (see compression.py)
+            if request.if_none_match.contains_weak(etag):
+                response = make_response('', 304)
+            elif cache is not None and (cached := cache.get(etag)) is not None:
+                headers, body = cached
+                response = make_response(body, 200, headers)
+                response.headers['X-Cache'] = 'HIT'
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+                # Streamed responses are never buffered into the cache
+                if cache is not None and not response.is_streamed:
+                    headers = [
+                        (name, value) for name, value in response.headers
+                        if name not in UNCACHED_HEADERS
+                    ]
+                    cache.set(etag, headers, response.get_data(), tables)
+                    response.headers['X-Cache'] = 'MISS'
+
+            response.set_etag(etag)
+            response.headers['Cache-Control'] = cache_control
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,235 @@
+"""
+Idempotency-Key support for the write routes.
+
+A client that may retry a POST sends a unique Idempotency-Key header with it.
+The first request carrying a key claims it by inserting a row in a short
+transaction of its own, runs the handler, and stores the status code and
+body on that row. Retries with the same key get the stored response back,
+marked Idempotent-Replayed: true, without running the handler again, so they
+can neither create duplicates nor trip a unique constraint.
+
+Until its response is stored a claim is only a lease, and retries arriving
+in the meantime get 409. The lease lasts IDEMPOTENCY_LEASE_SECONDS, by default
+twice the server's request timeout, and every commit the handler makes renews
+it in the same transaction. Each claim carries a random token the renewal,
+the stored response and a release must match, so a request that outlived its
+lease and had the key taken over by a retry can't commit its write a second
+time, nor overwrite or delete the new claimant's row. The handler commits
+before its response exists, so if the process dies or storing the response
+fails after that commit, the key is claimable again once the lease runs out
+rather than refusing retries for a day.
+
+Only the outcome is kept (status, JSON body and a digest of the request), and
+rows expire after IDEMPOTENCY_TTL_SECONDS (a day by default). Only successful
+responses are stored. A failed write has written nothing, and the routes
+report database errors as 400 just like invalid input, so on any error the
+key is released and the retry runs for real.
+"""
+
+import hashlib
+import time
+import uuid
+from datetime import datetime, timedelta
+from functools import wraps
+
+import click
+from flask import Response, current_app, g, has_app_context, jsonify, make_response, request
+from sqlalchemy import and_, delete, event, select, update
+
+import database
+from extensions import db
+from models import IdempotencyKey
+
+HEADER = 'Idempotency-Key'
+MAX_KEY_LENGTH = 255
+DEFAULT_TTL_SECONDS = 24 * 60 * 60
+# Seconds a request may run, unless the server sets REQUEST_TIMEOUT (serve.py --timeout)
+DEFAULT_REQUEST_TIMEOUT = 30
+
+# Expired rows are also deleted on their own, by the first claim after this many seconds
+PURGE_INTERVAL_SECONDS = 300
+
+idempotency_keys = IdempotencyKey.__table__
+
+_last_purge = 0.0
+
+
+class LeaseLost(Exception):
+    """The request's claim on its Idempotency-Key lapsed and another request took the key over"""
+
+    def __init__(self, key):
+        super().__init__(f"The claim on {HEADER} {key!r} lapsed and a retry took it over")
+
+
+def fingerprint():
+    """Digest of what makes a request the same request: method, path and raw body"""
+    digest = hashlib.sha256(f'{request.method} {request.full_path}\n'.encode('utf-8'))
+    digest.update(request.get_data(cache=True))
+    return digest.digest()
+
+
+def purge(session, now=None):
+    """Delete every expired key; returns how many were removed"""
+    now = now or datetime.utcnow()
+    return session.execute(delete(idempotency_keys).where(idempotency_keys.c.expires_at <= now)).rowcount
+
+
+def lease_duration(config):
+    """IDEMPOTENCY_LEASE_SECONDS, or twice the longest a request may run"""
+    seconds = config.get('IDEMPOTENCY_LEASE_SECONDS') or 2 * config.get('REQUEST_TIMEOUT', DEFAULT_REQUEST_TIMEOUT)
+    return timedelta(seconds=seconds)
+
+
+def is_claimed(key, token):
+    """Condition matching key while token still holds its claim"""
+    return and_(
+        idempotency_keys.c.key == key,
+        idempotency_keys.c.claim_token == token,
+        idempotency_keys.c.status_code.is_(None)
+    )
+
+
+def claim(key, digest, token):
+    """
+    Claim key for this request under token, committing straight away so
+    concurrent retries see it. Returns None when claimed, otherwise the row
+    already holding the key. Until the response is recorded, expires_at holds
+    the end of the lease.
+    """
+    global _last_purge
+    session = db.session
+    now = datetime.utcnow()
+    lease = lease_duration(current_app.config)
+
+    if time.monotonic() - _last_purge > PURGE_INTERVAL_SECONDS:
+        _last_purge = time.monotonic()
+        purge(session, now)
+
+    # Insert the key, or take over an expired row or lapsed lease holding it, in one statement
+    connection = session.connection()
+    statement = database.insert_for(connection)(idempotency_keys).values(
+        key=key, fingerprint=digest, expires_at=now + lease, claim_token=token
+    )
+    statement = statement.on_conflict_do_update(
+        index_elements=['key'],
+        set_={'fingerprint': digest, 'status_code': None, 'body': None, 'expires_at': now + lease, 'claim_token': token},
+        where=idempotency_keys.c.expires_at <= now
+    )
+    # A key released between the two statements is free again, so try once more
+    for _ in range(2):
+        claimed = connection.execute(statement).rowcount == 1
+        session.commit()
+        if claimed:
+            return None
+        stored = session.execute(select(idempotency_keys).where(idempotency_keys.c.key == key)).first()
+        if stored is not None:
+            return stored
+        connection = session.connection()
+    raise RuntimeError(f"Could not claim {HEADER} {key!r}")
+
+
+def replay(stored, digest):
+    if stored.fingerprint != digest:
+        return jsonify({"error": f"{HEADER} was already used for a different request"}), 422
+    if stored.status_code is None:
+        return jsonify({"error": f"A request with this {HEADER} is still in progress"}), 409, {'Retry-After': '1'}
+    return Response(
+        stored.body,
+        status=stored.status_code,
+        mimetype='application/json',
+        headers={'Idempotent-Replayed': 'true'}
+    )
+
+
+@event.listens_for(db.session, 'before_commit')
+def renew_lease(session):
+    """
+    Extend the lease of the key the current request holds in the transaction
+    it is committing, so the write and the renewal commit together. Refuses
+    the commit if the key was taken over meanwhile: the new claimant runs the
+    write itself.
+    """
+    held = g.get('idempotency_claim') if has_app_context() else None
+    if held is None:
+        return
+    key, token = held
+    renewed = session.execute(
+        update(idempotency_keys)
+        .where(is_claimed(key, token))
+        .values(expires_at=datetime.utcnow() + lease_duration(current_app.config))
+    ).rowcount
+    if not renewed:
+        g.idempotency_lost = True
+        raise LeaseLost(key)
+
+
+def record(key, token, response):
+    ttl = timedelta(seconds=current_app.config.get('IDEMPOTENCY_TTL_SECONDS', DEFAULT_TTL_SECONDS))
+    db.session.execute(
+        update(idempotency_keys)
+        .where(is_claimed(key, token))
+        .values(status_code=response.status_code, body=response.get_data(), expires_at=datetime.utcnow() + ttl)
+    )
+    db.session.commit()
+
+
+def release(key, token):
+    db.session.rollback()
+    db.session.execute(delete(idempotency_keys).where(is_claimed(key, token)))
+    db.session.commit()
+
+
+def run_claimed(key, token, view, args, kwargs):
+    """Run the view with its commits renewing the claim (see renew_lease)"""
+    g.idempotency_claim = (key, token)
+    try:
+        return make_response(view(*args, **kwargs))
+    finally:
+        g.pop('idempotency_claim', None)
+
+
+def idempotent(view):
+    """Make a write route replay its first response to retries carrying the same Idempotency-Key"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        key = request.headers.get(HEADER)
+        if key is None:
+            return view(*args, **kwargs)
+        if not key or len(key) > MAX_KEY_LENGTH:
+            return jsonify({"error": f"{HEADER} must be between 1 and {MAX_KEY_LENGTH} characters"}), 400
+
+        digest = fingerprint()
+        token = uuid.uuid4().hex
+        stored = claim(key, digest, token)
+        if stored is not None:
+            return replay(stored, digest)
+
+        try:
+            response = run_claimed(key, token, view, args, kwargs)
+        except Exception:
+            release(key, token)
+            raise
+        if g.pop('idempotency_lost', False):
+            # The routes report the refused commit as an error; the retry holding the key owns the write
+            release(key, token)
+            return jsonify({"error": f"A request with this {HEADER} is still in progress"}), 409, {'Retry-After': '1'}
+        if 200 <= response.status_code < 300:
+            record(key, token, response)
+        else:
+            release(key, token)
+        return response
+    return wrapper
+
+
+### CLI ###
+
+@click.group('idempotency')
+def idempotency_cli():
+    """Manage stored Idempotency-Key responses."""
+
+@idempotency_cli.command('purge')
+def purge_command():
+    """Delete expired Idempotency-Key responses."""
+    removed = purge(db.session)
+    db.session.commit()
+    click.echo(f"Removed {removed} expired idempotency keys")
@@ -0,0 +1,94 @@
+"""
+JSON provider for the API.
+
+Responses are compact unless the client asks for ?pretty=1. Encoding goes
+through orjson when it is installed and falls back to the standard library
+otherwise; both render dates and datetimes as ISO 8601 strings, the same
+format the schemas use for created_at/updated_at.
+"""
+
+import json
+from datetime import date
+
+from flask import request
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+PRETTY_VALUES = ('1', 'true', 'yes')
+
+
+def _default(value):
+    """Serialize types json does not know, with dates as ISO 8601 rather than Flask's HTTP dates"""
+    if isinstance(value, date):
+        return value.isoformat()
+    return DefaultJSONProvider.default(value)
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    DefaultJSONProvider with an optional accelerated encoder and compact
+    output by default.
+
+    Set app.json.accelerated = False (or JSON_ACCELERATED = False in the app
+    config) to force the standard library encoder.
+    """
+
+    default = staticmethod(_default)
+    compact = True
+    # orjson has no ASCII-escaping mode, so emit UTF-8 from both encoders
+    ensure_ascii = False
+
+    def __init__(self, app):
+        super().__init__(app)
+        self.accelerated = orjson is not None
+
+    def _orjson_options(self, indent):
+        options = orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            options |= orjson.OPT_SORT_KEYS
+        if indent:
+            options |= orjson.OPT_INDENT_2
+        return options
+
+    def encode(self, obj, indent=None):
+        """Encode obj to UTF-8 bytes"""
+        if self.accelerated:
+            try:
+                return orjson.dumps(obj, default=self.default, option=self._orjson_options(indent))
+            except TypeError:
+                # e.g. integers beyond 64 bits; the stdlib encoder handles those
+                pass
+        separators = None if indent else (',', ':')
+        return json.dumps(
+            obj, default=self.default, sort_keys=self.sort_keys, ensure_ascii=self.ensure_ascii,
+            indent=indent, separators=separators
+        ).encode('utf-8')
+
+    def dumps(self, obj, **kwargs):
+        if kwargs:
+            kwargs.setdefault('default', self.default)
+            kwargs.setdefault('sort_keys', self.sort_keys)
+            kwargs.setdefault('ensure_ascii', self.ensure_ascii)
+            return json.dumps(obj, **kwargs)
+        return self.encode(obj).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        if self.accelerated and not kwargs:
+            return orjson.loads(s)
+        return json.loads(s, **kwargs)
+
+    def wants_pretty(self):
+        return bool(request) and request.args.get('pretty', '').lower() in PRETTY_VALUES
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = 2 if self.wants_pretty() or self.compact is False else None
+        return self._app.response_class(self.encode(obj, indent) + b'\n', mimetype=self.mimetype)
+
+
+def init_app(app):
+    app.json.accelerated = app.config.get('JSON_ACCELERATED', True) and orjson is not None
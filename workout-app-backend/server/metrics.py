@@ -0,0 +1,194 @@
+"""
+Per-request performance instrumentation.
+
+Every request records its wall time, the number of SQL statements it ran and
+the time spent in them (measured with cursor execute events on every engine).
+The numbers are returned in a Server-Timing header and aggregated into
+per-route histograms served in the Prometheus text format at /metrics.
+Statements slower than SLOW_QUERY_MS are logged with their parameters.
+"""
+
+import logging
+import threading
+import time
+
+from flask import Response, current_app, g, has_app_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+slow_query_log = logging.getLogger('workout_app.slow_queries')
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_COUNT_BUCKETS = (1, 2, 3, 5, 10, 25, 50, 100)
+
+
+class Histogram:
+    """Cumulative histogram per label set, rendered in the Prometheus text format"""
+
+    def __init__(self, name, documentation, labelnames, buckets):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = buckets
+        self._series = {}  # labels -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, labels, value):
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            series = sorted(self._series.items())
+            series = [(labels, list(values)) for labels, values in series]
+        for labels, values in series:
+            label_text = ','.join(f'{name}="{_escape(value)}"' for name, value in zip(self.labelnames, labels))
+            for bound, count in zip(self.buckets, values):
+                lines.append(f'{self.name}_bucket{{{label_text},le="{bound}"}} {count}')
+            lines.append(f'{self.name}_bucket{{{label_text},le="+Inf"}} {values[-1]}')
+            lines.append(f'{self.name}_sum{{{label_text}}} {values[-2]}')
+            lines.append(f'{self.name}_count{{{label_text}}} {values[-1]}')
+        return lines
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _counter_lines(name, documentation, samples):
+    """Render counters read from another component's stats at scrape time"""
+    lines = [f'# HELP {name} {documentation}', f'# TYPE {name} counter']
+    for labels, value in samples:
+        label_text = ','.join(f'{key}="{_escape(label)}"' for key, label in labels.items())
+        lines.append(f'{name}{{{label_text}}} {value}' if label_text else f'{name} {value}')
+    return lines
+
+
+class RequestMetrics:
+    """Counters for the request in progress, kept on flask.g"""
+
+    __slots__ = ('started', 'sql_count', 'sql_seconds', 'slow_query_seconds')
+
+    def __init__(self, slow_query_seconds):
+        self.started = time.perf_counter()
+        self.sql_count = 0
+        self.sql_seconds = 0.0
+        self.slow_query_seconds = slow_query_seconds
+
+
+### SQL timing, on every engine (primary, replica and the async engines) ###
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def start_query_timer(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_started', []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def stop_query_timer(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info['query_started'].pop()
+    metrics = g.get('request_metrics') if has_app_context() else None
+    if metrics is None:
+        return
+    metrics.sql_count += 1
+    metrics.sql_seconds += elapsed
+    if metrics.slow_query_seconds is not None and elapsed >= metrics.slow_query_seconds:
+        slow_query_log.warning(
+            "Slow query (%.1f ms) during %s %s: %s; parameters: %r",
+            elapsed * 1000, request.method, request.path, statement, parameters
+        )
+
+
+@event.listens_for(Engine, 'handle_error')
+def discard_query_timer(context):
+    if context.connection is not None:
+        started = context.connection.info.get('query_started')
+        if started:
+            started.pop()
+
+
+class Instrumentation:
+    def __init__(self, app):
+        labels = ('method', 'route', 'status')
+        self.request_duration = Histogram(
+            'http_request_duration_seconds', 'Wall time of each request.', labels, DURATION_BUCKETS
+        )
+        self.sql_queries = Histogram(
+            'http_request_sql_queries', 'SQL statements executed per request.', labels, QUERY_COUNT_BUCKETS
+        )
+        self.sql_duration = Histogram(
+            'http_request_sql_duration_seconds', 'Time spent executing SQL per request.', labels, DURATION_BUCKETS
+        )
+
+    def before_request(self):
+        slow_query_ms = current_app.config.get('SLOW_QUERY_MS', 200)
+        g.request_metrics = RequestMetrics(None if slow_query_ms is None else slow_query_ms / 1000)
+
+    def after_request(self, response):
+        metrics = g.pop('request_metrics', None)
+        if metrics is None:
+            return response
+        elapsed = time.perf_counter() - metrics.started
+
+        # Templated rule rather than the path, so ids don't explode the label space
+        route = request.url_rule.rule if request.url_rule is not None else '<unmatched>'
+        labels = (request.method, route, str(response.status_code))
+        self.request_duration.observe(labels, elapsed)
+        self.sql_queries.observe(labels, metrics.sql_count)
+        self.sql_duration.observe(labels, metrics.sql_seconds)
+
+        response.headers.add(
+            'Server-Timing',
+            f'app;dur={elapsed * 1000:.3f}, db;dur={metrics.sql_seconds * 1000:.3f};desc="{metrics.sql_count} queries"'
+        )
+        return response
+
+    def render(self):
+        lines = self.request_duration.render() + self.sql_queries.render() + self.sql_duration.render()
+
+        cache = current_app.extensions.get('response_cache')
+        if cache is not None:
+            stats = cache.stats()
+            lines += _counter_lines('response_cache_hits_total', 'Responses served from the response cache.',
+                                    [({}, stats['hits'])])
+            lines += _counter_lines('response_cache_misses_total', 'Response cache lookups that missed.',
+                                    [({}, stats['misses'])])
+
+        compression = current_app.extensions.get('compression')
+        if compression is not None:
+            stats = compression.stats()
+            for field, name, documentation in (
+                ('bytes_in', 'compression_input_bytes_total', 'Response bytes before compression.'),
+                ('bytes_out', 'compression_output_bytes_total', 'Response bytes after compression.'),
+                ('cpu_seconds', 'compression_cpu_seconds_total', 'CPU time spent compressing responses.'),
+            ):
+                lines += _counter_lines(name, documentation, [
+                    ({'encoding': encoding}, totals[field]) for encoding, totals in sorted(stats.items())
+                ])
+
+        return '\n'.join(lines) + '\n'
+
+
+def init_app(app):
+    """
+    Instrument every request and serve the metrics at /metrics. Register this
+    before other after_request hooks so its timing covers them (Flask runs
+    after_request hooks in reverse order). Set SLOW_QUERY_MS (default 200) to
+    None to turn off the slow-query log.
+    """
+    instrumentation = Instrumentation(app)
+    app.extensions['metrics'] = instrumentation
+    app.before_request(instrumentation.before_request)
+    app.after_request(instrumentation.after_request)
+
+    # GET /metrics - Request, SQL, cache and compression metrics in the Prometheus text format
+    @app.route('/metrics')
+    def metrics():
+        return Response(instrumentation.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -26,6 +26,16 @@ config.set_main_option(
         '%', '%%'))
 target_metadata = current_app.extensions['migrate'].db.metadata
 
+# The full-text search index (SQLite's FTS5 tables and their shadow tables,
+# PostgreSQL's GIN indexes) is created by hand in a migration rather than from
+# the models; without this, autogenerate would propose dropping it
+def include_name(name, type_, parent_names):
+    if type_ == 'table':
+        return not name.startswith(('exercises_fts', 'workouts_fts'))
+    if type_ == 'index':
+        return name not in ('ix_exercises_search', 'ix_workouts_search')
+    return True
+
 # other values from the config, defined by the needs of env.py,
 # can be acquired:
 # my_important_option = config.get_main_option("my_important_option")
@@ -78,6 +88,7 @@ def run_migrations_online():
             connection=connection,
             target_metadata=target_metadata,
             process_revision_directives=process_revision_directives,
+            include_name=include_name,
             **current_app.extensions['migrate'].configure_args
         )
 
@@ -0,0 +1,68 @@
+"""workout_exercises indexes and cascading foreign keys
+
+Revision ID: 5cdc965f6077
+Revises: 75c797d58de6
+Create Date: 2026-10-18 12:52:47.193068
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5cdc965f6077'
+down_revision = '75c797d58de6'
+branch_labels = None
+depends_on = None
+
+
+def workout_exercises_table(ondelete):
+    """Full definition of workout_exercises, used to rebuild it with new foreign keys"""
+    return sa.Table(
+        'workout_exercises',
+        sa.MetaData(),
+        sa.Column('workout_id', sa.Integer(), nullable=False),
+        sa.Column('exercise_id', sa.Integer(), nullable=False),
+        sa.Column('reps', sa.Integer(), nullable=True),
+        sa.Column('sets', sa.Integer(), nullable=True),
+        sa.Column('duration_seconds', sa.Integer(), nullable=True),
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.CheckConstraint('(reps IS NOT NULL AND sets IS NOT NULL) OR duration_seconds IS NOT NULL', name='check_has_reps_sets_or_duration'),
+        sa.CheckConstraint('duration_seconds IS NULL OR duration_seconds > 0', name='check_positive_duration'),
+        sa.CheckConstraint('reps IS NULL OR reps > 0', name='check_positive_reps'),
+        sa.CheckConstraint('sets IS NULL OR sets > 0', name='check_positive_sets'),
+        sa.ForeignKeyConstraint(['exercise_id'], ['exercises.id'], ondelete=ondelete),
+        sa.ForeignKeyConstraint(['workout_id'], ['workouts.id'], ondelete=ondelete),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('workout_id', 'exercise_id', name='unique_workout_exercise')
+    )
+
+
+def upgrade():
+    # The original foreign keys are unnamed and can't be altered in place on SQLite,
+    # so rebuild the table from a definition carrying ON DELETE CASCADE
+    with op.batch_alter_table(
+        'workout_exercises',
+        copy_from=workout_exercises_table(ondelete='CASCADE'),
+        recreate='always'
+    ) as batch_op:
+        batch_op.create_index(
+            'ix_workout_exercises_exercise_id_workout_id',
+            ['exercise_id', 'workout_id'],
+            unique=False
+        )
+
+    op.create_index('ix_workouts_date_id', 'workouts', ['date', 'id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_workouts_date_id', table_name='workouts')
+
+    with op.batch_alter_table(
+        'workout_exercises',
+        copy_from=workout_exercises_table(ondelete=None),
+        recreate='always'
+    ):
+        pass
@@ -0,0 +1,30 @@
+"""case-insensitive unique exercise names
+
+Revision ID: 75c797d58de6
+Revises: 78800b4f7d16
+Create Date: 2026-10-18 12:51:38.987401
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '75c797d58de6'
+down_revision = '78800b4f7d16'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Replaces the per-assignment ilike query in Exercise.validate_name
+    op.create_index(
+        'uq_exercises_name_lower',
+        'exercises',
+        [sa.text('lower(name)')],
+        unique=True
+    )
+
+
+def downgrade():
+    op.drop_index('uq_exercises_name_lower', table_name='exercises')
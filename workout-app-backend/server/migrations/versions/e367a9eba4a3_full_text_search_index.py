@@ -0,0 +1,83 @@
+"""full-text search index
+
+Revision ID: e367a9eba4a3
+Revises: d48ae05afbae
+Create Date: 2026-10-18 14:12:37.402118
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e367a9eba4a3'
+down_revision = 'd48ae05afbae'
+branch_labels = None
+depends_on = None
+
+# Written out rather than imported from fulltext.py so this revision keeps
+# creating the same schema however the application changes later
+SQLITE_SCHEMA = [
+    "CREATE VIRTUAL TABLE exercises_fts USING fts5("
+    "name, category, content='exercises', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+    "CREATE TRIGGER exercises_fts_insert AFTER INSERT ON exercises BEGIN "
+    "INSERT INTO exercises_fts(rowid, name, category) VALUES (new.id, new.name, new.category); "
+    "END",
+    "CREATE TRIGGER exercises_fts_delete AFTER DELETE ON exercises BEGIN "
+    "INSERT INTO exercises_fts(exercises_fts, rowid, name, category) "
+    "VALUES ('delete', old.id, old.name, old.category); "
+    "END",
+    "CREATE TRIGGER exercises_fts_update AFTER UPDATE OF name, category ON exercises BEGIN "
+    "INSERT INTO exercises_fts(exercises_fts, rowid, name, category) "
+    "VALUES ('delete', old.id, old.name, old.category); "
+    "INSERT INTO exercises_fts(rowid, name, category) VALUES (new.id, new.name, new.category); "
+    "END",
+    "CREATE VIRTUAL TABLE workouts_fts USING fts5("
+    "notes, content='workouts', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+    "CREATE TRIGGER workouts_fts_insert AFTER INSERT ON workouts "
+    "WHEN new.notes IS NOT NULL BEGIN "
+    "INSERT INTO workouts_fts(rowid, notes) VALUES (new.id, new.notes); "
+    "END",
+    "CREATE TRIGGER workouts_fts_delete AFTER DELETE ON workouts "
+    "WHEN old.notes IS NOT NULL BEGIN "
+    "INSERT INTO workouts_fts(workouts_fts, rowid, notes) VALUES ('delete', old.id, old.notes); "
+    "END",
+    "CREATE TRIGGER workouts_fts_update AFTER UPDATE OF notes ON workouts BEGIN "
+    "INSERT INTO workouts_fts(workouts_fts, rowid, notes) "
+    "SELECT 'delete', old.id, old.notes WHERE old.notes IS NOT NULL; "
+    "INSERT INTO workouts_fts(rowid, notes) SELECT new.id, new.notes WHERE new.notes IS NOT NULL; "
+    "END",
+    # Index the rows that already exist
+    "INSERT INTO exercises_fts(exercises_fts) VALUES ('rebuild')",
+    "INSERT INTO workouts_fts(workouts_fts) VALUES ('rebuild')",
+]
+
+POSTGRESQL_INDEXES = {
+    'ix_exercises_search': ('exercises', "to_tsvector('simple', coalesce(name, '') || ' ' || coalesce(category, ''))"),
+    'ix_workouts_search': ('workouts', "to_tsvector('simple', coalesce(notes, ''))"),
+}
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        for statement in SQLITE_SCHEMA:
+            op.execute(statement)
+    elif dialect == 'postgresql':
+        for name, (table, document) in POSTGRESQL_INDEXES.items():
+            op.create_index(name, table, [sa.text(document)], postgresql_using='gin')
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        # The triggers belong to the content tables, so they outlive the index unless dropped
+        for table in ('exercises', 'workouts'):
+            for trigger in ('insert', 'delete', 'update'):
+                op.execute(f'DROP TRIGGER IF EXISTS {table}_fts_{trigger}')
+            op.execute(f'DROP TABLE IF EXISTS {table}_fts')
+    elif dialect == 'postgresql':
+        for name, (table, _) in POSTGRESQL_INDEXES.items():
+            op.drop_index(name, table_name=table)
@@ -1,6 +1,6 @@
 from extensions import db
 from datetime import datetime
-from sqlalchemy.orm import validates
+from sqlalchemy.orm import declared_attr, validates
 
 # Remove the local db = SQLAlchemy() line and use the shared instance
 
@@ -10,6 +10,13 @@ class BaseModel(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # Incremented by every ORM update; an UPDATE or DELETE whose row has moved on
+    # since it was loaded raises StaleDataError instead of overwriting the change
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1')
+    
+    @declared_attr
+    def __mapper_args__(cls):
+        return {'version_id_col': cls.__table__.c.version}
     
     def save(self):
         db.session.add(self)
@@ -35,6 +42,17 @@ class Exercise(BaseModel):
     name = db.Column(db.String(100), nullable=False, unique=True)
     category = db.Column(db.String(50), nullable=False)
     equipment_needed = db.Column(db.Boolean, default=False)
+    
+    # Table constraints
+    __table_args__ = (
+        # Case-insensitive uniqueness; also serves indexed lookups by lower(name)
+        db.Index('uq_exercises_name_lower', db.func.lower(name), unique=True),
+    )
+    
+    @classmethod
+    def get_by_name(cls, name):
+        """Case-insensitive lookup by name using the lower(name) index"""
+        return cls.query.filter(db.func.lower(cls.name) == name.strip().lower()).first()
 
     def get_workout_count(self):
         """Get the number of workouts this exercise appears in"""
@@ -48,6 +66,45 @@ class Exercise(BaseModel):
         ).scalar()
         return result or 0
     
+    @classmethod
+    def get_stats(cls, start_date=None, end_date=None):
+        """
+        Per-exercise totals for every exercise, computed in one grouped query.
+        Optionally limited to workouts between start_date and end_date (inclusive).
+        """
+        # Group on exercise_id + 0 so SQLite scans workout_exercises in table order
+        # rather than walking the exercise_id index with a row lookup per entry
+        exercise_key = (WorkoutExercise.exercise_id + 0).label('exercise_id')
+        
+        totals = db.select(
+            exercise_key,
+            db.func.count(WorkoutExercise.id).label('workout_count'),
+            db.func.sum(WorkoutExercise.reps).label('total_reps'),
+            db.func.sum(WorkoutExercise.reps * WorkoutExercise.sets).label('total_volume'),
+            db.func.sum(WorkoutExercise.duration_seconds).label('total_duration_seconds'),
+            db.func.max(Workout.date).label('last_performed')
+        ).join(Workout, Workout.id == WorkoutExercise.workout_id)
+        
+        if start_date:
+            totals = totals.where(Workout.date >= start_date)
+        if end_date:
+            totals = totals.where(Workout.date <= end_date)
+        
+        totals = totals.group_by(exercise_key).subquery()
+        
+        return db.session.execute(
+            db.select(
+                cls.id,
+                cls.name,
+                cls.category,
+                db.func.coalesce(totals.c.workout_count, 0).label('workout_count'),
+                db.func.coalesce(totals.c.total_reps, 0).label('total_reps'),
+                db.func.coalesce(totals.c.total_volume, 0).label('total_volume'),
+                db.func.coalesce(totals.c.total_duration_seconds, 0).label('total_duration_seconds'),
+                totals.c.last_performed
+            ).outerjoin(totals, totals.c.exercise_id == cls.id).order_by(cls.name, cls.id)
+        ).all()
+    
     # Add explicit relationship to workouts through workout_exercises
     workouts = db.relationship(
         'Workout',
@@ -56,6 +113,15 @@ class Exercise(BaseModel):
         viewonly=True  # This is a read-only relationship since we have the join table
     )
     
+    # Association rows carrying reps/sets/duration for this exercise.
+    # The database deletes them via ON DELETE CASCADE, so they aren't loaded on delete.
+    workout_exercises = db.relationship(
+        'WorkoutExercise',
+        back_populates='exercise',
+        cascade='all, delete-orphan',
+        passive_deletes=True
+    )
+    
     # Validations
     @validates('name')
     def validate_name(self, key, name):
@@ -64,11 +130,8 @@ class Exercise(BaseModel):
         if len(name) > 100:
             raise ValueError("Exercise name cannot exceed 100 characters")
         
-        # Check for uniqueness (excluding current instance if updating)
-        existing = Exercise.query.filter(Exercise.name.ilike(name), Exercise.id != self.id).first()
-        if existing:
-            raise ValueError("Exercise with this name already exists")
-        
+        # Uniqueness is enforced by the uq_exercises_name_lower index rather than a
+        # query here, so assigning a name never touches the database
         return name.strip()
     
     @validates('category')
@@ -89,6 +152,12 @@ class Workout(BaseModel):
     date = db.Column(db.Date, nullable=False)
     duration_minutes = db.Column(db.Integer, nullable=False)
     notes = db.Column(db.Text)
+    
+    # Table constraints
+    __table_args__ = (
+        # Date range filters and (date, id) keyset pagination
+        db.Index('ix_workouts_date_id', 'date', 'id'),
+    )
 
     def add_exercise(self, exercise, reps=None, sets=None, duration_seconds=None):
         """Convenience method to add an exercise to this workout"""
@@ -117,6 +186,16 @@ class Workout(BaseModel):
         viewonly=True  # This is a read-only relationship since we have the join table
     )
     
+    # Association rows carrying reps/sets/duration for each exercise in this workout.
+    # The database deletes them via ON DELETE CASCADE, so they aren't loaded on delete.
+    workout_exercises = db.relationship(
+        'WorkoutExercise',
+        back_populates='workout',
+        order_by='WorkoutExercise.id',
+        cascade='all, delete-orphan',
+        passive_deletes=True
+    )
+    
     # Validations
     @validates('date')
     def validate_date(self, key, workout_date):  # Fixed parameter name
@@ -157,8 +236,8 @@ class Workout(BaseModel):
 class WorkoutExercise(BaseModel):
     __tablename__ = 'workout_exercises'
     
-    workout_id = db.Column(db.Integer, db.ForeignKey('workouts.id'), nullable=False)
-    exercise_id = db.Column(db.Integer, db.ForeignKey('exercises.id'), nullable=False)
+    workout_id = db.Column(db.Integer, db.ForeignKey('workouts.id', ondelete='CASCADE'), nullable=False)
+    exercise_id = db.Column(db.Integer, db.ForeignKey('exercises.id', ondelete='CASCADE'), nullable=False)
     reps = db.Column(db.Integer)
     sets = db.Column(db.Integer)
     duration_seconds = db.Column(db.Integer)
@@ -172,9 +251,14 @@ class WorkoutExercise(BaseModel):
             '(reps IS NOT NULL AND sets IS NOT NULL) OR duration_seconds IS NOT NULL',
             name='check_has_reps_sets_or_duration'
         ),
-        db.UniqueConstraint('workout_id', 'exercise_id', name='unique_workout_exercise')
+        db.UniqueConstraint('workout_id', 'exercise_id', name='unique_workout_exercise'),
+        # Lookups starting from an exercise (the unique constraint covers workout_id)
+        db.Index('ix_workout_exercises_exercise_id_workout_id', 'exercise_id', 'workout_id')
     )
     
+    workout = db.relationship('Workout', back_populates='workout_exercises')
+    exercise = db.relationship('Exercise', back_populates='workout_exercises')
+    
     # Validations
     @validates('reps')
     def validate_reps(self, key, reps):
@@ -204,4 +288,110 @@ class WorkoutExercise(BaseModel):
         return duration
     
     def __repr__(self):
-        return f'<WorkoutExercise Workout:{self.workout_id} Exercise:{self.exercise_id}>'
\ No newline at end of file
+        return f'<WorkoutExercise Workout:{self.workout_id} Exercise:{self.exercise_id}>'
+
+### Start of rollup models ###
+
+class TrainingRollup(db.Model):
+    """Training totals per day or ISO week, maintained incrementally by rollups.py"""
+    __tablename__ = 'training_rollups'
+    
+    period = db.Column(db.String(4), primary_key=True)  # 'day' or 'week'
+    period_start = db.Column(db.Date, primary_key=True)  # the day, or the Monday of the ISO week
+    workout_count = db.Column(db.Integer, nullable=False, default=0)
+    minutes = db.Column(db.Integer, nullable=False, default=0)
+    exercise_count = db.Column(db.Integer, nullable=False, default=0)
+    sets = db.Column(db.Integer, nullable=False, default=0)
+    reps = db.Column(db.Integer, nullable=False, default=0)
+    volume = db.Column(db.Integer, nullable=False, default=0)
+    duration_seconds = db.Column(db.Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f'<TrainingRollup {self.period} {self.period_start}>'
+
+class CategoryRollup(db.Model):
+    """Exercise totals per category per day or ISO week, maintained by rollups.py"""
+    __tablename__ = 'category_rollups'
+    
+    period = db.Column(db.String(4), primary_key=True)
+    period_start = db.Column(db.Date, primary_key=True)
+    category = db.Column(db.String(50), primary_key=True)
+    exercise_count = db.Column(db.Integer, nullable=False, default=0)
+    sets = db.Column(db.Integer, nullable=False, default=0)
+    reps = db.Column(db.Integer, nullable=False, default=0)
+    volume = db.Column(db.Integer, nullable=False, default=0)
+    duration_seconds = db.Column(db.Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f'<CategoryRollup {self.period} {self.period_start} {self.category}>'
+
+### Start of progression models ###
+
+class ExerciseRecord(db.Model):
+    """Personal records and lifetime totals per exercise, maintained incrementally by progression.py"""
+    __tablename__ = 'exercise_records'
+    
+    exercise_id = db.Column(db.Integer, db.ForeignKey('exercises.id', ondelete='CASCADE'), primary_key=True)
+    entry_count = db.Column(db.Integer, nullable=False, default=0)
+    total_reps = db.Column(db.Integer, nullable=False, default=0)
+    total_volume = db.Column(db.Integer, nullable=False, default=0)
+    total_duration_seconds = db.Column(db.Integer, nullable=False, default=0)
+    # 0 until the exercise has been logged that way; each date is when the best was first reached
+    best_reps = db.Column(db.Integer, nullable=False, default=0)
+    best_reps_date = db.Column(db.Date)
+    best_volume = db.Column(db.Integer, nullable=False, default=0)
+    best_volume_date = db.Column(db.Date)
+    longest_duration_seconds = db.Column(db.Integer, nullable=False, default=0)
+    longest_duration_seconds_date = db.Column(db.Date)
+    
+    def __repr__(self):
+        return f'<ExerciseRecord {self.exercise_id}>'
+
+class ProgressionBucket(db.Model):
+    """Per-exercise totals and bests per week or month, maintained incrementally by progression.py"""
+    __tablename__ = 'exercise_progression'
+    
+    exercise_id = db.Column(db.Integer, db.ForeignKey('exercises.id', ondelete='CASCADE'), primary_key=True)
+    period = db.Column(db.String(5), primary_key=True)  # 'week' or 'month'
+    period_start = db.Column(db.Date, primary_key=True)  # the Monday of the ISO week, or the 1st of the month
+    entry_count = db.Column(db.Integer, nullable=False, default=0)
+    total_reps = db.Column(db.Integer, nullable=False, default=0)
+    total_volume = db.Column(db.Integer, nullable=False, default=0)
+    total_duration_seconds = db.Column(db.Integer, nullable=False, default=0)
+    best_reps = db.Column(db.Integer, nullable=False, default=0)
+    best_volume = db.Column(db.Integer, nullable=False, default=0)
+    longest_duration_seconds = db.Column(db.Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f'<ProgressionBucket {self.exercise_id} {self.period} {self.period_start}>'
+
+### Start of ResourceVersion model ###
+
+class ResourceVersion(db.Model):
+    """Write counter per table, bumped with every change and used to build ETags"""
+    __tablename__ = 'resource_versions'
+    
+    name = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f'<ResourceVersion {self.name} {self.version}>'
+
+### Start of IdempotencyKey model ###
+
+class IdempotencyKey(db.Model):
+    """The stored outcome of a write sent with an Idempotency-Key header, replayed to retries until it expires"""
+    __tablename__ = 'idempotency_keys'
+    
+    key = db.Column(db.String(255), primary_key=True)
+    # SHA-256 of the method, path and body, so a key reused for a different request is refused
+    fingerprint = db.Column(db.LargeBinary(32), nullable=False)
+    # Both NULL while the first request is still running
+    status_code = db.Column(db.SmallInteger)
+    body = db.Column(db.LargeBinary)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+    # Random per claim, so a request whose lease was taken over can't store or release the key
+    claim_token = db.Column(db.String(32))
+    
+    def __repr__(self):
+        return f'<IdempotencyKey {self.key} {self.status_code}>'
@@ -0,0 +1,148 @@
+import base64
+import json
+from datetime import date, datetime
+from urllib.parse import urlencode
+
+from flask import request
+from sqlalchemy import and_, or_
+
+# Page size limits for list endpoints
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 500
+
+
+def encode_cursor(values):
+    """Encode the sort key of the last row on a page as an opaque cursor"""
+    raw = json.dumps(values, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def _cursor_value(column, value):
+    """Coerce one decoded cursor value to the Python type of its sort column"""
+    try:
+        python_type = column.type.python_type
+    except NotImplementedError:
+        python_type = None
+
+    # JSON has no date type, so date keys travel as ISO strings
+    if python_type in (date, datetime):
+        return python_type.fromisoformat(value)
+    if isinstance(value, bool) or not isinstance(value, (str, int, float)):
+        raise TypeError(f"Unexpected cursor value for {column.key}")
+    if python_type is int and not isinstance(value, int):
+        raise TypeError(f"Cursor value for {column.key} must be an integer")
+    if python_type is float:
+        return float(value)
+    if python_type is str and not isinstance(value, str):
+        raise TypeError(f"Cursor value for {column.key} must be a string")
+    return value
+
+
+def decode_cursor(cursor, columns):
+    """Decode a cursor back into values matching the given sort columns"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+
+    if not isinstance(values, list) or len(values) != len(columns):
+        raise ValueError("Invalid cursor")
+
+    # A tampered cursor must fail here, not in the SQL comparison (or compare as the wrong type)
+    try:
+        return [_cursor_value(column, value) for column, value in zip(columns, values)]
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+
+
+def parse_limit(value):
+    if value is None:
+        return DEFAULT_LIMIT
+    try:
+        limit = int(value)
+    except ValueError:
+        raise ValueError("limit must be an integer")
+    if limit <= 0 or limit > MAX_LIMIT:
+        raise ValueError(f"limit must be between 1 and {MAX_LIMIT}")
+    return limit
+
+
+def parse_order(value):
+    if value is None or value == 'asc':
+        return False
+    if value == 'desc':
+        return True
+    raise ValueError("order must be 'asc' or 'desc'")
+
+
+def parse_date(value, name):
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except ValueError:
+        raise ValueError(f"{name} must be in YYYY-MM-DD format")
+
+
+def parse_bool(value, name):
+    if value.lower() in ('true', '1', 'yes'):
+        return True
+    if value.lower() in ('false', '0', 'no'):
+        return False
+    raise ValueError(f"{name} must be true or false")
+
+
+def _after(columns, values, descending):
+    """Build the keyset predicate selecting rows that sort after the cursor"""
+    clauses = []
+    for i, (column, value) in enumerate(zip(columns, values)):
+        equal_prefix = [c == v for c, v in zip(columns[:i], values[:i])]
+        beyond = column < value if descending else column > value
+        clauses.append(and_(*equal_prefix, beyond))
+    return or_(*clauses)
+
+
+def _key(item, columns):
+    values = [getattr(item, column.key) for column in columns]
+    return [value.isoformat() if isinstance(value, date) else value for value in values]
+
+
+def keyset_paginate(query, columns, args):
+    """
+    Return one page of query ordered by columns, plus the cursor of the next page.
+
+    The cursor encodes the sort key of the last row returned, so each page is an
+    index range scan that costs the same regardless of how deep into the results it is.
+    """
+    limit = parse_limit(args.get('limit'))
+    descending = parse_order(args.get('order'))
+
+    cursor = args.get('cursor')
+    if cursor:
+        query = query.filter(_after(columns, decode_cursor(cursor, columns), descending))
+
+    ordering = [column.desc() if descending else column.asc() for column in columns]
+
+    # Fetch one extra row to know whether another page exists
+    items = query.order_by(*ordering).limit(limit + 1).all()
+
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        next_cursor = encode_cursor(_key(items[-1], columns))
+
+    return items, next_cursor
+
+
+def pagination_headers(next_cursor):
+    """Headers pointing the client at the next page, if there is one"""
+    if next_cursor is None:
+        return {}
+
+    args = request.args.to_dict()
+    args['cursor'] = next_cursor
+    next_url = f"{request.base_url}?{urlencode(args)}"
+
+    return {
+        'X-Next-Cursor': next_cursor,
+        'Link': f'<{next_url}>; rel="next"'
+    }
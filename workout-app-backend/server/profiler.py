@@ -0,0 +1,268 @@
+"""
+Admin-only profiling, installed only when PROFILER_TOKEN is configured.
+
+A request carrying the token in X-Profiler-Token and asking for a profile
+(?profile=<mode> or an X-Profile: <mode> header) runs under cProfile:
+  text   - return the pstats report instead of the response
+  pstats - return the binary pstats file (snakeviz, flameprof, gprof2dot)
+  save   - write the pstats file to PROFILER_DIR and return the normal response
+POST /admin/profiler/sample starts sampling the stacks of every thread
+handling a request for a few seconds on a background thread, and GET
+/admin/profiler/sample/<id> returns them once the window is over, in the
+collapsed format read by flamegraph.pl and speedscope. Under the ASGI entry
+point requests are greenlets sharing the event loop thread, whose stacks
+can't be sampled, so the endpoint answers 501 there.
+
+Without PROFILER_TOKEN neither the middleware nor the endpoint is registered.
+"""
+
+import cProfile
+import hmac
+import io
+import marshal
+import os
+import pstats
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from urllib.parse import parse_qs
+
+from flask import Flask, Response, current_app, jsonify, request
+
+PROFILE_MODES = ('text', 'pstats', 'save')
+MAX_SAMPLE_SECONDS = 5
+# Sampling jobs kept for polling; the oldest finished ones are dropped first
+MAX_SAMPLE_JOBS = 16
+
+# Frames of this code object mark a thread that is handling a request
+_REQUEST_CODE = Flask.wsgi_app.__code__
+
+
+def _token_matches(expected, given):
+    return given is not None and hmac.compare_digest(expected.encode('utf-8'), given.encode('utf-8'))
+
+
+def _error(start_response, status, message):
+    body = ('{"error": "%s"}\n' % message).encode('utf-8')
+    start_response(status, [('Content-Type', 'application/json'), ('Content-Length', str(len(body)))])
+    return [body]
+
+
+class RequestProfiler:
+    """WSGI middleware profiling single requests on demand"""
+
+    def __init__(self, wsgi_app, token, directory=None, sort='cumulative', limit=60):
+        self.wsgi_app = wsgi_app
+        self.token = token
+        self.directory = directory
+        self.sort = sort
+        self.limit = limit
+
+    def _requested_mode(self, environ):
+        mode = environ.get('HTTP_X_PROFILE')
+        query = environ.get('QUERY_STRING', '')
+        if mode is None and 'profile=' in query:
+            mode = parse_qs(query).get('profile', [None])[0]
+        return mode
+
+    def __call__(self, environ, start_response):
+        mode = self._requested_mode(environ)
+        if mode is None:
+            return self.wsgi_app(environ, start_response)
+
+        if not _token_matches(self.token, environ.get('HTTP_X_PROFILER_TOKEN')):
+            return _error(start_response, '403 FORBIDDEN', "Profiling requires a valid X-Profiler-Token")
+        if mode not in PROFILE_MODES:
+            return _error(start_response, '400 BAD REQUEST', f"profile must be one of: {', '.join(PROFILE_MODES)}")
+        if mode == 'save' and not self.directory:
+            return _error(start_response, '400 BAD REQUEST', "PROFILER_DIR is not configured")
+
+        response = {}
+        chunks = []
+
+        def capture_start_response(status, headers, exc_info=None):
+            response['status'], response['headers'] = status, headers
+            return chunks.append
+
+        profile = cProfile.Profile()
+        profile.enable()
+        try:
+            # Consume the body inside the profile so streamed responses are covered too
+            app_iter = self.wsgi_app(environ, capture_start_response)
+            try:
+                chunks.extend(app_iter)
+            finally:
+                close = getattr(app_iter, 'close', None)
+                if close is not None:
+                    close()
+        finally:
+            profile.disable()
+
+        if mode == 'text':
+            report = io.StringIO()
+            report.write(f"{environ['REQUEST_METHOD']} {environ.get('PATH_INFO', '')} -> {response['status']}\n\n")
+            pstats.Stats(profile, stream=report).sort_stats(self.sort).print_stats(self.limit)
+            body = report.getvalue().encode('utf-8')
+            start_response('200 OK', [('Content-Type', 'text/plain; charset=utf-8'), ('Content-Length', str(len(body)))])
+            return [body]
+
+        if mode == 'pstats':
+            profile.create_stats()
+            body = marshal.dumps(profile.stats)
+            start_response('200 OK', [
+                ('Content-Type', 'application/octet-stream'),
+                ('Content-Disposition', f'attachment; filename="{self._filename(environ)}"'),
+                ('Content-Length', str(len(body)))
+            ])
+            return [body]
+
+        filename = self._filename(environ)
+        profile.dump_stats(os.path.join(self.directory, filename))
+        start_response(response['status'], response['headers'] + [('X-Profile-File', filename)])
+        return chunks
+
+    def _filename(self, environ):
+        path = re.sub(r'[^A-Za-z0-9]+', '-', environ.get('PATH_INFO', '')).strip('-') or 'root'
+        stamp = time.strftime('%Y%m%dT%H%M%S')
+        return f"{stamp}-{environ['REQUEST_METHOD']}-{path}-{uuid.uuid4().hex[:8]}.pstats"
+
+
+def _frame_label(frame):
+    code = frame.f_code
+    return f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})'
+
+
+def sample_stacks(seconds, interval, all_threads=False):
+    """
+    Sample the stack of every other thread each interval seconds for a window
+    of seconds, counting identical stacks. Unless all_threads is set, only
+    threads inside a request are counted.
+    """
+    own_thread = threading.get_ident()
+    stacks = Counter()
+    samples = 0
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own_thread:
+                continue
+            labels, in_request = [], all_threads
+            while frame is not None:
+                labels.append(_frame_label(frame))
+                in_request = in_request or frame.f_code is _REQUEST_CODE
+                frame = frame.f_back
+            if in_request:
+                stacks[';'.join(reversed(labels))] += 1
+        samples += 1
+        time.sleep(interval)
+    return stacks, samples
+
+
+class SampleJob:
+    """One sampling window, run on a daemon thread so no request waits for it"""
+
+    def __init__(self, seconds, interval, all_threads):
+        self.id = uuid.uuid4().hex
+        self.seconds = seconds
+        self.interval = interval
+        self.stacks = None
+        self.samples = 0
+        self.thread = threading.Thread(target=self._run, args=(all_threads,), daemon=True,
+                                       name=f'profiler-sample-{self.id[:8]}')
+
+    def _run(self, all_threads):
+        stacks = Counter()
+        try:
+            stacks, self.samples = sample_stacks(self.seconds, self.interval, all_threads)
+        finally:
+            # Set last, marking the job done, even if sampling failed
+            self.stacks = stacks
+
+    @property
+    def done(self):
+        return self.stacks is not None
+
+
+_jobs = {}
+_jobs_lock = threading.Lock()
+
+
+def _refuse_sampling():
+    """The error response when this request may not sample, or None"""
+    if not _token_matches(current_app.config['PROFILER_TOKEN'], request.headers.get('X-Profiler-Token')):
+        return jsonify({"error": "Profiling requires a valid X-Profiler-Token"}), 403
+    if 'asgi' in current_app.extensions:
+        return jsonify({"error": "Stack sampling is not available under the ASGI server"}), 501
+    return None
+
+
+# POST /admin/profiler/sample - Start aggregating hot stacks across all requests for a time window
+# Query params: seconds (default 2, max 5), interval_ms (default 5), all_threads
+def start_sample_view():
+    refusal = _refuse_sampling()
+    if refusal is not None:
+        return refusal
+    try:
+        seconds = float(request.args.get('seconds', 2))
+        interval = float(request.args.get('interval_ms', 5)) / 1000
+    except ValueError:
+        return jsonify({"error": "seconds and interval_ms must be numbers"}), 400
+    if not 0 < seconds <= MAX_SAMPLE_SECONDS or interval <= 0:
+        return jsonify({"error": f"seconds must be between 0 and {MAX_SAMPLE_SECONDS}, interval_ms positive"}), 400
+
+    with _jobs_lock:
+        if any(not job.done for job in _jobs.values()):
+            return jsonify({"error": "Another sampling job is still running"}), 409, {'Retry-After': '1'}
+        while len(_jobs) >= MAX_SAMPLE_JOBS:
+            del _jobs[next(iter(_jobs))]
+        job = SampleJob(seconds, interval, request.args.get('all_threads') in ('1', 'true'))
+        _jobs[job.id] = job
+    job.thread.start()
+
+    location = f'/admin/profiler/sample/{job.id}'
+    return jsonify({"id": job.id, "status": "running", "seconds": seconds}), 202, {'Location': location}
+
+
+# GET /admin/profiler/sample/<job_id> - Poll a sampling job; 202 while it runs, then the stacks
+# Query params: format (collapsed or json)
+def sample_result_view(job_id):
+    refusal = _refuse_sampling()
+    if refusal is not None:
+        return refusal
+    output_format = request.args.get('format', 'collapsed')
+    if output_format not in ('collapsed', 'json'):
+        return jsonify({"error": "format must be collapsed or json"}), 400
+    job = _jobs.get(job_id)
+    if job is None:
+        return jsonify({"error": "Sampling job not found"}), 404
+    if not job.done:
+        return jsonify({"id": job.id, "status": "running"}), 202, {'Retry-After': str(max(1, round(job.seconds)))}
+
+    if output_format == 'json':
+        return jsonify({
+            "id": job.id,
+            "status": "done",
+            "seconds": job.seconds,
+            "interval_ms": job.interval * 1000,
+            "samples": job.samples,
+            "stacks": [{"stack": stack, "count": count} for stack, count in job.stacks.most_common(200)]
+        }), 200
+    lines = [f'{stack} {count}' for stack, count in job.stacks.most_common()]
+    return Response('\n'.join(lines) + '\n', content_type='text/plain; charset=utf-8')
+
+
+def init_app(app):
+    """Install the profiler when PROFILER_TOKEN is set in the config or environment"""
+    token = app.config.get('PROFILER_TOKEN') or os.environ.get('PROFILER_TOKEN')
+    if not token:
+        return
+    app.config['PROFILER_TOKEN'] = token
+    directory = app.config.get('PROFILER_DIR') or os.environ.get('PROFILER_DIR')
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    app.wsgi_app = RequestProfiler(app.wsgi_app, token, directory)
+    app.add_url_rule('/admin/profiler/sample', 'profiler_sample', start_sample_view, methods=['POST'])
+    app.add_url_rule('/admin/profiler/sample/<job_id>', 'profiler_sample_result', sample_result_view)
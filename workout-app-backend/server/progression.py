@@ -0,0 +1,282 @@
+"""
+Incremental maintenance of per-exercise personal records and progression series.
+
+Like the rollups, every write subtracts the contribution of the affected
+workout exercises before it runs and adds the new contribution afterwards.
+Totals can be subtracted exactly; a best cannot, so when a removed entry
+matched a stored best, that record or bucket is marked stale and recomputed
+from its own rows once the flush completes. Any other write costs a few
+upserts regardless of how long the history is.
+"""
+
+from collections import defaultdict
+from datetime import timedelta
+
+import click
+from sqlalchemy import and_, case, delete, event, func, inspect, or_, select, true, tuple_
+
+import database
+from extensions import db
+from models import Workout, WorkoutExercise, ExerciseRecord, ProgressionBucket
+
+PERIODS = ('week', 'month')
+
+TOTAL_FIELDS = ('entry_count', 'total_reps', 'total_volume', 'total_duration_seconds')
+BEST_FIELDS = ('best_reps', 'best_volume', 'longest_duration_seconds')
+
+workouts = Workout.__table__
+workout_exercises = WorkoutExercise.__table__
+records = ExerciseRecord.__table__
+buckets = ProgressionBucket.__table__
+
+
+def period_start(period, day):
+    """The Monday starting the day's ISO week, or the first of its month"""
+    if period == 'week':
+        return day - timedelta(days=day.weekday())
+    return day.replace(day=1)
+
+
+def period_end(period, start):
+    """The first day after the bucket starting at start"""
+    if period == 'week':
+        return start + timedelta(days=7)
+    return (start + timedelta(days=32)).replace(day=1)
+
+
+def _new_record():
+    return {**dict.fromkeys(TOTAL_FIELDS, 0), **dict.fromkeys(BEST_FIELDS, 0),
+            **{f'{field}_date': None for field in BEST_FIELDS}}
+
+
+def _new_bucket():
+    return {**dict.fromkeys(TOTAL_FIELDS, 0), **dict.fromkeys(BEST_FIELDS, 0)}
+
+
+def collect(connection, condition):
+    """
+    Aggregate the workout exercises matching condition into record and bucket
+    contributions, keyed by exercise_id and (exercise_id, period, period_start).
+    """
+    volume = workout_exercises.c.reps * workout_exercises.c.sets
+    rows = connection.execute(
+        select(
+            workout_exercises.c.exercise_id,
+            workouts.c.date,
+            func.count(),
+            func.sum(workout_exercises.c.reps),
+            func.sum(volume),
+            func.sum(workout_exercises.c.duration_seconds),
+            func.max(workout_exercises.c.reps),
+            func.max(volume),
+            func.max(workout_exercises.c.duration_seconds)
+        ).select_from(
+            workout_exercises.join(workouts, workouts.c.id == workout_exercises.c.workout_id)
+        ).where(condition).group_by(workout_exercises.c.exercise_id, workouts.c.date)
+        .order_by(workout_exercises.c.exercise_id, workouts.c.date)
+    )
+
+    record_totals = defaultdict(_new_record)
+    bucket_totals = defaultdict(_new_bucket)
+    for exercise_id, day, *values in rows:
+        totals, bests = values[:len(TOTAL_FIELDS)], [value or 0 for value in values[len(TOTAL_FIELDS):]]
+        targets = [record_totals[exercise_id]] + [
+            bucket_totals[(exercise_id, period, period_start(period, day))] for period in PERIODS
+        ]
+        for target in targets:
+            for field, value in zip(TOTAL_FIELDS, totals):
+                target[field] += value or 0
+            for field, value in zip(BEST_FIELDS, bests):
+                if value > target[field]:
+                    target[field] = value
+                    # Rows arrive in date order, so this keeps the first day the best was reached
+                    if f'{field}_date' in target:
+                        target[f'{field}_date'] = day
+    return record_totals, bucket_totals
+
+
+def _greatest(connection, *values):
+    if connection.dialect.name == 'sqlite':
+        return func.max(*values)  # SQLite's multi-argument max() is scalar
+    return func.greatest(*values)
+
+
+def _upsert(connection, table, key_columns, rows, sign):
+    """Add (sign=1) or subtract (sign=-1) totals, keeping the larger of the stored and new bests"""
+    if not rows:
+        return
+
+    statement = database.insert_for(connection)(table)
+    excluded = statement.excluded
+    updates = {field: table.c[field] + excluded[field] for field in TOTAL_FIELDS}
+    if sign > 0:
+        for field in BEST_FIELDS:
+            updates[field] = _greatest(connection, table.c[field], excluded[field])
+            if f'{field}_date' in table.c:
+                date_column = table.c[f'{field}_date']
+                improved = or_(
+                    excluded[field] > table.c[field],
+                    and_(excluded[field] == table.c[field], excluded[f'{field}_date'] < date_column)
+                )
+                updates[f'{field}_date'] = case((improved, excluded[f'{field}_date']), else_=date_column)
+    connection.execute(statement.on_conflict_do_update(index_elements=key_columns, set_=updates), [
+        {**row, **{field: sign * row[field] for field in TOTAL_FIELDS}} if sign < 0 else row
+        for row in rows
+    ])
+
+
+def _record_rows(record_totals):
+    return [{'exercise_id': exercise_id, **totals} for exercise_id, totals in record_totals.items()]
+
+
+def _bucket_rows(bucket_totals):
+    return [
+        {'exercise_id': exercise_id, 'period': period, 'period_start': start, **totals}
+        for (exercise_id, period, start), totals in bucket_totals.items()
+    ]
+
+
+def add(connection, condition):
+    """Add the workout exercises currently matching condition to the records and series"""
+    record_totals, bucket_totals = collect(connection, condition)
+    _upsert(connection, records, ['exercise_id'], _record_rows(record_totals), 1)
+    _upsert(connection, buckets, ['exercise_id', 'period', 'period_start'], _bucket_rows(bucket_totals), 1)
+
+
+def remove(connection, condition):
+    """
+    Subtract the workout exercises currently matching condition, marking every
+    record and bucket whose best one of them holds for recomputation.
+    """
+    record_totals, bucket_totals = collect(connection, condition)
+    if not record_totals:
+        return
+    stale = connection.info.setdefault('stale_progression', set())
+
+    best_columns = [records.c[field] for field in BEST_FIELDS]
+    for exercise_id, *stored in connection.execute(
+        select(records.c.exercise_id, *best_columns).where(records.c.exercise_id.in_(record_totals))
+    ):
+        if any(best and record_totals[exercise_id][field] >= best for field, best in zip(BEST_FIELDS, stored)):
+            stale.add(('record', exercise_id))
+
+    key = tuple_(buckets.c.exercise_id, buckets.c.period, buckets.c.period_start)
+    best_columns = [buckets.c[field] for field in BEST_FIELDS]
+    for exercise_id, period, start, *stored in connection.execute(
+        select(buckets.c.exercise_id, buckets.c.period, buckets.c.period_start, *best_columns)
+        .where(key.in_(list(bucket_totals)))
+    ):
+        removed = bucket_totals[(exercise_id, period, start)]
+        if any(best and removed[field] >= best for field, best in zip(BEST_FIELDS, stored)):
+            stale.add(('bucket', (exercise_id, period, start)))
+
+    _upsert(connection, records, ['exercise_id'], _record_rows(record_totals), -1)
+    _upsert(connection, buckets, ['exercise_id', 'period', 'period_start'], _bucket_rows(bucket_totals), -1)
+
+
+def refresh_stale(connection):
+    """Recompute the records and buckets marked stale from their own rows"""
+    stale = connection.info.pop('stale_progression', None)
+    if not stale:
+        return
+
+    exercise_ids = sorted(key for kind, key in stale if kind == 'record')
+    if exercise_ids:
+        connection.execute(delete(records).where(records.c.exercise_id.in_(exercise_ids)))
+        record_totals, _ = collect(connection, workout_exercises.c.exercise_id.in_(exercise_ids))
+        _upsert(connection, records, ['exercise_id'], _record_rows(record_totals), 1)
+
+    for exercise_id, period, start in sorted(key for kind, key in stale if kind == 'bucket'):
+        bucket_key = and_(buckets.c.exercise_id == exercise_id, buckets.c.period == period,
+                          buckets.c.period_start == start)
+        connection.execute(delete(buckets).where(bucket_key))
+        _, bucket_totals = collect(connection, and_(
+            workout_exercises.c.exercise_id == exercise_id,
+            workouts.c.date >= start,
+            workouts.c.date < period_end(period, start)
+        ))
+        rows = [row for row in _bucket_rows(bucket_totals) if row['period'] == period]
+        _upsert(connection, buckets, ['exercise_id', 'period', 'period_start'], rows, 1)
+
+
+def add_workouts(connection, workout_ids):
+    """Add workouts inserted outside the ORM (e.g. bulk inserts) to the records and series"""
+    if workout_ids:
+        add(connection, workout_exercises.c.workout_id.in_(workout_ids))
+
+
+def rebuild(connection):
+    """Recompute every record and series bucket from the workout history"""
+    connection.execute(delete(records))
+    connection.execute(delete(buckets))
+    add(connection, true())
+
+
+def _changed(target, *attributes):
+    state = inspect(target)
+    return any(state.attrs[attribute].history.has_changes() for attribute in attributes)
+
+
+### Workout listeners (date changes and cascading deletes) ###
+
+@event.listens_for(Workout, 'before_update')
+def workout_updating(mapper, connection, target):
+    if _changed(target, 'date'):
+        remove(connection, workout_exercises.c.workout_id == target.id)
+
+@event.listens_for(Workout, 'after_update')
+def workout_updated(mapper, connection, target):
+    if _changed(target, 'date'):
+        add(connection, workout_exercises.c.workout_id == target.id)
+
+@event.listens_for(Workout, 'before_delete')
+def workout_deleting(mapper, connection, target):
+    # The workout exercises about to be removed by ON DELETE CASCADE
+    remove(connection, workout_exercises.c.workout_id == target.id)
+
+
+### WorkoutExercise listeners ###
+
+WORKOUT_EXERCISE_ATTRIBUTES = ('workout_id', 'exercise_id', 'reps', 'sets', 'duration_seconds')
+
+@event.listens_for(WorkoutExercise, 'after_insert')
+def workout_exercise_inserted(mapper, connection, target):
+    add(connection, workout_exercises.c.id == target.id)
+
+@event.listens_for(WorkoutExercise, 'before_update')
+def workout_exercise_updating(mapper, connection, target):
+    if _changed(target, *WORKOUT_EXERCISE_ATTRIBUTES):
+        remove(connection, workout_exercises.c.id == target.id)
+
+@event.listens_for(WorkoutExercise, 'after_update')
+def workout_exercise_updated(mapper, connection, target):
+    if _changed(target, *WORKOUT_EXERCISE_ATTRIBUTES):
+        add(connection, workout_exercises.c.id == target.id)
+
+@event.listens_for(WorkoutExercise, 'before_delete')
+def workout_exercise_deleting(mapper, connection, target):
+    remove(connection, workout_exercises.c.id == target.id)
+
+# Deleting an exercise needs no listener: its records and buckets go with it by ON DELETE CASCADE
+
+
+@event.listens_for(db.session, 'after_flush')
+def refresh_after_flush(session, flush_context):
+    # Every row of the flush has been written, so the recomputed bests are final
+    if 'stale_progression' in session.connection().info:
+        refresh_stale(session.connection())
+
+
+### CLI ###
+
+@click.group('progression')
+def progression_cli():
+    """Manage the per-exercise records and progression series."""
+
+@progression_cli.command('rebuild')
+def rebuild_command():
+    """Recompute all records and series from the workout history."""
+    rebuild(db.session.connection())
+    db.session.commit()
+    click.echo(f"Rebuilt {ExerciseRecord.query.count()} exercise records "
+               f"and {ProgressionBucket.query.count()} progression buckets")
@@ -0,0 +1,208 @@
+"""
+Response cache for the GET handlers.
+
+Entries are keyed by ETag, which already covers the request URL and the
+versions of the tables behind the response (see http_cache.py), so a write
+committed by any worker makes older entries unreachable. Backends also drop
+entries tagged with a written table when the writing transaction commits.
+"""
+
+import json
+import threading
+import time
+from collections import OrderedDict
+
+
+class CacheBackend:
+    """Interface for response cache storage"""
+
+    def get(self, key):
+        """Return the cached (headers, body) pair for key, or None"""
+        raise NotImplementedError
+
+    def set(self, key, headers, body, tags):
+        """Store a response, tagged with the tables it was built from"""
+        raise NotImplementedError
+
+    def invalidate(self, tags):
+        """Drop every entry built from any of the given tables"""
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+    def stats(self):
+        """Hit/miss counters and current size"""
+        raise NotImplementedError
+
+
+class LocalCache(CacheBackend):
+    """In-process cache with LRU eviction, a per-entry TTL and a total size cap in bytes"""
+
+    def __init__(self, max_bytes=64 * 1024 * 1024, ttl=300, clock=time.monotonic):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.clock = clock
+        self._entries = OrderedDict()  # key -> (headers, body, size, expires_at, tags)
+        self._tagged = {}  # tag -> set of keys
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[3] <= self.clock():
+                if entry is not None:
+                    self._remove(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0], entry[1]
+
+    def set(self, key, headers, body, tags):
+        size = len(body) + sum(len(name) + len(value) for name, value in headers)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (headers, body, size, self.clock() + self.ttl, tuple(tags))
+            self._size += size
+            for tag in tags:
+                self._tagged.setdefault(tag, set()).add(key)
+            while self._size > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def invalidate(self, tags):
+        with self._lock:
+            for tag in tags:
+                for key in list(self._tagged.get(tag, ())):
+                    self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._tagged.clear()
+            self._size = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                'backend': 'local',
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'entries': len(self._entries),
+                'bytes': self._size,
+                'max_bytes': self.max_bytes
+            }
+
+    def _remove(self, key):
+        headers, body, size, expires_at, tags = self._entries.pop(key)
+        self._size -= size
+        for tag in tags:
+            keys = self._tagged.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tagged[tag]
+
+
+class SharedCache(CacheBackend):
+    """
+    Cache stored in an external key-value service shared by all workers.
+
+    The client needs get(key), set(key, value, ttl) and delete(*keys), the
+    subset common to Redis and memcached clients. Invalidation here only
+    reaches entries this worker knows about; entries from other workers are
+    unreachable after a write anyway because their ETag keys change.
+    """
+
+    def __init__(self, client, ttl=300, prefix='workout-app:response:'):
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+        self._tagged = {}
+        self._lock = threading.Lock()
+        self.hits = self.misses = 0
+
+    def get(self, key):
+        value = self.client.get(self.prefix + key)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        header_line, _, body = value.partition(b'\n')
+        return [tuple(header) for header in json.loads(header_line)], body
+
+    def set(self, key, headers, body, tags):
+        value = json.dumps(headers).encode('utf-8') + b'\n' + body
+        self.client.set(self.prefix + key, value, self.ttl)
+        with self._lock:
+            for tag in tags:
+                self._tagged.setdefault(tag, set()).add(key)
+
+    def invalidate(self, tags):
+        with self._lock:
+            keys = set()
+            for tag in tags:
+                keys.update(self._tagged.pop(tag, ()))
+        if keys:
+            self.client.delete(*(self.prefix + key for key in keys))
+
+    def clear(self):
+        with self._lock:
+            keys = set().union(*self._tagged.values()) if self._tagged else set()
+            self._tagged.clear()
+        if keys:
+            self.client.delete(*(self.prefix + key for key in keys))
+
+    def stats(self):
+        with self._lock:
+            return {'backend': 'shared', 'hits': self.hits, 'misses': self.misses}
+
+
+class MemoryClient:
+    """Local stand-in for a Redis/memcached client, for tests and single-host setups"""
+
+    def __init__(self, clock=time.monotonic):
+        self.clock = clock
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value, expires_at = self._values.get(key, (None, 0))
+            if value is not None and expires_at <= self.clock():
+                del self._values[key]
+                return None
+            return value
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._values[key] = (value, self.clock() + ttl)
+
+    def delete(self, *keys):
+        with self._lock:
+            for key in keys:
+                self._values.pop(key, None)
+
+
+def init_app(app):
+    """
+    Attach the configured backend as app.extensions['response_cache'].
+
+    RESPONSE_CACHE_BACKEND is 'local' (default), None to disable caching, or a
+    CacheBackend instance such as SharedCache(redis_client).
+    """
+    backend = app.config.get('RESPONSE_CACHE_BACKEND', 'local')
+    if backend == 'local':
+        backend = LocalCache(
+            max_bytes=app.config.get('RESPONSE_CACHE_MAX_BYTES', 64 * 1024 * 1024),
+            ttl=app.config.get('RESPONSE_CACHE_TTL', 300)
+        )
+    app.extensions['response_cache'] = backend
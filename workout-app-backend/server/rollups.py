@@ -0,0 +1,205 @@
+"""
+Incremental maintenance of the daily/weekly training rollups.
+
+Every write subtracts the database's current contribution of the affected rows
+before it runs and adds the new contribution afterwards, so updates, deletes and
+ON DELETE CASCADE removals all keep the rollups exact without rescanning history.
+"""
+
+from collections import defaultdict
+from datetime import timedelta
+
+import click
+from sqlalchemy import event, inspect, select, func, delete, true
+
+import database
+from extensions import db
+from models import Exercise, Workout, WorkoutExercise, TrainingRollup, CategoryRollup
+
+PERIODS = ('day', 'week')
+
+TRAINING_FIELDS = ('workout_count', 'minutes', 'exercise_count', 'sets', 'reps', 'volume', 'duration_seconds')
+CATEGORY_FIELDS = ('exercise_count', 'sets', 'reps', 'volume', 'duration_seconds')
+
+workouts = Workout.__table__
+workout_exercises = WorkoutExercise.__table__
+exercises = Exercise.__table__
+
+
+def period_start(period, day):
+    """The day itself, or the Monday starting its ISO week"""
+    if period == 'week':
+        return day - timedelta(days=day.weekday())
+    return day
+
+
+def _upsert(connection, model, key_columns, rows):
+    """Add each row's counters to the existing rollup row, creating it if missing"""
+    if not rows:
+        return
+
+    table = model.__table__
+    statement = database.insert_for(connection)(table)
+    counters = [column for column in rows[0] if column not in key_columns]
+    statement = statement.on_conflict_do_update(
+        index_elements=key_columns,
+        set_={column: table.c[column] + statement.excluded[column] for column in counters}
+    )
+    connection.execute(statement, rows)
+
+
+def apply_contribution(connection, sign, workout_condition=None, workout_exercise_condition=None):
+    """
+    Add (sign=1) or subtract (sign=-1) the rollup contribution of the workouts
+    and workout exercises currently matching the given conditions.
+    """
+    training = defaultdict(lambda: dict.fromkeys(TRAINING_FIELDS, 0))
+    categories = defaultdict(lambda: dict.fromkeys(CATEGORY_FIELDS, 0))
+
+    if workout_condition is not None:
+        rows = connection.execute(
+            select(
+                workouts.c.date,
+                func.count(),
+                func.sum(workouts.c.duration_minutes)
+            ).where(workout_condition).group_by(workouts.c.date)
+        )
+        for day, workout_count, minutes in rows:
+            for period in PERIODS:
+                totals = training[(period, period_start(period, day))]
+                totals['workout_count'] += sign * workout_count
+                totals['minutes'] += sign * (minutes or 0)
+
+    if workout_exercise_condition is not None:
+        rows = connection.execute(
+            select(
+                workouts.c.date,
+                exercises.c.category,
+                func.count(),
+                func.sum(workout_exercises.c.sets),
+                func.sum(workout_exercises.c.reps),
+                func.sum(workout_exercises.c.reps * workout_exercises.c.sets),
+                func.sum(workout_exercises.c.duration_seconds)
+            ).select_from(
+                workout_exercises
+                .join(workouts, workouts.c.id == workout_exercises.c.workout_id)
+                .join(exercises, exercises.c.id == workout_exercises.c.exercise_id)
+            ).where(workout_exercise_condition).group_by(workouts.c.date, exercises.c.category)
+        )
+        for day, category, *values in rows:
+            for period in PERIODS:
+                start = period_start(period, day)
+                for field, value in zip(CATEGORY_FIELDS, values):
+                    training[(period, start)][field] += sign * (value or 0)
+                    categories[(period, start, category)][field] += sign * (value or 0)
+
+    _upsert(connection, TrainingRollup, ['period', 'period_start'], [
+        {'period': period, 'period_start': start, **totals}
+        for (period, start), totals in training.items()
+    ])
+    _upsert(connection, CategoryRollup, ['period', 'period_start', 'category'], [
+        {'period': period, 'period_start': start, 'category': category, **totals}
+        for (period, start, category), totals in categories.items()
+    ])
+
+
+def add_workouts(connection, workout_ids):
+    """Add workouts inserted outside the ORM (e.g. bulk inserts) to the rollups"""
+    if workout_ids:
+        apply_contribution(
+            connection, 1,
+            workouts.c.id.in_(workout_ids),
+            workout_exercises.c.workout_id.in_(workout_ids)
+        )
+
+
+def rebuild(connection):
+    """Recompute every rollup row from the workouts and workout_exercises tables"""
+    connection.execute(delete(TrainingRollup.__table__))
+    connection.execute(delete(CategoryRollup.__table__))
+    apply_contribution(connection, 1, true(), true())
+
+
+def _changed(target, *attributes):
+    state = inspect(target)
+    return any(state.attrs[attribute].history.has_changes() for attribute in attributes)
+
+
+### Workout listeners ###
+
+def _workout_conditions(target):
+    return workouts.c.id == target.id, workout_exercises.c.workout_id == target.id
+
+@event.listens_for(Workout, 'after_insert')
+def workout_inserted(mapper, connection, target):
+    apply_contribution(connection, 1, *_workout_conditions(target))
+
+@event.listens_for(Workout, 'before_update')
+def workout_updating(mapper, connection, target):
+    if _changed(target, 'date', 'duration_minutes'):
+        apply_contribution(connection, -1, *_workout_conditions(target))
+
+@event.listens_for(Workout, 'after_update')
+def workout_updated(mapper, connection, target):
+    if _changed(target, 'date', 'duration_minutes'):
+        apply_contribution(connection, 1, *_workout_conditions(target))
+
+@event.listens_for(Workout, 'before_delete')
+def workout_deleting(mapper, connection, target):
+    # Includes workout exercises about to be removed by ON DELETE CASCADE
+    apply_contribution(connection, -1, *_workout_conditions(target))
+
+
+### WorkoutExercise listeners ###
+
+WORKOUT_EXERCISE_ATTRIBUTES = ('workout_id', 'exercise_id', 'reps', 'sets', 'duration_seconds')
+
+@event.listens_for(WorkoutExercise, 'after_insert')
+def workout_exercise_inserted(mapper, connection, target):
+    apply_contribution(connection, 1, workout_exercise_condition=workout_exercises.c.id == target.id)
+
+@event.listens_for(WorkoutExercise, 'before_update')
+def workout_exercise_updating(mapper, connection, target):
+    if _changed(target, *WORKOUT_EXERCISE_ATTRIBUTES):
+        apply_contribution(connection, -1, workout_exercise_condition=workout_exercises.c.id == target.id)
+
+@event.listens_for(WorkoutExercise, 'after_update')
+def workout_exercise_updated(mapper, connection, target):
+    if _changed(target, *WORKOUT_EXERCISE_ATTRIBUTES):
+        apply_contribution(connection, 1, workout_exercise_condition=workout_exercises.c.id == target.id)
+
+@event.listens_for(WorkoutExercise, 'before_delete')
+def workout_exercise_deleting(mapper, connection, target):
+    apply_contribution(connection, -1, workout_exercise_condition=workout_exercises.c.id == target.id)
+
+
+### Exercise listeners (category changes and cascading deletes) ###
+
+@event.listens_for(Exercise, 'before_update')
+def exercise_updating(mapper, connection, target):
+    if _changed(target, 'category'):
+        apply_contribution(connection, -1, workout_exercise_condition=workout_exercises.c.exercise_id == target.id)
+
+@event.listens_for(Exercise, 'after_update')
+def exercise_updated(mapper, connection, target):
+    if _changed(target, 'category'):
+        apply_contribution(connection, 1, workout_exercise_condition=workout_exercises.c.exercise_id == target.id)
+
+@event.listens_for(Exercise, 'before_delete')
+def exercise_deleting(mapper, connection, target):
+    apply_contribution(connection, -1, workout_exercise_condition=workout_exercises.c.exercise_id == target.id)
+
+
+### CLI ###
+
+@click.group('rollups')
+def rollups_cli():
+    """Manage the daily/weekly training rollups."""
+
+@rollups_cli.command('rebuild')
+def rebuild_command():
+    """Recompute all rollups from the workout history."""
+    rebuild(db.session.connection())
+    db.session.commit()
+    click.echo(f"Rebuilt {TrainingRollup.query.count()} training rollups "
+               f"and {CategoryRollup.query.count()} category rollups")
@@ -1,42 +1,114 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, abort, request, jsonify
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm.exc import StaleDataError
 from extensions import db
-from models import Exercise, Workout, WorkoutExercise
-from schemas.exercise_schema import exercise_schema, exercises_schema
-from schemas.workout_schema import workout_schema
+from models import Exercise, ExerciseRecord, ProgressionBucket, Workout, WorkoutExercise
+from schemas.exercise_schema import exercise_schema
+from pagination import keyset_paginate, pagination_headers, parse_bool, parse_date
+from http_cache import conditional
+from idempotency import idempotent
+from concurrency import STALE_MESSAGE, VersionConflict, check_version, etag_header, resource_etag
+import progression
+from serializers import exercise_serializer, workout_serializer
 
 exercise_bp = Blueprint('exercises', __name__)
 
-# GET /exercises - List all exercises
+# GET /exercises - List exercises, one page at a time
+# Query params: limit, cursor, order (asc/desc), category, equipment_needed
 @exercise_bp.route('', methods=['GET'])
+@conditional('exercises')
 def get_exercises():
     try:
-        exercises = Exercise.query.all()
-        # Use dump() instead of jsonify()
-        return jsonify(exercises_schema.dump(exercises)), 200
+        # Select plain column rows for the fast-path serializer
+        query = db.session.query(*exercise_serializer.columns)
+        
+        # Filters are applied in SQL so only the requested page is loaded
+        category = request.args.get('category')
+        if category:
+            query = query.filter(Exercise.category == category.lower())
+        
+        equipment_needed = request.args.get('equipment_needed')
+        if equipment_needed is not None:
+            query = query.filter(
+                Exercise.equipment_needed == parse_bool(equipment_needed, 'equipment_needed')
+            )
+        
+        exercises, next_cursor = keyset_paginate(query, [Exercise.name, Exercise.id], request.args)
+        
+        return jsonify(exercise_serializer.dump_many(exercises)), 200, pagination_headers(next_cursor)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+# GET /exercises/stats - Workout count, reps, volume, duration and last date per exercise
+# Query params: start_date, end_date
+@exercise_bp.route('/stats', methods=['GET'])
+@conditional('workouts', 'workout_exercises', 'exercises')
+def get_exercise_stats():
+    try:
+        start_date = request.args.get('start_date')
+        end_date = request.args.get('end_date')
+        
+        stats = Exercise.get_stats(
+            start_date=parse_date(start_date, 'start_date') if start_date else None,
+            end_date=parse_date(end_date, 'end_date') if end_date else None
+        )
+        
+        return jsonify([
+            {
+                "exercise_id": row.id,
+                "name": row.name,
+                "category": row.category,
+                "workout_count": row.workout_count,
+                "total_reps": row.total_reps,
+                "total_volume": row.total_volume,
+                "total_duration_seconds": row.total_duration_seconds,
+                "last_performed": row.last_performed.isoformat() if row.last_performed else None
+            }
+            for row in stats
+        ]), 200
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 # GET /exercises/<id> - Show an exercise and associated workouts
+# The ETag can be sent back in If-Match to update the exercise
 @exercise_bp.route('/<int:id>', methods=['GET'])
+@conditional('workouts', 'workout_exercises', 'exercises', resource=resource_etag(Exercise))
 def get_exercise(id):
     try:
-        exercise = Exercise.query.get_or_404(id)
-        
-        # Get workouts that include this exercise
-        workout_exercises = WorkoutExercise.query.filter_by(exercise_id=id).all()
-        workouts_with_details = []
-        
-        for we in workout_exercises:
-            workout = Workout.query.get(we.workout_id)
-            workout_data = workout_schema.dump(workout)
-            workouts_with_details.append({
-                **workout_data,
-                "reps": we.reps,
-                "sets": we.sets,
-                "duration_seconds": we.duration_seconds
-            })
-        
-        exercise_data = exercise_schema.dump(exercise)
+        exercise = db.session.execute(
+            db.select(*exercise_serializer.columns).where(Exercise.id == id)
+        ).first()
+        if exercise is None:
+            abort(404)
+        
+        # Get workouts that include this exercise, with their details, in one query
+        rows = db.session.execute(
+            db.select(
+                *workout_serializer.columns,
+                WorkoutExercise.reps,
+                WorkoutExercise.sets,
+                WorkoutExercise.duration_seconds
+            ).join(
+                WorkoutExercise, WorkoutExercise.workout_id == Workout.id
+            ).where(
+                WorkoutExercise.exercise_id == id
+            ).order_by(WorkoutExercise.id)
+        )
+        workouts_with_details = [
+            {
+                **workout_serializer.dump(row),
+                "reps": row.reps,
+                "sets": row.sets,
+                "duration_seconds": row.duration_seconds
+            }
+            for row in rows
+        ]
+        
+        exercise_data = exercise_serializer.dump(exercise)
         exercise_data['workouts'] = workouts_with_details
         exercise_data['total_workouts'] = len(workouts_with_details)
         
@@ -44,17 +116,75 @@ def get_exercise(id):
     except Exception as e:
         return jsonify({"error": str(e)}), 404
 
+# GET /exercises/<id>/progression - Personal records and a weekly or monthly progression series
+# Query params: period (week or month), start_date, end_date
+@exercise_bp.route('/<int:id>/progression', methods=['GET'])
+@conditional('workouts', 'workout_exercises', 'exercises')
+def get_exercise_progression(id):
+    try:
+        period = request.args.get('period', 'week')
+        if period not in progression.PERIODS:
+            raise ValueError(f"period must be one of: {', '.join(progression.PERIODS)}")
+        
+        # Both reads come from the precomputed tables, so the cost follows the number of buckets
+        row = db.session.execute(
+            db.select(Exercise.id, Exercise.name, Exercise.category, ExerciseRecord)
+            .outerjoin(ExerciseRecord, ExerciseRecord.exercise_id == Exercise.id)
+            .where(Exercise.id == id)
+        ).first()
+        if row is None:
+            abort(404)
+        
+        filters = [
+            ProgressionBucket.exercise_id == id,
+            ProgressionBucket.period == period,
+            ProgressionBucket.entry_count > 0
+        ]
+        start_date = request.args.get('start_date')
+        if start_date:
+            start = progression.period_start(period, parse_date(start_date, 'start_date'))
+            filters.append(ProgressionBucket.period_start >= start)
+        end_date = request.args.get('end_date')
+        if end_date:
+            filters.append(ProgressionBucket.period_start <= parse_date(end_date, 'end_date'))
+        series = ProgressionBucket.query.filter(*filters).order_by(ProgressionBucket.period_start)
+        
+        # Exercises never logged have no record row yet
+        record = row.ExerciseRecord or ExerciseRecord(
+            **dict.fromkeys(progression.TOTAL_FIELDS + progression.BEST_FIELDS, 0)
+        )
+        records = {}
+        for field in progression.BEST_FIELDS:
+            achieved = getattr(record, f'{field}_date')
+            records[field] = {"value": getattr(record, field), "date": achieved.isoformat() if achieved else None}
+        
+        return jsonify({
+            "exercise_id": row.id,
+            "name": row.name,
+            "category": row.category,
+            "records": records,
+            "totals": {field: getattr(record, field) for field in progression.TOTAL_FIELDS},
+            "period": period,
+            "series": [
+                {
+                    "period_start": bucket.period_start.isoformat(),
+                    **{field: getattr(bucket, field) for field in progression.TOTAL_FIELDS + progression.BEST_FIELDS}
+                }
+                for bucket in series
+            ]
+        }), 200
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 404
+
 # POST /exercises - Create an exercise
 @exercise_bp.route('', methods=['POST'])
+@idempotent
 def create_exercise():
     try:
         data = request.get_json()
         
-        # Check for uniqueness before schema validation
-        name = data.get('name')
-        if name and Exercise.query.filter(Exercise.name.ilike(name)).first():
-            return jsonify({"error": "Exercise with this name already exists"}), 400
-        
         # Validate and deserialize input
         exercise_data = exercise_schema.load(data)
         exercise = Exercise(**exercise_data)
@@ -64,22 +194,23 @@ def create_exercise():
         
         # Use dump() instead of jsonify()
         return jsonify(exercise_schema.dump(exercise)), 201
+    except IntegrityError:
+        # Case-insensitive name uniqueness is enforced by the database
+        db.session.rollback()
+        return jsonify({"error": "Exercise with this name already exists"}), 400
     except Exception as e:
         db.session.rollback()
         return jsonify({"error": str(e)}), 400
 
 # PUT /exercises/<id> - Update an exercise
+# Headers: If-Match with the ETag from GET /exercises/<id> or the last update (optional; 409 if it has changed since)
 @exercise_bp.route('/<int:id>', methods=['PUT'])
 def update_exercise(id):
     try:
         exercise = Exercise.query.get_or_404(id)
+        check_version(exercise)
         data = request.get_json()
         
-        # Check for uniqueness (excluding current exercise)
-        name = data.get('name')
-        if name and Exercise.query.filter(Exercise.name.ilike(name), Exercise.id != id).first():
-            return jsonify({"error": "Exercise with this name already exists"}), 400
-        
         # Validate and update
         exercise_data = exercise_schema.load(data, partial=True)
         
@@ -89,7 +220,16 @@ def update_exercise(id):
         db.session.commit()
         
         # Use dump() instead of jsonify()
-        return jsonify(exercise_schema.dump(exercise)), 200
+        return jsonify(exercise_schema.dump(exercise)), 200, etag_header(exercise)
+    except VersionConflict as e:
+        return jsonify({"error": str(e), "version": e.current}), 409, e.headers
+    except StaleDataError:
+        db.session.rollback()
+        return jsonify({"error": STALE_MESSAGE}), 409
+    except IntegrityError:
+        # Case-insensitive name uniqueness is enforced by the database
+        db.session.rollback()
+        return jsonify({"error": "Exercise with this name already exists"}), 400
     except Exception as e:
         db.session.rollback()
         return jsonify({"error": str(e)}), 400
@@ -100,9 +240,7 @@ def delete_exercise(id):
     try:
         exercise = Exercise.query.get_or_404(id)
         
-        # Delete associated workout exercises
-        WorkoutExercise.query.filter_by(exercise_id=id).delete()
-        
+        # Associated workout exercises are removed by ON DELETE CASCADE
         db.session.delete(exercise)
         db.session.commit()
         
@@ -0,0 +1,57 @@
+from flask import Blueprint, request, jsonify
+from extensions import db
+from models import Exercise, Workout
+from pagination import keyset_paginate, pagination_headers
+from http_cache import conditional
+import fulltext
+from serializers import exercise_serializer, workout_serializer
+
+search_bp = Blueprint('search', __name__)
+
+# GET /search - Full-text search over exercise names and categories and workout notes
+# Query params: q (every word matches as a prefix), type (exercise or workout), limit, cursor
+@search_bp.route('', methods=['GET'])
+@conditional('workouts', 'exercises')
+def search():
+    try:
+        words = fulltext.terms(request.args.get('q', ''))
+        if not words:
+            raise ValueError("q must contain at least one word")
+        
+        kind = request.args.get('type')
+        if kind is not None and kind not in fulltext.TYPES:
+            raise ValueError(f"type must be one of: {', '.join(fulltext.TYPES)}")
+        
+        # Page through the ranked (rank, type, id) keys, then load only that page's rows
+        matches = fulltext.matches(words, (kind,) if kind else fulltext.TYPES)
+        page, next_cursor = keyset_paginate(
+            db.session.query(matches),
+            [matches.c.rank, matches.c.type, matches.c.id],
+            {'limit': request.args.get('limit'), 'cursor': request.args.get('cursor')}
+        )
+        
+        exercise_ids = [row.id for row in page if row.type == 'exercise']
+        workout_ids = [row.id for row in page if row.type == 'workout']
+        found = {}
+        if exercise_ids:
+            for row in db.session.execute(
+                db.select(*exercise_serializer.columns).where(Exercise.id.in_(exercise_ids))
+            ):
+                found['exercise', row.id] = exercise_serializer.dump(row)
+        if workout_ids:
+            for row in db.session.execute(
+                db.select(*workout_serializer.columns).where(Workout.id.in_(workout_ids))
+            ):
+                found['workout', row.id] = workout_serializer.dump(row)
+        
+        # A stale index can still name rows deleted behind its back (until fulltext rebuild)
+        results = [
+            {"type": row.type, **found[row.type, row.id]}
+            for row in page if (row.type, row.id) in found
+        ]
+        
+        return jsonify(results), 200, pagination_headers(next_cursor)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
@@ -0,0 +1,67 @@
+from flask import Blueprint, request, jsonify
+from models import TrainingRollup, CategoryRollup
+from pagination import parse_date
+from rollups import CATEGORY_FIELDS, TRAINING_FIELDS, period_start
+from http_cache import conditional
+
+stats_bp = Blueprint('stats', __name__)
+
+def get_rollups(period):
+    """Read one period's rollups (and their per-category breakdown) for a date range"""
+    filters = [TrainingRollup.period == period, TrainingRollup.workout_count > 0]
+    category_filters = [CategoryRollup.period == period, CategoryRollup.exercise_count > 0]
+
+    start_date = request.args.get('start_date')
+    if start_date:
+        start = period_start(period, parse_date(start_date, 'start_date'))
+        filters.append(TrainingRollup.period_start >= start)
+        category_filters.append(CategoryRollup.period_start >= start)
+
+    end_date = request.args.get('end_date')
+    if end_date:
+        end = parse_date(end_date, 'end_date')
+        filters.append(TrainingRollup.period_start <= end)
+        category_filters.append(CategoryRollup.period_start <= end)
+
+    categories = {}
+    for rollup in CategoryRollup.query.filter(*category_filters):
+        categories.setdefault(rollup.period_start, {})[rollup.category] = {
+            field: getattr(rollup, field) for field in CATEGORY_FIELDS
+        }
+
+    date_key = 'day' if period == 'day' else 'week_start'
+    results = []
+    for rollup in TrainingRollup.query.filter(*filters).order_by(TrainingRollup.period_start):
+        iso_year, iso_week, _ = rollup.period_start.isocalendar()
+        results.append({
+            date_key: rollup.period_start.isoformat(),
+            "iso_year": iso_year,
+            "iso_week": iso_week,
+            **{field: getattr(rollup, field) for field in TRAINING_FIELDS},
+            "categories": categories.get(rollup.period_start, {})
+        })
+    return results
+
+# GET /stats/daily - Training totals per day, read from the rollup tables
+# Query params: start_date, end_date
+@stats_bp.route('/daily', methods=['GET'])
+@conditional('workouts', 'workout_exercises', 'exercises')
+def get_daily_stats():
+    try:
+        return jsonify(get_rollups('day')), 200
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+# GET /stats/weekly - Training totals per ISO week, read from the rollup tables
+# Query params: start_date, end_date
+@stats_bp.route('/weekly', methods=['GET'])
+@conditional('workouts', 'workout_exercises', 'exercises')
+def get_weekly_stats():
+    try:
+        return jsonify(get_rollups('week')), 200
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
@@ -1,44 +1,204 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, abort, current_app, request, jsonify, stream_with_context
+from marshmallow import ValidationError
+from sqlalchemy.orm.exc import StaleDataError
 from extensions import db
 from models import Workout, Exercise, WorkoutExercise
-from schemas.workout_schema import workout_schema, workouts_schema
+from schemas.workout_schema import workout_schema
 from schemas.workout_exercise_schema import workout_exercise_schema, workout_exercises_schema
-from schemas.exercise_schema import exercise_schema
+from schemas.bulk_workout_schema import bulk_workouts_schema
+from pagination import keyset_paginate, pagination_headers, parse_date
+import progression
+import rollups
+from http_cache import bump_versions, conditional
+from idempotency import idempotent
+from concurrency import STALE_MESSAGE, VersionConflict, check_version, etag_header
+from serializers import exercise_serializer, workout_exercise_serializer, workout_serializer
 
 workout_bp = Blueprint('workouts', __name__)
 
-# GET /workouts - List all workouts with basic info
+# Streaming export settings
+EXPORT_FORMATS = ['ndjson', 'json']
+EXPORT_BATCH_SIZE = 1000
+
+# Maximum number of workouts accepted by a single bulk request
+BULK_MAX_WORKOUTS = 5000
+
+# Maximum number of workouts returned by a single batch read
+BATCH_MAX_WORKOUTS = 200
+
+# GET /workouts - List workouts with basic info, one page at a time
+# Query params: limit, cursor, order (asc/desc), start_date, end_date
 @workout_bp.route('', methods=['GET'])
+@conditional('workouts')
 def get_workouts():
     try:
-        workouts = Workout.query.all()
-        # Use dump() instead of jsonify() for Marshmallow schemas
-        return jsonify(workouts_schema.dump(workouts)), 200
+        # Select plain column rows for the fast-path serializer
+        query = db.session.query(*workout_serializer.columns)
+        
+        # Filters are applied in SQL so only the requested page is loaded
+        start_date = request.args.get('start_date')
+        if start_date:
+            query = query.filter(Workout.date >= parse_date(start_date, 'start_date'))
+        
+        end_date = request.args.get('end_date')
+        if end_date:
+            query = query.filter(Workout.date <= parse_date(end_date, 'end_date'))
+        
+        workouts, next_cursor = keyset_paginate(query, [Workout.date, Workout.id], request.args)
+        
+        return jsonify(workout_serializer.dump_many(workouts)), 200, pagination_headers(next_cursor)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
-# GET /workouts/<id> - Show a single workout with its associated exercises and details
-@workout_bp.route('/<int:id>', methods=['GET'])
-def get_workout(id):
+# Detail rows hold the workout's columns, then the workout exercise's, then the exercise's
+detail_workout_exercise_serializer = workout_exercise_serializer.at(len(workout_serializer.columns))
+detail_exercise_serializer = exercise_serializer.at(
+    len(workout_serializer.columns) + len(workout_exercise_serializer.columns)
+)
+DETAIL_WORKOUT_ID = workout_serializer.names.index('id')
+
+def detail_rows():
+    """Select each workout joined with its workout exercises and their exercises"""
+    return db.select(
+        *workout_serializer.columns,
+        *workout_exercise_serializer.columns,
+        *exercise_serializer.columns
+    ).select_from(Workout).outerjoin(
+        WorkoutExercise, WorkoutExercise.workout_id == Workout.id
+    ).outerjoin(
+        Exercise, Exercise.id == WorkoutExercise.exercise_id
+    )
+
+def exercise_details(row):
+    """Merge a detail row's exercise and per-workout details into one dict"""
+    exercise_data = detail_exercise_serializer.dump(row)
+    we_data = detail_workout_exercise_serializer.dump(row)
+    return {
+        **exercise_data,
+        **we_data,
+        "exercise_name": exercise_data['name']  # Add exercise name for convenience
+    }
+
+def group_detail_rows(rows):
+    """Yield one workout dict with its exercises per run of rows sharing a workout"""
+    workout_data, current_id = None, None
+    for row in rows:
+        if row[DETAIL_WORKOUT_ID] != current_id:
+            if workout_data is not None:
+                yield workout_data
+            workout_data = {**workout_serializer.dump(row), 'exercises': []}
+            current_id = row[DETAIL_WORKOUT_ID]
+        exercise = exercise_details(row)
+        # Workouts without exercises come back from the outer join with NULLs
+        if exercise['id'] is not None:
+            workout_data['exercises'].append(exercise)
+    if workout_data is not None:
+        yield workout_data
+
+# GET /workouts/export - Stream the full workout history with exercise details
+# Query params: format (ndjson or json)
+@workout_bp.route('/export', methods=['GET'])
+@conditional('workouts', 'workout_exercises', 'exercises')
+def export_workouts():
+    export_format = request.args.get('format', 'ndjson')
+    if export_format not in EXPORT_FORMATS:
+        return jsonify({"error": f"format must be one of: {', '.join(EXPORT_FORMATS)}"}), 400
+    
+    # Rows arrive ordered by workout, so each workout's exercises are consecutive
+    statement = detail_rows().order_by(
+        Workout.date, Workout.id, WorkoutExercise.id
+    ).execution_options(yield_per=EXPORT_BATCH_SIZE)
+    
+    def generate_ndjson():
+        for workout_data in group_detail_rows(db.session.execute(statement)):
+            yield current_app.json.dumps(workout_data) + '\n'
+    
+    def generate_json():
+        yield '['
+        for i, workout_data in enumerate(group_detail_rows(db.session.execute(statement))):
+            yield (',' if i else '') + current_app.json.dumps(workout_data)
+        yield ']'
+    
+    if export_format == 'ndjson':
+        return Response(stream_with_context(generate_ndjson()), mimetype='application/x-ndjson')
+    return Response(stream_with_context(generate_json()), mimetype='application/json')
+
+def parse_ids(value):
     try:
-        workout = Workout.query.get_or_404(id)
+        ids = [int(part) for part in value.split(',') if part.strip()]
+    except ValueError:
+        raise ValueError("ids must be a comma-separated list of integers")
+    if not ids:
+        raise ValueError("ids must be a comma-separated list of integers")
+    # Keep the requested order, dropping repeats
+    return list(dict.fromkeys(ids))
+
+# GET /workouts/batch - Many workouts with their exercises, each exactly as GET /workouts/<id> returns it
+# Query params: ids (comma-separated, returned in that order), or start_date and end_date (returned by date)
+@workout_bp.route('/batch', methods=['GET'])
+@conditional('workouts', 'workout_exercises', 'exercises')
+def get_workouts_batch():
+    try:
+        ids = request.args.get('ids')
+        start_date = request.args.get('start_date')
+        end_date = request.args.get('end_date')
         
-        # Get workout exercises with exercise details
-        workout_exercises = WorkoutExercise.query.filter_by(workout_id=id).all()
-        exercises_with_details = []
+        if ids is not None:
+            if start_date or end_date:
+                raise ValueError("Pass either ids or start_date and end_date, not both")
+            ids = parse_ids(ids)
+            if len(ids) > BATCH_MAX_WORKOUTS:
+                raise ValueError(f"Cannot read more than {BATCH_MAX_WORKOUTS} workouts per request")
+            selected = Workout.id.in_(ids)
+            ordering = [Workout.id]
+        elif start_date and end_date:
+            # One row past the limit tells an over-wide range apart from a full one
+            in_range = db.select(Workout.id).where(
+                Workout.date >= parse_date(start_date, 'start_date'),
+                Workout.date <= parse_date(end_date, 'end_date')
+            ).order_by(Workout.date, Workout.id).limit(BATCH_MAX_WORKOUTS + 1)
+            selected = Workout.id.in_(in_range)
+            ordering = [Workout.date, Workout.id]
+        else:
+            raise ValueError("Pass ids, or start_date and end_date")
         
-        for we in workout_exercises:
-            exercise = Exercise.query.get(we.exercise_id)
-            exercise_data = exercise_schema.dump(exercise)
-            we_data = workout_exercise_schema.dump(we)
-            exercises_with_details.append({
-                **exercise_data,
-                **we_data,
-                "exercise_name": exercise.name  # Add exercise name for convenience
-            })
+        # Every workout, workout exercise and exercise in one query, grouped in memory
+        rows = db.session.execute(
+            detail_rows().where(selected).order_by(*ordering, WorkoutExercise.id)
+        )
+        workouts = list(group_detail_rows(rows))
         
-        workout_data = workout_schema.dump(workout)
-        workout_data['exercises'] = exercises_with_details
+        if ids is None:
+            if len(workouts) > BATCH_MAX_WORKOUTS:
+                raise ValueError(
+                    f"More than {BATCH_MAX_WORKOUTS} workouts in this date range; request a shorter range"
+                )
+            return jsonify({"workouts": workouts}), 200
+        
+        by_id = {workout_data['id']: workout_data for workout_data in workouts}
+        return jsonify({
+            "workouts": [by_id[workout_id] for workout_id in ids if workout_id in by_id],
+            "missing_ids": [workout_id for workout_id in ids if workout_id not in by_id]
+        }), 200
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+# GET /workouts/<id> - Show a single workout with its associated exercises and details
+@workout_bp.route('/<int:id>', methods=['GET'])
+@conditional('workouts', 'workout_exercises', 'exercises')
+def get_workout(id):
+    try:
+        # Load the workout, its workout exercises and their exercises in a single query
+        rows = db.session.execute(
+            detail_rows().where(Workout.id == id).order_by(WorkoutExercise.id)
+        )
+        workout_data = next(group_detail_rows(rows), None)
+        if workout_data is None:
+            abort(404)
         
         return jsonify(workout_data), 200
     except Exception as e:
@@ -46,6 +206,7 @@ def get_workout(id):
 
 # POST /workouts - Create a workout
 @workout_bp.route('', methods=['POST'])
+@idempotent
 def create_workout():
     try:
         data = request.get_json()
@@ -63,15 +224,118 @@ def create_workout():
         db.session.rollback()
         return jsonify({"error": str(e)}), 400
 
+# POST /workouts/bulk - Create many workouts with nested exercises in one transaction
+# Body: a list of workouts, each with an optional "exercises" list of
+# {exercise_id, reps, sets, duration_seconds}. Invalid items are reported by index
+# and skipped; valid items are inserted together.
+@workout_bp.route('/bulk', methods=['POST'])
+@idempotent
+def bulk_create_workouts():
+    try:
+        data = request.get_json()
+        
+        if not isinstance(data, list):
+            return jsonify({"error": "Request body must be a list of workouts"}), 400
+        if len(data) > BULK_MAX_WORKOUTS:
+            return jsonify({"error": f"Cannot create more than {BULK_MAX_WORKOUTS} workouts per request"}), 400
+        
+        # Validate every item in one pass, keeping per-item errors
+        try:
+            loaded = bulk_workouts_schema.load(data)
+            errors = {}
+        except ValidationError as e:
+            loaded = e.valid_data
+            errors = e.messages
+        
+        # Resolve every referenced exercise with a single IN query
+        exercise_ids = {
+            entry['exercise_id']
+            for index, item in enumerate(loaded) if index not in errors
+            for entry in item['exercises']
+        }
+        existing_ids = set(db.session.scalars(
+            db.select(Exercise.id).where(Exercise.id.in_(exercise_ids))
+        )) if exercise_ids else set()
+        
+        valid = []
+        for index, item in enumerate(loaded):
+            if index in errors:
+                continue
+            item_ids = [entry['exercise_id'] for entry in item['exercises']]
+            missing = sorted(set(item_ids) - existing_ids)
+            if missing:
+                errors[index] = {"exercises": [f"Exercise not found: {', '.join(map(str, missing))}"]}
+            elif len(item_ids) != len(set(item_ids)):
+                errors[index] = {"exercises": ["Exercise already exists in this workout"]}
+            else:
+                valid.append((index, item))
+        
+        created = []
+        if valid:
+            # Insert into the tables directly so every row shares one executemany batch
+            # (ORM bulk inserts regroup rows by which values are NULL). On SQLite new primary
+            # keys ascend in VALUES order, so sorting the returned ids lines them up with the
+            # input, while sort_by_parameter_order would fall back to one INSERT per row.
+            # Other databases don't promise RETURNING order, so have SQLAlchemy restore it.
+            in_values_order = db.session.connection().dialect.name == 'sqlite'
+            workout_ids = db.session.scalars(
+                db.insert(Workout.__table__).returning(
+                    Workout.__table__.c.id, sort_by_parameter_order=not in_values_order
+                ),
+                [
+                    {
+                        'date': item['date'],
+                        'duration_minutes': item['duration_minutes'],
+                        'notes': item.get('notes')
+                    }
+                    for _, item in valid
+                ]
+            ).all()
+            if in_values_order:
+                workout_ids.sort()
+            
+            workout_exercise_rows = [
+                {
+                    'workout_id': workout_id,
+                    'exercise_id': entry['exercise_id'],
+                    'reps': entry.get('reps'),
+                    'sets': entry.get('sets'),
+                    'duration_seconds': entry.get('duration_seconds')
+                }
+                for (_, item), workout_id in zip(valid, workout_ids)
+                for entry in item['exercises']
+            ]
+            if workout_exercise_rows:
+                db.session.execute(db.insert(WorkoutExercise.__table__), workout_exercise_rows)
+            
+            # Table-level inserts bypass the ORM listeners, so update the rollups
+            # progression series and resource versions directly
+            rollups.add_workouts(db.session.connection(), workout_ids)
+            progression.add_workouts(db.session.connection(), workout_ids)
+            bump_versions(db.session, ['workouts', 'workout_exercises'])
+            
+            db.session.commit()
+            created = [
+                {"index": index, "id": workout_id}
+                for (index, _), workout_id in zip(valid, workout_ids)
+            ]
+        
+        status = 201 if not errors else (207 if created else 400)
+        return jsonify({
+            "created": created,
+            "errors": [{"index": index, "errors": errors[index]} for index in sorted(errors)]
+        }), status
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"error": str(e)}), 400
+
 # DELETE /workouts/<id> - Delete a workout and associated workout exercises
 @workout_bp.route('/<int:id>', methods=['DELETE'])
 def delete_workout(id):
     try:
         workout = Workout.query.get_or_404(id)
         
-        # Delete associated workout exercises (cascade delete)
-        WorkoutExercise.query.filter_by(workout_id=id).delete()
-        
+        # Associated workout exercises are removed by ON DELETE CASCADE
         db.session.delete(workout)
         db.session.commit()
         
@@ -83,6 +347,7 @@ def delete_workout(id):
 # POST /workouts/<workout_id>/exercises/<exercise_id>/workout_exercises
 # Add an exercise to a workout, including reps/sets/duration
 @workout_bp.route('/<int:workout_id>/exercises/<int:exercise_id>/workout_exercises', methods=['POST'])
+@idempotent
 def add_exercise_to_workout(workout_id, exercise_id):
     try:
         # Check if workout and exercise exist
@@ -117,6 +382,7 @@ def add_exercise_to_workout(workout_id, exercise_id):
 
 # PUT /workouts/<workout_id>/exercises/<exercise_id>/workout_exercises
 # Update an exercise in a workout
+# Headers: If-Match with the ETag from the last update, or "workout_exercises-<id>-<version>" (optional; 409 if it has changed since)
 @workout_bp.route('/<int:workout_id>/exercises/<int:exercise_id>/workout_exercises', methods=['PUT'])
 def update_exercise_in_workout(workout_id, exercise_id):
     try:
@@ -124,6 +390,7 @@ def update_exercise_in_workout(workout_id, exercise_id):
             workout_id=workout_id, 
             exercise_id=exercise_id
         ).first_or_404()
+        check_version(workout_exercise)
         
         data = request.get_json()
         
@@ -136,7 +403,12 @@ def update_exercise_in_workout(workout_id, exercise_id):
         db.session.commit()
         
         # Use dump() instead of jsonify()
-        return jsonify(workout_exercise_schema.dump(workout_exercise)), 200
+        return jsonify(workout_exercise_schema.dump(workout_exercise)), 200, etag_header(workout_exercise)
+    except VersionConflict as e:
+        return jsonify({"error": str(e), "version": e.current}), 409, e.headers
+    except StaleDataError:
+        db.session.rollback()
+        return jsonify({"error": STALE_MESSAGE}), 409
     except Exception as e:
         db.session.rollback()
         return jsonify({"error": str(e)}), 400
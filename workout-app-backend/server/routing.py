@@ -0,0 +1,60 @@
+"""
+Read/write routing between the primary database and a read replica.
+
+With DATABASE_REPLICA_URL set, GET and HEAD requests read from the replica
+engine and every other method uses the primary. A client that has just written
+gets a short-lived cookie that keeps its reads on the primary, so it sees its
+own writes even while the replica lags behind.
+"""
+
+import time
+
+from flask import current_app, request
+from sqlalchemy import create_engine
+
+import database
+from extensions import db
+
+READ_METHODS = ('GET', 'HEAD')
+STICKY_COOKIE = 'read_primary_until'
+
+
+def _sticky(now):
+    try:
+        return float(request.cookies.get(STICKY_COOKIE, 0)) > now
+    except ValueError:
+        return False
+
+
+def init_app(app):
+    """
+    Create the replica engine as app.extensions['read_replica'] and register
+    the routing hooks. It is kept out of SQLALCHEMY_BINDS because no model
+    lives only on the replica; it mirrors the primary's tables.
+    """
+    replica_url = app.config.get('DATABASE_REPLICA_URL')
+    if not replica_url:
+        return
+    replica = create_engine(replica_url, **database.engine_options({
+        **app.config, 'SQLALCHEMY_DATABASE_URI': replica_url
+    }))
+    if replica.dialect.name == 'sqlite':
+        database.configure_sqlite(replica, app.config)
+    app.extensions['read_replica'] = replica
+
+    @app.before_request
+    def route_reads_to_replica():
+        if request.method in READ_METHODS and not _sticky(time.time()):
+            db.session.info['read_replica'] = True
+
+    @app.after_request
+    def stick_to_primary_after_writes(response):
+        sticky_seconds = current_app.config.get('REPLICA_STICKY_SECONDS', 5)
+        if request.method not in READ_METHODS and response.status_code < 400 and sticky_seconds:
+            until = time.time() + sticky_seconds
+            response.set_cookie(STICKY_COOKIE, f'{until:.3f}', max_age=sticky_seconds, httponly=True, samesite='Lax')
+        return response
+
+    @app.teardown_request
+    def reset_routing(exc):
+        db.session.info.pop('read_replica', None)
@@ -0,0 +1,13 @@
+from marshmallow import fields
+from .workout_schema import WorkoutSchema
+from .workout_exercise_schema import WorkoutExerciseSchema
+
+class BulkWorkoutSchema(WorkoutSchema):
+    # Exercises are nested under their workout, so workout_id is assigned on insert
+    exercises = fields.List(
+        fields.Nested(WorkoutExerciseSchema(exclude=('workout_id',))),
+        load_default=list
+    )
+
+# Create schema instances
+bulk_workouts_schema = BulkWorkoutSchema(many=True)
@@ -7,6 +7,7 @@ class ExerciseSchema(Schema):
     equipment_needed = fields.Bool(load_default=False)
     created_at = fields.DateTime(dump_only=True)
     updated_at = fields.DateTime(dump_only=True)
+    version = fields.Int(dump_only=True)
     
     # Schema validations
     @validates('category')
@@ -9,6 +9,7 @@ class WorkoutExerciseSchema(Schema):
     duration_seconds = fields.Int(validate=validate.Range(min=1, max=36000))
     created_at = fields.DateTime(dump_only=True)
     updated_at = fields.DateTime(dump_only=True)
+    version = fields.Int(dump_only=True)
     
     # Schema validations
     @validates('reps')
@@ -8,6 +8,7 @@ class WorkoutSchema(Schema):
     notes = fields.Str(validate=validate.Length(max=1000))
     created_at = fields.DateTime(dump_only=True)
     updated_at = fields.DateTime(dump_only=True)
+    version = fields.Int(dump_only=True)
     
     # Schema validations
     @validates('date')
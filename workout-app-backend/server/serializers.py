@@ -0,0 +1,71 @@
+"""
+Fast-path serializers for list and detail endpoints.
+
+Each RowSerializer is compiled once from a marshmallow schema into a plain
+function that reads column values straight out of a Core Row by position,
+skipping ORM object loading and per-field marshmallow dispatch. The output
+matches schema.dump() for the same data.
+"""
+
+from marshmallow import fields
+
+from models import Exercise, Workout, WorkoutExercise
+from schemas.exercise_schema import ExerciseSchema
+from schemas.workout_schema import WorkoutSchema
+from schemas.workout_exercise_schema import WorkoutExerciseSchema
+
+
+def _bool(value):
+    return None if value is None else bool(value)
+
+
+def _value_expression(field, index):
+    """Python expression reproducing field._serialize() for row[index]"""
+    value = f'row[{index}]'
+    if isinstance(field, (fields.Date, fields.DateTime)):
+        if field.format not in (None, 'iso'):
+            raise TypeError(f"Unsupported {type(field).__name__} format: {field.format}")
+        return f'(None if {value} is None else {value}.isoformat())'
+    if isinstance(field, fields.Boolean):
+        return f'_bool({value})'
+    if isinstance(field, fields.Integer) and not field.as_string:
+        return f'(None if {value} is None else int({value}))'
+    if isinstance(field, fields.String):
+        return f'(None if {value} is None else str({value}))'
+    raise TypeError(f"Unsupported field type: {type(field).__name__}")
+
+
+class RowSerializer:
+    """Serialize rows selecting self.columns exactly as the schema would dump the model"""
+
+    def __init__(self, schema, model, offset=0):
+        self.schema = schema
+        self.model = model
+        self.offset = offset
+        self.names = list(schema.dump_fields)
+        self.columns = [
+            getattr(model, field.attribute or name) for name, field in schema.dump_fields.items()
+        ]
+
+        entries = ''.join(
+            f'        {name!r}: {_value_expression(field, offset + i)},\n'
+            for i, (name, field) in enumerate(schema.dump_fields.items())
+        )
+        source = f'def dump(row):\n    return {{\n{entries}    }}\n'
+        namespace = {'_bool': _bool}
+        exec(compile(source, f'<{type(schema).__name__} serializer>', 'exec'), namespace)
+        self.dump = namespace['dump']
+
+    def at(self, offset):
+        """The same serializer reading its columns starting at position offset of a wider row"""
+        return RowSerializer(self.schema, self.model, offset)
+
+    def dump_many(self, rows):
+        dump = self.dump
+        return [dump(row) for row in rows]
+
+
+# Compiled serializers
+workout_serializer = RowSerializer(WorkoutSchema(), Workout)
+exercise_serializer = RowSerializer(ExerciseSchema(), Exercise)
+workout_exercise_serializer = RowSerializer(WorkoutExerciseSchema(), WorkoutExercise)
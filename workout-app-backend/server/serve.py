@@ -0,0 +1,129 @@
+"""
+Production WSGI server: gunicorn with the app preloaded.
+
+create_app runs once in the master process and workers are forked from it,
+so imports, model mapping and serializer compilation are not repeated per
+worker. Each worker drops the database connections it inherited and opens
+its own. SIGHUP replaces the workers gracefully with a freshly created app;
+in-flight requests finish first.
+"""
+
+import multiprocessing
+import os
+import time
+
+try:
+    from gunicorn.app.base import BaseApplication
+except ImportError:
+    BaseApplication = None
+
+from app import create_app
+from extensions import db
+
+STARTED = time.perf_counter()
+
+
+def default_workers():
+    """WEB_CONCURRENCY, or gunicorn's recommended 2 * CPUs + 1"""
+    return int(os.environ.get('WEB_CONCURRENCY') or multiprocessing.cpu_count() * 2 + 1)
+
+
+def default_threads():
+    """THREADS per worker; requests mostly wait on the database, so a few threads help"""
+    return int(os.environ.get('THREADS') or 4)
+
+
+def dispose_engines(app):
+    """Forget pooled connections inherited from the master without closing them under it"""
+    with app.app_context():
+        engines = list(db.engines.values())
+    replica = app.extensions.get('read_replica')
+    if replica is not None:
+        engines.append(replica)
+    for engine in engines:
+        engine.dispose(close=False)
+
+
+def _elapsed_ms(start):
+    return (time.perf_counter() - start) * 1000
+
+
+if BaseApplication is not None:
+    class Server(BaseApplication):
+        def __init__(self, options, test_config=None):
+            self.options = options
+            self.test_config = test_config
+            self.load_ms = None
+            super().__init__()
+
+        def load_config(self):
+            for key, value in self.options.items():
+                self.cfg.set(key, value)
+            self.cfg.set('preload_app', True)
+            self.cfg.set('when_ready', self.when_ready)
+            self.cfg.set('on_reload', self.on_reload)
+            self.cfg.set('post_fork', self.post_fork)
+            self.cfg.set('post_worker_init', self.post_worker_init)
+
+        def load(self):
+            start = time.perf_counter()
+            app = create_app(self.test_config)
+            # Idempotency-Key leases are sized from it (see idempotency.py)
+            app.config['REQUEST_TIMEOUT'] = self.cfg.timeout
+            self.load_ms = _elapsed_ms(start)
+            return app
+
+        def reload(self):
+            # Let the arbiter build a new app for the replacement workers
+            self.callable = None
+            super().reload()
+
+        def when_ready(self, server):
+            server.log.info(
+                "App loaded in %.1f ms, ready %.1f ms after start (%s workers x %s threads)",
+                self.load_ms, _elapsed_ms(STARTED), self.cfg.workers, self.cfg.threads
+            )
+
+        def on_reload(self, server):
+            server.log.info("App reloaded in %.1f ms", self.load_ms)
+
+        def post_fork(self, server, worker):
+            worker.forked_at = time.perf_counter()
+            dispose_engines(self.callable)
+
+        def post_worker_init(self, worker):
+            worker.log.info("Worker %s booted in %.1f ms", worker.pid, _elapsed_ms(worker.forked_at))
+
+
+def add_arguments(parser):
+    parser.add_argument('--bind', default=os.environ.get('BIND', '127.0.0.1:5555'),
+                        help="Address to listen on (default: BIND or 127.0.0.1:5555)")
+    parser.add_argument('--workers', type=int, default=default_workers(),
+                        help="Worker processes (default: WEB_CONCURRENCY or 2 * CPUs + 1)")
+    parser.add_argument('--threads', type=int, default=default_threads(),
+                        help="Threads per worker (default: THREADS or 4)")
+    parser.add_argument('--timeout', type=int, default=30,
+                        help="Seconds before a silent worker is killed and restarted")
+    parser.add_argument('--graceful-timeout', type=int, default=30,
+                        help="Seconds workers get to finish requests on reload or shutdown")
+    parser.add_argument('--max-requests', type=int, default=0,
+                        help="Restart a worker after this many requests (0 disables)")
+
+
+def options_from_args(args):
+    return {
+        'bind': args.bind,
+        'workers': args.workers,
+        'threads': args.threads,
+        'worker_class': 'gthread' if args.threads > 1 else 'sync',
+        'timeout': args.timeout,
+        'graceful_timeout': args.graceful_timeout,
+        'max_requests': args.max_requests,
+        'max_requests_jitter': args.max_requests // 10,
+    }
+
+
+def serve(args):
+    if BaseApplication is None:
+        raise SystemExit("python -m server serve needs gunicorn (pipenv install)")
+    Server(options_from_args(args)).run()
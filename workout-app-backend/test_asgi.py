@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+
+import asyncio
+import json
+
+import pytest
+
+pytest.importorskip('aiosqlite')
+
+from asgi import AsgiApp, async_url
+from app import create_app
+from extensions import db
+
+
+@pytest.fixture
+def asgi_app(tmp_path):
+    flask_app = create_app({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'workouts.db'}",
+        'RESPONSE_CACHE_BACKEND': None,
+    })
+    with flask_app.app_context():
+        db.create_all()
+    return AsgiApp(flask_app)
+
+
+async def call(app, method, path, body=None):
+    """Send one request through the ASGI interface and collect the response"""
+    query_string = b''
+    if '?' in path:
+        path, query = path.split('?', 1)
+        query_string = query.encode('ascii')
+    payload = json.dumps(body).encode('utf-8') if body is not None else b''
+    scope = {
+        'type': 'http', 'method': method, 'path': path, 'query_string': query_string,
+        'headers': [(b'content-type', b'application/json'), (b'content-length', str(len(payload)).encode())],
+    }
+    messages = [{'type': 'http.request', 'body': payload, 'more_body': False}]
+    sent = []
+    
+    async def receive():
+        return messages.pop(0)
+    
+    async def send(message):
+        sent.append(message)
+    
+    await app(scope, receive, send)
+    status = sent[0]['status']
+    data = b''.join(message.get('body', b'') for message in sent[1:])
+    return status, json.loads(data) if data else None
+
+
+def test_async_url_swaps_in_async_drivers():
+    assert str(async_url('sqlite:////tmp/workouts.db')) == 'sqlite+aiosqlite:////tmp/workouts.db'
+    assert str(async_url('postgresql://app@db/workouts')) == 'postgresql+asyncpg://app@db/workouts'
+    with pytest.raises(ValueError):
+        async_url('sqlite://')
+
+
+def test_handlers_run_on_the_async_engine(asgi_app):
+    async def scenario():
+        status, exercise = await call(asgi_app, 'POST', '/exercises', {'name': 'Squat', 'category': 'strength'})
+        assert status == 201
+        status, workout = await call(asgi_app, 'POST', '/workouts', {'date': '2024-01-15', 'duration_minutes': 40})
+        assert status == 201
+        status, _ = await call(asgi_app, 'POST', f"/workouts/{workout['id']}/exercises/{exercise['id']}/workout_exercises",
+                               {'reps': 5, 'sets': 5})
+        assert status == 201
+        
+        # Concurrent reads share the loop
+        results = await asyncio.gather(*[
+            call(asgi_app, 'GET', f"/workouts/{workout['id']}") for _ in range(20)
+        ])
+        assert {status for status, _ in results} == {200}
+        assert results[0][1]['exercises'][0]['exercise_name'] == 'Squat'
+        
+        engine = asgi_app.engines()['primary']
+        assert engine.dialect.driver == 'aiosqlite'
+        assert engine.sync_engine.pool.checkedin() > 0
+        
+        # Foreign keys are enforced on the async connections too
+        status, _ = await call(asgi_app, 'DELETE', f"/exercises/{exercise['id']}")
+        assert status == 200
+        status, detail = await call(asgi_app, 'GET', f"/workouts/{workout['id']}")
+        assert detail['exercises'] == []
+        
+        await asgi_app.dispose()
+    
+    asyncio.run(scenario())
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+
+from extensions import db
+from models import Exercise, Workout, WorkoutExercise
+
+
+def seed_exercises(app):
+    with app.app_context():
+        db.session.add_all([
+            Exercise(name="Push-ups", category="strength"),
+            Exercise(name="Plank", category="core"),
+        ])
+        db.session.commit()
+
+
+def test_bulk_create_inserts_workouts_and_exercises(app, client, count_queries):
+    seed_exercises(app)
+    payload = [
+        {
+            "date": "2024-01-15",
+            "duration_minutes": 45,
+            "notes": f"Session {i}",
+            "exercises": [
+                {"exercise_id": 1, "reps": 15, "sets": 3},
+                {"exercise_id": 2, "duration_seconds": 60},
+            ]
+        }
+        for i in range(50)
+    ]
+    
+    with count_queries() as statements:
+        response = client.post('/workouts/bulk', json=payload)
+    
+    assert response.status_code == 201
+    data = response.get_json()
+    assert data['errors'] == []
+    assert [c['index'] for c in data['created']] == list(range(50))
+    # One exercise lookup, one insert per table, two aggregate reads and two
+    # upserts to fold the batch into the training rollups, one read and two
+    # upserts for the progression records and series, and one version bump
+    assert len(statements) == 11
+    
+    with app.app_context():
+        assert Workout.query.count() == 50
+        assert WorkoutExercise.query.count() == 100
+        workout = db.session.get(Workout, data['created'][7]['id'])
+        assert workout.notes == "Session 7"
+        assert len(workout.workout_exercises) == 2
+
+
+def test_bulk_create_reports_errors_per_item(app, client):
+    seed_exercises(app)
+    payload = [
+        {"date": "2024-01-15", "duration_minutes": 30},
+        {"date": "2024-01-15", "duration_minutes": 0},
+        {"date": "2024-01-16", "duration_minutes": 30, "exercises": [{"exercise_id": 99, "reps": 5, "sets": 1}]},
+        {"date": "2024-01-16", "duration_minutes": 30, "exercises": [{"exercise_id": 1}]},
+        {"date": "2024-01-17", "duration_minutes": 30, "exercises": [
+            {"exercise_id": 1, "reps": 5, "sets": 1},
+            {"exercise_id": 1, "reps": 8, "sets": 1},
+        ]},
+        {"date": "2024-01-18", "duration_minutes": 20, "exercises": [{"exercise_id": 2, "duration_seconds": 30}]},
+    ]
+    
+    response = client.post('/workouts/bulk', json=payload)
+    
+    assert response.status_code == 207
+    data = response.get_json()
+    assert [c['index'] for c in data['created']] == [0, 5]
+    assert [e['index'] for e in data['errors']] == [1, 2, 3, 4]
+    assert 'duration_minutes' in data['errors'][0]['errors']
+    assert "Exercise not found: 99" in data['errors'][1]['errors']['exercises']
+    
+    with app.app_context():
+        assert Workout.query.count() == 2
+        assert WorkoutExercise.query.count() == 1
+
+
+def test_bulk_create_rejects_non_list_and_all_invalid(client):
+    assert client.post('/workouts/bulk', json={"date": "2024-01-15"}).status_code == 400
+    
+    response = client.post('/workouts/bulk', json=[{"duration_minutes": 30}])
+    assert response.status_code == 400
+    assert response.get_json()['created'] == []
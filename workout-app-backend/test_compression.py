@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+
+import gzip
+import json
+import zlib
+from datetime import date, timedelta
+
+from extensions import db
+from models import Workout
+
+
+def add_workouts(app, count):
+    with app.app_context():
+        db.session.add_all([
+            Workout(date=date(2024, 1, 1) + timedelta(days=i), duration_minutes=30, notes="Easy run")
+            for i in range(count)
+        ])
+        db.session.commit()
+
+
+def test_gzip_is_negotiated_for_large_responses(app, client):
+    add_workouts(app, 50)
+    
+    response = client.get('/workouts', headers={'Accept-Encoding': 'gzip, deflate'})
+    
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in response.headers['Vary']
+    assert response.headers['Server-Timing'].startswith('compress;dur=')
+    body = gzip.decompress(response.get_data())
+    assert len(json.loads(body)) == 50
+    assert int(response.headers['Content-Length']) < len(body) / 4
+    
+    stats = app.extensions['compression'].stats()['gzip']
+    assert stats['responses'] == 1
+    assert stats['bytes_in'] == len(body)
+    assert stats['ratio'] > 4
+
+
+def test_client_quality_values_pick_the_encoding(app, client):
+    add_workouts(app, 50)
+    
+    response = client.get('/workouts', headers={'Accept-Encoding': 'gzip;q=0.5, deflate'})
+    
+    assert response.headers['Content-Encoding'] == 'deflate'
+    assert len(json.loads(zlib.decompress(response.get_data()))) == 50
+    
+    refused = client.get('/workouts', headers={'Accept-Encoding': 'gzip;q=0, identity'})
+    assert 'Content-Encoding' not in refused.headers
+
+
+def test_small_responses_are_sent_uncompressed(app, client):
+    add_workouts(app, 1)
+    
+    response = client.get('/workouts', headers={'Accept-Encoding': 'gzip'})
+    
+    assert 'Content-Encoding' not in response.headers
+    assert response.headers['Vary'] == 'Accept-Encoding'
+    assert len(response.get_json()) == 1
+
+
+def test_streamed_export_is_compressed(app, client):
+    add_workouts(app, 3)
+    
+    response = client.get('/workouts/export', headers={'Accept-Encoding': 'gzip'})
+    
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'Content-Length' not in response.headers
+    lines = gzip.decompress(response.get_data()).decode('utf-8').splitlines()
+    assert [json.loads(line)['id'] for line in lines] == [1, 2, 3]
+
+
+
+def test_streamed_export_arrives_in_pieces(app, client):
+    add_workouts(app, 3)
+    app.extensions['compression'].stream_flush_size = 1
+    
+    response = client.get('/workouts/export', headers={'Accept-Encoding': 'gzip'}, buffered=False)
+    decompressor = zlib.decompressobj(31)
+    # Each workout can be decoded as soon as its piece arrives, before the stream ends
+    pieces = [decompressor.decompress(piece) for piece in response.response]
+    response.close()
+    
+    assert [json.loads(piece)['id'] for piece in pieces if piece] == [1, 2, 3]
+
+
+def test_compressed_responses_revalidate_with_weak_etags(app, client):
+    add_workouts(app, 50)
+    
+    response = client.get('/workouts', headers={'Accept-Encoding': 'gzip'})
+    etag = response.headers['ETag']
+    
+    assert etag.startswith('W/')
+    revalidated = client.get('/workouts', headers={'Accept-Encoding': 'gzip', 'If-None-Match': etag})
+    assert revalidated.status_code == 304
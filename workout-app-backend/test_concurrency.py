@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+
+from sqlalchemy import event, update
+
+from extensions import db
+from models import Exercise, WorkoutExercise
+
+
+def create_entry(client):
+    client.post('/exercises', json={'name': 'Squat', 'category': 'strength'})
+    client.post('/workouts', json={'date': '2024-01-15', 'duration_minutes': 45})
+    client.post('/workouts/1/exercises/1/workout_exercises', json={'reps': 5, 'sets': 5})
+
+
+def test_second_device_editing_an_old_version_gets_a_conflict(app, client):
+    create_entry(client)
+    response = client.get('/exercises/1')
+    etag = response.headers['ETag']
+    assert response.get_json()['version'] == 1
+    
+    # Both devices echo the ETag they read; the first to write wins
+    first = client.put('/exercises/1', json={'category': 'core'}, headers={'If-Match': etag})
+    second = client.put('/exercises/1', json={'name': 'Back Squat'}, headers={'If-Match': etag})
+    
+    assert first.status_code == 200
+    assert first.get_json()['version'] == 2
+    assert first.headers['ETag'] == '"exercises-1-2"'
+    assert second.status_code == 409
+    assert second.get_json()['version'] == 2
+    assert second.headers['ETag'] == '"exercises-1-2"'
+    with app.app_context():
+        exercise = db.session.get(Exercise, 1)
+        assert (exercise.name, exercise.category, exercise.version) == ('Squat', 'core', 2)
+    
+    # Retrying with the ETag from the update, or a fresh GET, goes through
+    retry = client.put('/exercises/1', json={'name': 'Back Squat'}, headers={'If-Match': first.headers['ETag']})
+    assert retry.status_code == 200
+    assert retry.get_json()['version'] == 3
+    fresh = client.get('/exercises/1').headers['ETag']
+    assert client.put('/exercises/1', json={'name': 'Front Squat'}, headers={'If-Match': fresh}).status_code == 200
+
+
+def test_get_etag_still_revalidates(client):
+    create_entry(client)
+    etag = client.get('/exercises/1').headers['ETag']
+    
+    assert etag.startswith('"exercises-1-1.')
+    assert client.get('/exercises/1', headers={'If-None-Match': etag}).status_code == 304
+    client.put('/exercises/1', json={'category': 'core'})
+    assert client.get('/exercises/1', headers={'If-None-Match': etag}).status_code == 200
+
+
+def test_workout_exercise_updates_check_the_version(client):
+    create_entry(client)
+    path = '/workouts/1/exercises/1/workout_exercises'
+    
+    updated = client.put(path, json={'reps': 8, 'sets': 5}, headers={'If-Match': '"workout_exercises-1-1"'})
+    assert updated.get_json()['version'] == 2
+    stale = client.put(path, json={'reps': 3, 'sets': 5}, headers={'If-Match': '"workout_exercises-1-1"'})
+    assert stale.status_code == 409
+    assert client.get('/workouts/1').get_json()['exercises'][0]['reps'] == 8
+    # Compression weakens the ETag, which still matches
+    weak = {'If-Match': f"W/{updated.headers['ETag']}"}
+    assert client.put(path, json={'reps': 10, 'sets': 5}, headers=weak).status_code == 200
+    
+    # If-Match is optional, and * matches any version
+    assert client.put(path, json={'reps': 6, 'sets': 5}).get_json()['version'] == 4
+    assert client.put(path, json={'reps': 7, 'sets': 5}, headers={'If-Match': '*'}).get_json()['version'] == 5
+    # A tag that isn't this row's current version never matches
+    assert client.put(path, json={'reps': 7, 'sets': 5}, headers={'If-Match': '"5"'}).status_code == 409
+    assert client.put(path, json={'reps': 7, 'sets': 5}, headers={'If-Match': '"exercises-1-5"'}).status_code == 409
+
+
+def test_a_write_committed_after_the_read_is_not_overwritten(app, client):
+    create_entry(client)
+    
+    # Another writer bumps the row between the route loading it and flushing its update
+    def concurrent_write(session, flush_context, instances):
+        session.execute(
+            update(WorkoutExercise.__table__).values(version=WorkoutExercise.__table__.c.version + 1)
+        )
+    
+    event.listen(db.session, 'before_flush', concurrent_write, once=True)
+    try:
+        response = client.put('/workouts/1/exercises/1/workout_exercises', json={'reps': 9, 'sets': 5},
+                              headers={'If-Match': '"workout_exercises-1-1"'})
+    finally:
+        if event.contains(db.session, 'before_flush', concurrent_write):
+            event.remove(db.session, 'before_flush', concurrent_write)
+    
+    assert response.status_code == 409
+    assert 'modified by another request' in response.get_json()['error']
+    with app.app_context():
+        assert db.session.get(WorkoutExercise, 1).reps == 5
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+
+import pytest
+from sqlalchemy import create_mock_engine, text
+from sqlalchemy.exc import OperationalError
+
+from app import create_app
+from database import engine_options, insert_for, settings_from_env
+from extensions import db
+
+
+def test_settings_come_from_the_environment():
+    settings = settings_from_env({
+        'DATABASE_URL': 'postgres://app:secret@db/workouts',
+        'DB_POOL_SIZE': '20',
+        'DB_MAX_OVERFLOW': '5',
+        'DB_POOL_RECYCLE': '1800',
+        'DB_STATEMENT_TIMEOUT': '',
+    })
+    
+    assert settings == {
+        'SQLALCHEMY_DATABASE_URI': 'postgresql://app:secret@db/workouts',
+        'DB_POOL_SIZE': 20,
+        'DB_MAX_OVERFLOW': 5,
+        'DB_POOL_RECYCLE': 1800,
+    }
+    with pytest.raises(ValueError, match="DB_POOL_SIZE must be an integer"):
+        settings_from_env({'DB_POOL_SIZE': 'many'})
+
+
+def test_unsupported_databases_are_refused_at_startup():
+    with pytest.raises(ValueError, match="SQLALCHEMY_DATABASE_URI uses mysql; supported databases are sqlite, postgresql"):
+        create_app({'SQLALCHEMY_DATABASE_URI': 'mysql://app@db/workouts'})
+    with pytest.raises(ValueError, match="DATABASE_REPLICA_URL uses mssql"):
+        create_app({'SQLALCHEMY_DATABASE_URI': 'sqlite://', 'DATABASE_REPLICA_URL': 'mssql://app@db/workouts'})
+
+
+def test_insert_for_names_the_unsupported_backend():
+    with pytest.raises(ValueError, match="not supported on mysql"):
+        insert_for(create_mock_engine('mysql://', executor=None))
+
+
+def test_engine_options_for_postgresql():
+    options = engine_options({
+        'SQLALCHEMY_DATABASE_URI': 'postgresql://app@db/workouts',
+        'DB_POOL_SIZE': 20,
+        'DB_MAX_OVERFLOW': 5,
+        'DB_STATEMENT_TIMEOUT': 3000,
+    })
+    
+    assert options == {
+        'pool_size': 20,
+        'max_overflow': 5,
+        'pool_pre_ping': True,
+        'connect_args': {'options': '-c statement_timeout=3000'},
+    }
+    assert engine_options({'SQLALCHEMY_DATABASE_URI': 'sqlite://', 'DB_POOL_SIZE': 20}) == {}
+
+
+def test_sqlite_connections_are_tuned(tmp_path, monkeypatch):
+    monkeypatch.setenv('DATABASE_URL', f"sqlite:///{tmp_path / 'workouts.db'}")
+    monkeypatch.setenv('SQLITE_BUSY_TIMEOUT', '2500')
+    app = create_app({'TESTING': True})
+    
+    with app.app_context():
+        pragma = lambda name: db.session.execute(text(f'PRAGMA {name}')).scalar()
+        assert pragma('journal_mode') == 'wal'
+        assert pragma('synchronous') == 1  # NORMAL
+        assert pragma('busy_timeout') == 2500
+        assert pragma('cache_size') == -64000
+        assert pragma('foreign_keys') == 1
+
+
+def test_sqlite_statement_timeout_interrupts_long_queries():
+    app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite://', 'DB_STATEMENT_TIMEOUT': 50})
+    endless = text('WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n) SELECT count(*) FROM n')
+    
+    with app.app_context():
+        with pytest.raises(OperationalError, match="interrupted"):
+            db.session.execute(endless)
+        db.session.rollback()
+        assert db.session.execute(text('SELECT 1')).scalar() == 1
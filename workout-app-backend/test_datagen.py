@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+
+import random
+from datetime import date
+
+import datagen
+from extensions import db
+from models import Exercise, TrainingRollup, Workout, WorkoutExercise
+
+
+def test_generates_the_requested_history(app):
+    with app.app_context():
+        counts = datagen.generate(exercises=40, workout_exercises=3000, years=2,
+                                  end=date(2024, 6, 30), progress=None)
+        
+        assert counts['exercises'] == db.session.scalar(db.select(db.func.count(Exercise.id))) == 40
+        assert counts['workout_exercises'] == db.session.scalar(db.select(db.func.count(WorkoutExercise.id))) == 3000
+        assert counts['workouts'] == db.session.scalar(db.select(db.func.count(Workout.id)))
+        
+        first, last = db.session.execute(db.select(db.func.min(Workout.date), db.func.max(Workout.date))).one()
+        assert date(2022, 7, 1) <= first and last <= date(2024, 6, 30)
+        # Every entry satisfies the model's reps/sets or duration rule
+        assert db.session.scalar(db.select(db.func.count(WorkoutExercise.id)).where(
+            WorkoutExercise.duration_seconds.is_(None),
+            db.or_(WorkoutExercise.reps.is_(None), WorkoutExercise.sets.is_(None))
+        )) == 0
+        # The rollups were rebuilt for the bulk-loaded rows
+        assert db.session.scalar(
+            db.select(db.func.sum(TrainingRollup.exercise_count)).where(TrainingRollup.period == 'day')
+        ) == 3000
+
+
+def test_exercise_popularity_is_skewed(app):
+    with app.app_context():
+        datagen.generate(exercises=100, workout_exercises=5000, years=1, progress=None)
+        
+        uses = sorted(db.session.scalars(
+            db.select(db.func.count(WorkoutExercise.id)).group_by(WorkoutExercise.exercise_id)
+        ), reverse=True)
+        assert uses[0] > 10 * uses[len(uses) // 2]
+
+
+def test_exercise_counts_add_up_exactly():
+    counts = datagen.exercises_per_workout(1001, 15, random.Random(1))
+    
+    assert sum(counts) == 1001
+    assert all(1 <= count <= 15 for count in counts)
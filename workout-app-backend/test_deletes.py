@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+
+from datetime import date
+
+from extensions import db
+from models import Exercise, Workout, WorkoutExercise
+
+
+def seed(app):
+    with app.app_context():
+        push_ups = Exercise(name="Push-ups", category="strength")
+        plank = Exercise(name="Plank", category="core")
+        monday = Workout(date=date(2024, 1, 15), duration_minutes=45)
+        tuesday = Workout(date=date(2024, 1, 16), duration_minutes=30)
+        db.session.add_all([push_ups, plank, monday, tuesday])
+        db.session.flush()
+        
+        db.session.add_all([
+            WorkoutExercise(workout_id=monday.id, exercise_id=push_ups.id, reps=15, sets=3),
+            WorkoutExercise(workout_id=monday.id, exercise_id=plank.id, duration_seconds=60),
+            WorkoutExercise(workout_id=tuesday.id, exercise_id=plank.id, duration_seconds=90),
+        ])
+        db.session.commit()
+
+
+def test_delete_workout_cascades_to_workout_exercises(app, client):
+    seed(app)
+    
+    assert client.delete('/workouts/1').status_code == 200
+    
+    with app.app_context():
+        assert [(we.workout_id, we.exercise_id) for we in WorkoutExercise.query.all()] == [(2, 2)]
+        assert Exercise.query.count() == 2
+
+
+def test_delete_exercise_cascades_to_workout_exercises(app, client):
+    seed(app)
+    
+    assert client.delete('/exercises/2').status_code == 200
+    
+    with app.app_context():
+        assert [(we.workout_id, we.exercise_id) for we in WorkoutExercise.query.all()] == [(1, 1)]
+        assert Workout.query.count() == 2
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+
+from extensions import db
+from models import Exercise
+
+
+def test_assigning_a_name_does_not_query(app, count_queries):
+    with app.app_context():
+        with count_queries() as statements:
+            exercise = Exercise(name="Push-ups", category="strength")
+            exercise.name = "Pull-ups"
+        assert statements == []
+
+
+def test_duplicate_names_are_rejected_case_insensitively(client):
+    assert client.post('/exercises', json={"name": "Push-ups", "category": "strength"}).status_code == 201
+    
+    response = client.post('/exercises', json={"name": "PUSH-UPS", "category": "strength"})
+    assert response.status_code == 400
+    assert response.get_json()['error'] == "Exercise with this name already exists"
+    
+    # The failed insert must not leave the session unusable
+    assert client.post('/exercises', json={"name": "Plank", "category": "core"}).status_code == 201
+
+
+def test_update_to_duplicate_name_is_rejected(client):
+    client.post('/exercises', json={"name": "Push-ups", "category": "strength"})
+    client.post('/exercises', json={"name": "Plank", "category": "core"})
+    
+    response = client.put('/exercises/2', json={"name": "push-ups"})
+    assert response.status_code == 400
+    assert response.get_json()['error'] == "Exercise with this name already exists"
+    
+    # Renaming an exercise to a different case of its own name is allowed
+    response = client.put('/exercises/2', json={"name": "PLANK"})
+    assert response.status_code == 200
+    assert response.get_json()['name'] == "PLANK"
+
+
+def test_get_by_name_is_case_insensitive(app):
+    with app.app_context():
+        db.session.add(Exercise(name="Dumbbell Curls", category="strength"))
+        db.session.commit()
+        
+        assert Exercise.get_by_name("dumbbell curls").name == "Dumbbell Curls"
+        assert Exercise.get_by_name("Squats") is None
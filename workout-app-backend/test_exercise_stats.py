@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+
+from datetime import date
+
+from extensions import db
+from models import Exercise, Workout, WorkoutExercise
+
+
+def seed(app):
+    with app.app_context():
+        push_ups = Exercise(name="Push-ups", category="strength")
+        plank = Exercise(name="Plank", category="core")
+        yoga = Exercise(name="Yoga", category="flexibility")
+        january = Workout(date=date(2024, 1, 15), duration_minutes=45)
+        february = Workout(date=date(2024, 2, 15), duration_minutes=30)
+        db.session.add_all([push_ups, plank, yoga, january, february])
+        db.session.flush()
+        
+        db.session.add_all([
+            WorkoutExercise(workout_id=january.id, exercise_id=push_ups.id, reps=15, sets=3),
+            WorkoutExercise(workout_id=february.id, exercise_id=push_ups.id, reps=20, sets=2),
+            WorkoutExercise(workout_id=january.id, exercise_id=plank.id, duration_seconds=60),
+            WorkoutExercise(workout_id=february.id, exercise_id=plank.id, duration_seconds=90),
+        ])
+        db.session.commit()
+
+
+def test_stats_for_every_exercise_in_one_query(app, client, count_queries):
+    seed(app)
+    
+    with count_queries() as statements:
+        response = client.get('/exercises/stats')
+    
+    assert response.status_code == 200
+    # The ETag version lookup plus the grouped stats query
+    assert len(statements) == 2
+    stats = {s['name']: s for s in response.get_json()}
+    assert list(stats) == ["Plank", "Push-ups", "Yoga"]
+    assert stats["Push-ups"]["workout_count"] == 2
+    assert stats["Push-ups"]["total_reps"] == 35
+    assert stats["Push-ups"]["total_volume"] == 85
+    assert stats["Push-ups"]["last_performed"] == "2024-02-15"
+    assert stats["Plank"]["total_duration_seconds"] == 150
+    assert stats["Yoga"] == {
+        "exercise_id": 3, "name": "Yoga", "category": "flexibility", "workout_count": 0,
+        "total_reps": 0, "total_volume": 0, "total_duration_seconds": 0, "last_performed": None
+    }
+    
+    # Matches the per-exercise model methods
+    with app.app_context():
+        for exercise in Exercise.query.all():
+            assert stats[exercise.name]["workout_count"] == exercise.get_workout_count()
+            assert stats[exercise.name]["total_reps"] == exercise.get_total_reps()
+
+
+def test_stats_date_range(app, client):
+    seed(app)
+    
+    response = client.get('/exercises/stats?start_date=2024-02-01&end_date=2024-02-28')
+    stats = {s['name']: s for s in response.get_json()}
+    
+    assert stats["Push-ups"]["workout_count"] == 1
+    assert stats["Push-ups"]["total_volume"] == 40
+    assert stats["Plank"]["total_duration_seconds"] == 90
+    assert client.get('/exercises/stats?end_date=02-28').status_code == 400
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+
+from extensions import db
+from http_cache import get_versions
+from models import Exercise
+
+
+def test_conditional_get_returns_304_until_a_write(client, count_queries):
+    client.post('/exercises', json={"name": "Push-ups", "category": "strength"})
+    
+    first = client.get('/exercises')
+    etag = first.headers['ETag']
+    assert first.status_code == 200
+    assert first.headers['Cache-Control'] == 'private, no-cache'
+    
+    with count_queries() as statements:
+        cached = client.get('/exercises', headers={'If-None-Match': etag})
+    assert cached.status_code == 304
+    assert cached.get_data() == b''
+    assert cached.headers['ETag'] == etag
+    # Only the version lookup runs
+    assert len(statements) == 1
+    
+    client.post('/exercises', json={"name": "Plank", "category": "core"})
+    
+    changed = client.get('/exercises', headers={'If-None-Match': etag})
+    assert changed.status_code == 200
+    assert changed.headers['ETag'] != etag
+    assert len(changed.get_json()) == 2
+
+
+def test_etag_depends_on_url_and_related_tables(client):
+    client.post('/exercises', json={"name": "Push-ups", "category": "strength"})
+    client.post('/workouts', json={"date": "2024-01-15", "duration_minutes": 45})
+    
+    exercises_etag = client.get('/exercises').headers['ETag']
+    detail_etag = client.get('/workouts/1').headers['ETag']
+    assert client.get('/exercises?limit=1').headers['ETag'] != exercises_etag
+    
+    # Adding an exercise to a workout changes the detail view but not the exercise list
+    client.post('/workouts/1/exercises/1/workout_exercises', json={"reps": 10, "sets": 3})
+    assert client.get('/exercises', headers={'If-None-Match': exercises_etag}).status_code == 304
+    assert client.get('/workouts/1', headers={'If-None-Match': detail_etag}).status_code == 200
+    
+    # Deleting a workout cascades to its exercises, which invalidates the exercise detail
+    exercise_etag = client.get('/exercises/1').headers['ETag']
+    client.delete('/workouts/1')
+    assert client.get('/exercises/1', headers={'If-None-Match': exercise_etag}).status_code == 200
+
+
+def test_bulk_insert_bumps_versions(client):
+    etag = client.get('/workouts').headers['ETag']
+    client.post('/workouts/bulk', json=[{"date": "2024-01-15", "duration_minutes": 45}])
+    assert client.get('/workouts', headers={'If-None-Match': etag}).status_code == 200
+
+
+
+def test_versions_are_bumped_after_the_write_commits(app):
+    with app.app_context():
+        db.session.add(Exercise(name="Push-ups", category="strength"))
+        db.session.flush()
+        # The write transaction never touches the shared version row
+        assert get_versions(['exercises']) == [0]
+        db.session.commit()
+        assert get_versions(['exercises']) == [1]
+        
+        db.session.add(Exercise(name="Plank", category="core"))
+        db.session.flush()
+        db.session.rollback()
+        assert get_versions(['exercises']) == [1]
+
+
+def test_errors_are_not_tagged(client):
+    response = client.get('/workouts/999')
+    assert response.status_code == 404
+    assert 'ETag' not in response.headers
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+
+from datetime import datetime, timedelta
+
+import pytest
+from flask import g, make_response
+
+import idempotency
+from extensions import db
+from models import IdempotencyKey, Workout, WorkoutExercise
+
+WORKOUT = {'date': '2024-01-15', 'duration_minutes': 45, 'notes': 'Retried'}
+
+
+def post(client, path, body, key):
+    return client.post(path, json=body, headers={'Idempotency-Key': key})
+
+
+def test_retry_replays_the_first_response(app, client, count_queries):
+    first = post(client, '/workouts', WORKOUT, 'workout-1')
+    with count_queries() as statements:
+        retry = post(client, '/workouts', WORKOUT, 'workout-1')
+    
+    assert first.status_code == retry.status_code == 201
+    assert retry.get_json() == first.get_json()
+    assert retry.headers['Idempotent-Replayed'] == 'true'
+    assert 'Idempotent-Replayed' not in first.headers
+    # Claiming the key fails and the stored response is read back; the handler never runs
+    assert len(statements) == 2
+    assert not any('INSERT INTO workouts' in statement for statement in statements)
+    with app.app_context():
+        assert Workout.query.count() == 1
+    
+    # A new key is a new request
+    assert post(client, '/workouts', WORKOUT, 'workout-2').get_json()['id'] == 2
+
+
+def test_retried_workout_exercise_does_not_hit_the_unique_constraint(app, client):
+    client.post('/exercises', json={'name': 'Squat', 'category': 'strength'})
+    client.post('/workouts', json=WORKOUT)
+    path = '/workouts/1/exercises/1/workout_exercises'
+    
+    first = post(client, path, {'reps': 5, 'sets': 5}, 'entry-1')
+    retry = post(client, path, {'reps': 5, 'sets': 5}, 'entry-1')
+    
+    assert first.status_code == retry.status_code == 201
+    assert retry.get_json() == first.get_json()
+    # Without a key the same request is a duplicate
+    assert client.post(path, json={'reps': 5, 'sets': 5}).status_code == 400
+    with app.app_context():
+        assert WorkoutExercise.query.count() == 1
+
+
+def test_errors_release_the_key_and_keys_are_checked(app, client):
+    invalid = post(client, '/workouts', {'date': '2024-01-15'}, 'workout-1')
+    assert invalid.status_code == 400
+    with app.app_context():
+        assert db.session.get(IdempotencyKey, 'workout-1') is None
+    
+    # Nothing was written, so the corrected retry runs
+    assert post(client, '/workouts', WORKOUT, 'workout-1').status_code == 201
+    
+    # The same key with a different body or path is refused
+    assert post(client, '/workouts', {**WORKOUT, 'notes': 'Other'}, 'workout-1').status_code == 422
+    assert post(client, '/exercises', WORKOUT, 'workout-1').status_code == 422
+    
+    assert post(client, '/workouts', WORKOUT, '').status_code == 400
+    assert post(client, '/workouts', WORKOUT, 'k' * 256).status_code == 400
+
+
+def test_in_progress_and_expired_keys(app, client):
+    with app.app_context():
+        with app.test_request_context('/workouts', method='POST', json=WORKOUT):
+            digest = idempotency.fingerprint()
+        db.session.add(IdempotencyKey(key='running', fingerprint=digest,
+                                      expires_at=datetime.utcnow() + timedelta(hours=1)))
+        db.session.add(IdempotencyKey(key='expired', fingerprint=digest, status_code=201, body=b'{}',
+                                      expires_at=datetime.utcnow() - timedelta(seconds=1)))
+        # Claimed by a request that died before storing its response
+        db.session.add(IdempotencyKey(key='abandoned', fingerprint=digest,
+                                      expires_at=datetime.utcnow() - timedelta(seconds=1)))
+        db.session.commit()
+    
+    running = post(client, '/workouts', WORKOUT, 'running')
+    assert running.status_code == 409
+    assert running.headers['Retry-After'] == '1'
+    
+    # An expired key is claimed again and the request runs
+    expired = post(client, '/workouts', WORKOUT, 'expired')
+    assert expired.status_code == 201
+    assert 'Idempotent-Replayed' not in expired.headers
+    
+    # So is one whose lease ran out without a response
+    abandoned = post(client, '/workouts', WORKOUT, 'abandoned')
+    assert abandoned.status_code == 201
+    assert post(client, '/workouts', WORKOUT, 'abandoned').headers['Idempotent-Replayed'] == 'true'
+    with app.app_context():
+        assert Workout.query.count() == 2
+        # Stored responses are kept for the full TTL, not just the lease
+        assert db.session.get(IdempotencyKey, 'expired').expires_at > datetime.utcnow() + timedelta(hours=23)
+
+
+def test_purge_removes_only_expired_keys(app, client):
+    post(client, '/workouts', WORKOUT, 'fresh')
+    with app.app_context():
+        db.session.add(IdempotencyKey(key='stale', fingerprint=b'x' * 32, status_code=201, body=b'{}',
+                                      expires_at=datetime.utcnow() - timedelta(days=1)))
+        db.session.commit()
+        
+        assert idempotency.purge(db.session) == 1
+        db.session.commit()
+        assert [row.key for row in IdempotencyKey.query] == ['fresh']
+
+
+def test_a_request_that_lost_its_lease_cannot_write_store_or_release_the_key(app):
+    with app.test_request_context('/workouts', method='POST', json=WORKOUT):
+        digest = idempotency.fingerprint()
+        assert idempotency.claim('slow', digest, 'first') is None
+        # The first request outlives its lease and a retry takes the key over
+        db.session.get(IdempotencyKey, 'slow').expires_at = datetime.utcnow() - timedelta(seconds=1)
+        db.session.commit()
+        assert idempotency.claim('slow', digest, 'retry') is None
+        
+        # The first request's write is refused at its commit
+        g.idempotency_claim = ('slow', 'first')
+        db.session.add(Workout(date=datetime(2024, 1, 15).date(), duration_minutes=45))
+        with pytest.raises(idempotency.LeaseLost):
+            db.session.commit()
+        db.session.rollback()
+        g.pop('idempotency_claim')
+        
+        # Nor can it store its response over the retry's claim or release it
+        idempotency.record('slow', 'first', make_response({'id': 1}, 201))
+        idempotency.release('slow', 'first')
+        stored = db.session.get(IdempotencyKey, 'slow')
+        assert (stored.claim_token, stored.status_code) == ('retry', None)
+        assert Workout.query.count() == 0
+        
+        # The retry's own commits renew its lease along with the write
+        stored.expires_at = datetime.utcnow()
+        db.session.commit()
+        g.idempotency_claim = ('slow', 'retry')
+        db.session.add(Workout(date=datetime(2024, 1, 15).date(), duration_minutes=45))
+        db.session.commit()
+        g.pop('idempotency_claim')
+        assert db.session.get(IdempotencyKey, 'slow').expires_at > datetime.utcnow() + timedelta(seconds=30)
+        assert Workout.query.count() == 1
+
+
+def test_the_lease_follows_the_request_timeout(app):
+    assert idempotency.lease_duration(app.config) == timedelta(seconds=60)
+    assert idempotency.lease_duration({'REQUEST_TIMEOUT': 120}) == timedelta(seconds=240)
+    assert idempotency.lease_duration({'REQUEST_TIMEOUT': 120, 'IDEMPOTENCY_LEASE_SECONDS': 10}) == timedelta(seconds=10)
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+
+from datetime import date, datetime
+
+import pytest
+
+from extensions import db
+from models import Workout
+
+
+@pytest.fixture(params=[True, False], ids=['accelerated', 'stdlib'])
+def encoder_app(request, app):
+    app.json.accelerated = request.param and app.json.accelerated
+    if request.param and not app.json.accelerated:
+        pytest.skip("orjson is not installed")
+    return app
+
+
+def add_workout(app):
+    with app.app_context():
+        db.session.add(Workout(date=date(2024, 1, 15), duration_minutes=45, notes="Café run"))
+        db.session.commit()
+
+
+def test_responses_are_compact_by_default(encoder_app, client):
+    add_workout(encoder_app)
+    
+    body = client.get('/workouts').get_data(as_text=True)
+    
+    assert '\n  ' not in body
+    assert '"duration_minutes":45' in body
+    assert "Café run" in body
+
+
+def test_pretty_query_param_indents_output(encoder_app, client):
+    add_workout(encoder_app)
+    
+    compact = client.get('/workouts')
+    pretty = client.get('/workouts?pretty=1')
+    
+    assert '\n  {\n    "created_at"' in pretty.get_data(as_text=True)
+    assert pretty.get_json() == compact.get_json()
+    assert len(pretty.get_data()) > len(compact.get_data())
+
+
+def test_dates_and_datetimes_encode_as_iso_8601(encoder_app):
+    value = {"day": date(2024, 1, 15), "at": datetime(2024, 1, 15, 7, 30, 0, 123456)}
+    
+    with encoder_app.app_context():
+        encoded = encoder_app.json.dumps(value)
+    
+    assert encoded == '{"at":"2024-01-15T07:30:00.123456","day":"2024-01-15"}'
+
+
+def test_encoders_produce_identical_bytes(app, client):
+    if not app.json.accelerated:
+        pytest.skip("orjson is not installed")
+    add_workout(app)
+    
+    accelerated = client.get('/workouts?pretty=1').get_data()
+    app.json.accelerated = False
+    app.extensions['response_cache'].clear()
+    stdlib = client.get('/workouts?pretty=1').get_data()
+    
+    assert accelerated == stdlib
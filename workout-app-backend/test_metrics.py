@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+
+import logging
+from datetime import date
+
+from extensions import db
+from models import Workout
+
+
+def add_workout(app):
+    with app.app_context():
+        db.session.add(Workout(date=date(2024, 1, 15), duration_minutes=45))
+        db.session.commit()
+
+
+def test_server_timing_reports_wall_and_sql_time(app, client):
+    add_workout(app)
+    
+    response = client.get('/workouts/1')
+    
+    timing = response.headers['Server-Timing']
+    assert timing.startswith('app;dur=')
+    # The ETag version lookup plus the detail query
+    assert 'db;dur=' in timing and 'desc="2 queries"' in timing
+
+
+def test_metrics_endpoint_has_per_route_histograms(app, client):
+    add_workout(app)
+    client.get('/workouts/1')
+    client.get('/workouts/1')
+    client.get('/workouts/99')
+    
+    response = client.get('/metrics')
+    text = response.get_data(as_text=True)
+    
+    assert response.content_type.startswith('text/plain; version=0.0.4')
+    assert '# TYPE http_request_duration_seconds histogram' in text
+    assert 'http_request_duration_seconds_count{method="GET",route="/workouts/<int:id>",status="200"} 2' in text
+    assert 'http_request_duration_seconds_count{method="GET",route="/workouts/<int:id>",status="404"} 1' in text
+    # The second request was a response cache hit that only looked up the ETag
+    assert 'http_request_sql_queries_bucket{method="GET",route="/workouts/<int:id>",status="200",le="1"} 1' in text
+    assert 'http_request_sql_queries_bucket{method="GET",route="/workouts/<int:id>",status="200",le="2"} 2' in text
+    assert 'response_cache_hits_total 1' in text
+
+
+def test_slow_queries_are_logged_with_parameters(app, client, caplog):
+    add_workout(app)
+    app.config['SLOW_QUERY_MS'] = 0
+    
+    with caplog.at_level(logging.WARNING, logger='workout_app.slow_queries'):
+        client.get('/workouts?start_date=2024-01-01')
+    
+    messages = [record.getMessage() for record in caplog.records]
+    assert any('GET /workouts' in message and "'2024-01-01'" in message for message in messages)
+    
+    caplog.clear()
+    app.config['SLOW_QUERY_MS'] = None
+    with caplog.at_level(logging.WARNING, logger='workout_app.slow_queries'):
+        client.get('/workouts?start_date=2024-01-02')
+    assert not caplog.records
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+
+from datetime import date, timedelta
+
+from extensions import db
+from pagination import encode_cursor
+from models import Exercise, Workout
+
+
+def seed(app):
+    with app.app_context():
+        start = date(2024, 1, 1)
+        # Two workouts per day so pages have to break ties on id
+        for i in range(10):
+            db.session.add(Workout(date=start + timedelta(days=i // 2), duration_minutes=30))
+        
+        for name, category, equipment in [
+            ("Running", "cardio", False),
+            ("Bench Press", "strength", True),
+            ("Plank", "core", False),
+            ("Deadlift", "strength", True),
+            ("Yoga", "flexibility", False),
+        ]:
+            db.session.add(Exercise(name=name, category=category, equipment_needed=equipment))
+        db.session.commit()
+
+
+def collect_pages(client, url):
+    items, pages = [], 0
+    while url:
+        response = client.get(url)
+        assert response.status_code == 200
+        items.extend(response.get_json())
+        pages += 1
+        link = response.headers.get('Link')
+        url = link[1:link.index('>')] if link else None
+    return items, pages
+
+
+def test_workouts_pages_cover_all_rows_in_order(app, client):
+    seed(app)
+    
+    items, pages = collect_pages(client, '/workouts?limit=3')
+    
+    assert pages == 4
+    assert [w['id'] for w in items] == list(range(1, 11))
+
+
+def test_workouts_descending_with_date_range(app, client):
+    seed(app)
+    
+    items, _ = collect_pages(
+        client, '/workouts?limit=2&order=desc&start_date=2024-01-02&end_date=2024-01-04'
+    )
+    
+    assert [(w['date'], w['id']) for w in items] == [
+        ('2024-01-04', 8), ('2024-01-04', 7),
+        ('2024-01-03', 6), ('2024-01-03', 5),
+        ('2024-01-02', 4), ('2024-01-02', 3),
+    ]
+
+
+def test_exercises_sorted_by_name_with_filters(app, client):
+    seed(app)
+    
+    items, pages = collect_pages(client, '/exercises?limit=2')
+    assert pages == 3
+    assert [e['name'] for e in items] == ["Bench Press", "Deadlift", "Plank", "Running", "Yoga"]
+    
+    response = client.get('/exercises?category=Strength&equipment_needed=true')
+    assert [e['name'] for e in response.get_json()] == ["Bench Press", "Deadlift"]
+    assert 'X-Next-Cursor' not in response.headers
+
+
+def test_invalid_pagination_params_return_400(client):
+    assert client.get('/workouts?limit=0').status_code == 400
+    assert client.get('/workouts?cursor=not-a-cursor').status_code == 400
+    assert client.get('/workouts?start_date=yesterday').status_code == 400
+    assert client.get('/exercises?order=sideways').status_code == 400
+    assert client.get('/exercises?equipment_needed=maybe').status_code == 400
+
+
+def test_well_formed_cursors_with_wrong_values_return_400(app, client):
+    seed(app)
+    
+    # Valid base64 JSON, but not a sort key of the right shape or types
+    for values in (["2024-01-01", "2"], ["2024-01-01", 2.5], ["2024-01-01"], ["2024-01-01", 2, 3],
+                   [20240101, 2], ["2024-01-01", None], ["2024-01-01", True]):
+        assert client.get(f'/workouts?cursor={encode_cursor(values)}').status_code == 400
+    for values in ([3, 1], ["Plank", "1"], [["Plank"], 1]):
+        assert client.get(f'/exercises?cursor={encode_cursor(values)}').status_code == 400
+    
+    assert client.get(f"/workouts?cursor={encode_cursor(['2024-01-01', 2])}").status_code == 200
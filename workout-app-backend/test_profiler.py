@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+
+import marshal
+import threading
+import time
+from datetime import date
+
+import pytest
+
+from app import create_app
+from extensions import db
+from models import Workout
+
+TOKEN = {'X-Profiler-Token': 'secret'}
+
+
+@pytest.fixture
+def profiled_app(tmp_path):
+    app = create_app({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': 'sqlite://',
+        'PROFILER_TOKEN': 'secret',
+        'PROFILER_DIR': str(tmp_path / 'profiles'),
+    })
+    with app.app_context():
+        db.create_all()
+        db.session.add(Workout(date=date(2024, 1, 15), duration_minutes=45))
+        db.session.commit()
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.drop_all()
+
+
+def test_profiler_is_not_installed_without_a_token(app, client):
+    response = client.get('/workouts?profile=text', headers=TOKEN)
+    
+    assert response.status_code == 200
+    assert response.get_json() == []
+    assert client.post('/admin/profiler/sample').status_code == 404
+
+
+def test_profiling_requires_the_admin_token(profiled_app):
+    client = profiled_app.test_client()
+    
+    assert client.get('/workouts?profile=text').status_code == 403
+    assert client.get('/workouts', headers={'X-Profile': 'text', 'X-Profiler-Token': 'wrong'}).status_code == 403
+    assert client.post('/admin/profiler/sample?seconds=0.1').status_code == 403
+    # Requests that don't ask for a profile are untouched
+    assert client.get('/workouts').status_code == 200
+
+
+def test_text_profile_replaces_the_response(profiled_app):
+    client = profiled_app.test_client()
+    
+    response = client.get('/workouts/1?profile=text', headers=TOKEN)
+    report = response.get_data(as_text=True)
+    
+    assert response.content_type == 'text/plain; charset=utf-8'
+    assert report.startswith('GET /workouts/1 -> 200 OK')
+    assert 'get_workout' in report
+
+
+def test_pstats_profile_is_downloadable(profiled_app):
+    client = profiled_app.test_client()
+    
+    response = client.get('/workouts/1', headers={**TOKEN, 'X-Profile': 'pstats'})
+    
+    assert response.headers['Content-Disposition'].endswith('.pstats"')
+    stats = marshal.loads(response.data)
+    assert any(function == 'get_workout' for _, _, function in stats)
+
+
+def test_saved_profile_keeps_the_normal_response(profiled_app, tmp_path):
+    client = profiled_app.test_client()
+    
+    response = client.get('/workouts/1?profile=save', headers=TOKEN)
+    
+    assert response.get_json()['id'] == 1
+    assert (tmp_path / 'profiles' / response.headers['X-Profile-File']).exists()
+
+
+def test_sampling_collects_stacks_of_requests_in_flight(profiled_app):
+    stop = threading.Event()
+    
+    def traffic():
+        client = profiled_app.test_client()
+        while not stop.is_set():
+            client.get('/workouts')
+    
+    worker = threading.Thread(target=traffic)
+    worker.start()
+    admin = profiled_app.test_client()
+    try:
+        # Starting a job returns straight away; the window is sampled on a background thread
+        started = admin.post('/admin/profiler/sample?seconds=0.5&interval_ms=1', headers=TOKEN)
+        assert started.status_code == 202
+        location = started.headers['Location']
+        assert admin.get(f'{location}?format=json', headers=TOKEN).status_code == 202
+        assert admin.post('/admin/profiler/sample?seconds=0.5', headers=TOKEN).status_code == 409
+        deadline = time.monotonic() + 5
+        while (response := admin.get(f'{location}?format=json', headers=TOKEN)).status_code == 202:
+            assert time.monotonic() < deadline
+            time.sleep(0.05)
+    finally:
+        stop.set()
+        worker.join()
+    
+    body = response.get_json()
+    assert body['status'] == 'done'
+    assert body['samples'] > 0
+    assert body['stacks']
+    assert all('wsgi_app (app.py' in entry['stack'] for entry in body['stacks'])
+    assert admin.get(location, headers=TOKEN).content_type == 'text/plain; charset=utf-8'
+
+
+def test_sampling_rejects_bad_requests(profiled_app):
+    client = profiled_app.test_client()
+    
+    assert client.post('/admin/profiler/sample?seconds=60', headers=TOKEN).status_code == 400
+    assert client.post('/admin/profiler/sample?interval_ms=fast', headers=TOKEN).status_code == 400
+    assert client.get('/admin/profiler/sample/unknown', headers=TOKEN).status_code == 404
+    
+    # Greenlets on the event loop thread can't be sampled, so ASGI mode refuses
+    profiled_app.extensions['asgi'] = object()
+    assert client.post('/admin/profiler/sample', headers=TOKEN).status_code == 501
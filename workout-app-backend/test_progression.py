@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+
+import random
+from datetime import date, timedelta
+
+import progression
+from extensions import db
+from models import Exercise, ExerciseRecord, ProgressionBucket, Workout
+
+
+def create_history(client):
+    client.post('/exercises', json={'name': 'Squat', 'category': 'strength'})
+    client.post('/exercises', json={'name': 'Running', 'category': 'cardio'})
+    for day in ('2024-01-01', '2024-01-09', '2024-02-03'):
+        client.post('/workouts', json={'date': day, 'duration_minutes': 30})
+    client.post('/workouts/1/exercises/1/workout_exercises', json={'reps': 10, 'sets': 3})
+    client.post('/workouts/2/exercises/1/workout_exercises', json={'reps': 12, 'sets': 3})
+    client.post('/workouts/3/exercises/1/workout_exercises', json={'reps': 8, 'sets': 5})
+    client.post('/workouts/2/exercises/2/workout_exercises', json={'duration_seconds': 1800})
+
+
+def snapshot(app):
+    """Every record and bucket row, for comparing incremental results with a rebuild"""
+    with app.app_context():
+        records = sorted(
+            tuple(getattr(record, column.key) for column in ExerciseRecord.__table__.columns)
+            for record in ExerciseRecord.query.filter(ExerciseRecord.entry_count > 0)
+        )
+        buckets = sorted(
+            tuple(getattr(bucket, column.key) for column in ProgressionBucket.__table__.columns)
+            for bucket in ProgressionBucket.query.filter(ProgressionBucket.entry_count > 0)
+        )
+        return records, buckets
+
+
+def rebuilt_snapshot(app):
+    with app.app_context():
+        progression.rebuild(db.session.connection())
+        db.session.commit()
+    return snapshot(app)
+
+
+def test_progression_reports_records_and_series(app, client):
+    create_history(client)
+    
+    body = client.get('/exercises/1/progression?period=month').get_json()
+    
+    assert body['records']['best_reps'] == {'value': 12, 'date': '2024-01-09'}
+    assert body['records']['best_volume'] == {'value': 40, 'date': '2024-02-03'}
+    assert body['records']['longest_duration_seconds'] == {'value': 0, 'date': None}
+    assert body['totals'] == {'entry_count': 3, 'total_reps': 30, 'total_volume': 106, 'total_duration_seconds': 0}
+    assert [(bucket['period_start'], bucket['best_reps'], bucket['total_volume']) for bucket in body['series']] == [
+        ('2024-01-01', 12, 66), ('2024-02-01', 8, 40)
+    ]
+    
+    weekly = client.get('/exercises/1/progression?start_date=2024-01-10').get_json()
+    assert [bucket['period_start'] for bucket in weekly['series']] == ['2024-01-08', '2024-01-29']
+    
+    running = client.get('/exercises/2/progression').get_json()
+    assert running['records']['longest_duration_seconds'] == {'value': 1800, 'date': '2024-01-09'}
+
+
+def test_progression_reads_only_the_precomputed_tables(app, client, count_queries):
+    create_history(client)
+    
+    with count_queries() as statements:
+        response = client.get('/exercises/1/progression')
+    
+    assert response.status_code == 200
+    # The ETag version lookup, the exercise with its record, and the series
+    assert len(statements) == 3
+    assert all('workout_exercises' not in statement for statement in statements)
+
+
+def test_deleting_the_best_recomputes_it(app, client):
+    create_history(client)
+    
+    client.delete('/workouts/2/exercises/1/workout_exercises')
+    
+    body = client.get('/exercises/1/progression').get_json()
+    assert body['records']['best_reps'] == {'value': 10, 'date': '2024-01-01'}
+    assert [bucket['period_start'] for bucket in body['series']] == ['2024-01-01', '2024-01-29']
+    assert snapshot(app) == rebuilt_snapshot(app)
+
+
+def test_unknown_exercise_and_period(app, client):
+    create_history(client)
+    
+    assert client.get('/exercises/99/progression').status_code == 404
+    assert client.get('/exercises/1/progression?period=year').status_code == 400
+    # An exercise that was never logged has empty records
+    client.post('/exercises', json={'name': 'Plank', 'category': 'core'})
+    body = client.get('/exercises/3/progression').get_json()
+    assert body['series'] == [] and body['totals']['entry_count'] == 0
+
+
+def test_incremental_maintenance_matches_a_rebuild(app, client):
+    rng = random.Random(7)
+    for name in ('Squat', 'Bench', 'Row', 'Running'):
+        client.post('/exercises', json={'name': name, 'category': 'cardio' if name == 'Running' else 'strength'})
+    start = date(2024, 1, 1)
+    for _ in range(12):
+        day = start + timedelta(days=rng.randint(0, 90))
+        client.post('/workouts', json={'date': day.isoformat(), 'duration_minutes': 30})
+    
+    def entry(exercise_id):
+        if exercise_id == 4:
+            return {'duration_seconds': rng.randint(600, 3600)}
+        return {'reps': rng.randint(1, 15), 'sets': rng.randint(1, 5)}
+    
+    for _ in range(150):
+        workout_id, exercise_id = rng.randint(1, 12), rng.randint(1, 4)
+        path = f'/workouts/{workout_id}/exercises/{exercise_id}/workout_exercises'
+        action = rng.random()
+        if action < 0.5:
+            client.post(path, json=entry(exercise_id))
+        elif action < 0.8:
+            client.put(path, json=entry(exercise_id))
+        else:
+            client.delete(path)
+    
+    # Moving a workout to another day moves its entries between buckets
+    with app.app_context():
+        workout = db.session.get(Workout, 3)
+        workout.date = date(2023, 12, 30)
+        db.session.commit()
+    
+    # Bulk inserts bypass the ORM and update the tables explicitly
+    client.post('/workouts/bulk', json=[
+        {'date': '2024-02-02', 'duration_minutes': 40, 'exercises': [{'exercise_id': 1, 'reps': 20, 'sets': 5}]}
+    ])
+    
+    client.delete('/workouts/5')
+    client.delete('/exercises/2')
+    
+    incremental = snapshot(app)
+    assert incremental[0]
+    assert incremental == rebuilt_snapshot(app)
+    with app.app_context():
+        assert db.session.get(Exercise, 2) is None
+        assert not ExerciseRecord.query.filter_by(exercise_id=2).count()
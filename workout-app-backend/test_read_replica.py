@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+
+from datetime import date
+
+import pytest
+
+from app import create_app
+from extensions import db
+from models import Workout
+
+
+@pytest.fixture
+def replicated_app(tmp_path):
+    app = create_app({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'primary.db'}",
+        'DATABASE_REPLICA_URL': f"sqlite:///{tmp_path / 'replica.db'}",
+        'RESPONSE_CACHE_BACKEND': None,
+    })
+    with app.app_context():
+        db.create_all()
+        replica = app.extensions['read_replica']
+        db.metadata.create_all(replica)
+        # A row only the replica has, so reads show which database served them
+        with replica.begin() as connection:
+            connection.execute(db.insert(Workout.__table__).values(
+                date=date(2024, 1, 1), duration_minutes=10, notes="replica"
+            ))
+    yield app
+    with app.app_context():
+        db.session.remove()
+    app.extensions['read_replica'].dispose()
+
+
+def notes(response):
+    return [workout['notes'] for workout in response.get_json()]
+
+
+def test_reads_go_to_the_replica_and_writes_to_the_primary(replicated_app):
+    client = replicated_app.test_client()
+    
+    assert notes(client.get('/workouts')) == ["replica"]
+    
+    other_client = replicated_app.test_client()
+    response = other_client.post('/workouts', json={'date': '2024-02-01', 'duration_minutes': 30, 'notes': "primary"})
+    assert response.status_code == 201
+    
+    with replicated_app.app_context():
+        assert [w.notes for w in Workout.query.all()] == ["primary"]
+    # A client that did not write keeps reading the replica
+    assert notes(client.get('/workouts')) == ["replica"]
+
+
+def test_writers_read_their_writes_from_the_primary(replicated_app):
+    client = replicated_app.test_client()
+    
+    client.post('/workouts', json={'date': '2024-02-01', 'duration_minutes': 30, 'notes': "primary"})
+    
+    assert notes(client.get('/workouts')) == ["primary"]
+    assert client.get('/workouts/1').get_json()['notes'] == "primary"
+
+
+def test_stickiness_can_be_disabled(replicated_app):
+    replicated_app.config['REPLICA_STICKY_SECONDS'] = 0
+    client = replicated_app.test_client()
+    
+    client.post('/workouts', json={'date': '2024-02-01', 'duration_minutes': 30, 'notes': "primary"})
+    
+    assert notes(client.get('/workouts')) == ["replica"]
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+
+from response_cache import LocalCache, MemoryClient, SharedCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0
+    
+    def __call__(self):
+        return self.now
+
+
+def test_local_cache_lru_ttl_and_size_cap():
+    clock = FakeClock()
+    cache = LocalCache(max_bytes=30, ttl=10, clock=clock)
+    
+    cache.set('a', [], b'x' * 10, ['exercises'])
+    cache.set('b', [], b'x' * 10, ['workouts'])
+    assert cache.get('a') == ([], b'x' * 10)
+    
+    # 'b' is now least recently used and goes first when the cap is exceeded
+    cache.set('c', [], b'x' * 15, ['workouts'])
+    assert cache.get('b') is None
+    assert cache.get('a') is not None
+    
+    clock.now = 11
+    assert cache.get('a') is None
+    
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['evictions']) == (2, 2, 1)
+    assert stats['entries'] == 1
+    
+    # Entries bigger than the whole cache are not stored
+    cache.set('huge', [], b'x' * 31, [])
+    assert cache.get('huge') is None
+
+
+def test_local_cache_invalidates_by_table():
+    cache = LocalCache()
+    cache.set('list', [], b'[]', ['exercises'])
+    cache.set('detail', [], b'{}', ['workouts', 'exercises'])
+    cache.set('workouts', [], b'[]', ['workouts'])
+    
+    cache.invalidate(['exercises'])
+    
+    assert cache.get('list') is None
+    assert cache.get('detail') is None
+    assert cache.get('workouts') is not None
+    assert cache.stats()['bytes'] == 2
+
+
+def test_shared_cache_round_trips_through_client():
+    clock = FakeClock()
+    client = MemoryClient(clock=clock)
+    cache = SharedCache(client, ttl=5)
+    other_worker = SharedCache(client, ttl=5)
+    
+    cache.set('key', [('Content-Type', 'application/json')], b'{"a": 1}', ['exercises'])
+    assert other_worker.get('key') == ([('Content-Type', 'application/json')], b'{"a": 1}')
+    
+    cache.invalidate(['exercises'])
+    assert other_worker.get('key') is None
+    
+    cache.set('key', [], b'{}', ['exercises'])
+    clock.now = 6
+    assert cache.get('key') is None
+
+
+def test_get_handlers_are_served_from_cache_until_a_write(app, client, count_queries):
+    client.post('/exercises', json={"name": "Push-ups", "category": "strength"})
+    
+    first = client.get('/exercises?limit=1')
+    assert first.headers['X-Cache'] == 'MISS'
+    
+    with count_queries() as statements:
+        second = client.get('/exercises?limit=1')
+    assert second.headers['X-Cache'] == 'HIT'
+    assert second.get_data() == first.get_data()
+    assert second.headers['ETag'] == first.headers['ETag']
+    assert len(statements) == 1
+    
+    client.put('/exercises/1', json={"name": "Pull-ups"})
+    
+    third = client.get('/exercises?limit=1')
+    assert third.headers['X-Cache'] == 'MISS'
+    assert third.get_json()[0]['name'] == "Pull-ups"
+    assert app.extensions['response_cache'].stats()['hits'] == 1
+
+
+def test_pagination_headers_are_replayed_from_cache(client):
+    client.post('/exercises', json={"name": "Push-ups", "category": "strength"})
+    client.post('/exercises', json={"name": "Plank", "category": "core"})
+    
+    first = client.get('/exercises?limit=1')
+    second = client.get('/exercises?limit=1')
+    
+    assert second.headers['X-Cache'] == 'HIT'
+    assert second.headers['X-Next-Cursor'] == first.headers['X-Next-Cursor']
+    assert second.mimetype == 'application/json'
+
+
+def test_cache_can_be_disabled():
+    from app import create_app
+    from extensions import db
+    
+    app = create_app({'SQLALCHEMY_DATABASE_URI': 'sqlite://', 'RESPONSE_CACHE_BACKEND': None})
+    with app.app_context():
+        db.create_all()
+    client = app.test_client()
+    
+    client.get('/exercises')
+    assert 'X-Cache' not in client.get('/exercises').headers
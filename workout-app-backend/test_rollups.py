@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+
+from datetime import date
+
+from extensions import db
+from models import TrainingRollup, CategoryRollup
+import rollups
+
+
+def snapshot(app):
+    with app.app_context():
+        training = {
+            (r.period, r.period_start): tuple(getattr(r, f) for f in rollups.TRAINING_FIELDS)
+            for r in TrainingRollup.query.all() if r.workout_count
+        }
+        categories = {
+            (r.period, r.period_start, r.category): tuple(getattr(r, f) for f in rollups.CATEGORY_FIELDS)
+            for r in CategoryRollup.query.all() if r.exercise_count
+        }
+        return training, categories
+
+
+def rebuilt(app):
+    with app.app_context():
+        rollups.rebuild(db.session.connection())
+        db.session.commit()
+    return snapshot(app)
+
+
+def test_daily_and_weekly_stats_follow_writes(app, client):
+    client.post('/exercises', json={"name": "Push-ups", "category": "strength"})
+    client.post('/exercises', json={"name": "Plank", "category": "core"})
+    # Monday and Wednesday of ISO week 3, then Monday of week 4
+    client.post('/workouts', json={"date": "2024-01-15", "duration_minutes": 45})
+    client.post('/workouts', json={"date": "2024-01-17", "duration_minutes": 30})
+    client.post('/workouts', json={"date": "2024-01-22", "duration_minutes": 20})
+    client.post('/workouts/1/exercises/1/workout_exercises', json={"reps": 15, "sets": 3})
+    client.post('/workouts/1/exercises/2/workout_exercises', json={"duration_seconds": 60})
+    client.post('/workouts/2/exercises/1/workout_exercises', json={"reps": 10, "sets": 2})
+    
+    daily = client.get('/stats/daily').get_json()
+    assert [d['day'] for d in daily] == ['2024-01-15', '2024-01-17', '2024-01-22']
+    assert daily[0]['minutes'] == 45
+    assert daily[0]['volume'] == 45
+    assert daily[0]['categories'] == {
+        "core": {"exercise_count": 1, "sets": 0, "reps": 0, "volume": 0, "duration_seconds": 60},
+        "strength": {"exercise_count": 1, "sets": 3, "reps": 15, "volume": 45, "duration_seconds": 0},
+    }
+    
+    weekly = client.get('/stats/weekly').get_json()
+    assert [(w['week_start'], w['iso_week']) for w in weekly] == [('2024-01-15', 3), ('2024-01-22', 4)]
+    assert weekly[0]['workout_count'] == 2
+    assert weekly[0]['minutes'] == 75
+    assert weekly[0]['categories']['strength']['volume'] == 65
+    
+    # Updates, category changes and cascading deletes keep the rollups exact
+    client.put('/workouts/1/exercises/1/workout_exercises', json={"reps": 20})
+    client.put('/exercises/2', json={"category": "flexibility"})
+    client.delete('/workouts/2')
+    assert snapshot(app) == rebuilt(app)
+    
+    client.delete('/exercises/1')
+    assert snapshot(app) == rebuilt(app)
+    
+    weekly = client.get('/stats/weekly?start_date=2024-01-17').get_json()
+    assert weekly[0]['week_start'] == '2024-01-15'
+    assert weekly[0]['categories'] == {
+        "flexibility": {"exercise_count": 1, "sets": 0, "reps": 0, "volume": 0, "duration_seconds": 60}
+    }
+
+
+def test_bulk_inserts_update_rollups(app, client):
+    client.post('/exercises', json={"name": "Plank", "category": "core"})
+    client.post('/workouts/bulk', json=[
+        {"date": "2024-03-04", "duration_minutes": 30, "exercises": [{"exercise_id": 1, "duration_seconds": 90}]},
+        {"date": "2024-03-05", "duration_minutes": 15},
+    ])
+    
+    training, categories = snapshot(app)
+    assert training[('week', date(2024, 3, 4))][:2] == (2, 45)
+    assert categories[('day', date(2024, 3, 4), 'core')][-1] == 90
+    assert (training, categories) == rebuilt(app)
+
+
+def test_stats_rejects_bad_dates(client):
+    assert client.get('/stats/daily?start_date=soon').status_code == 400
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+
+import json
+from datetime import date, datetime
+
+from flask import jsonify
+
+from extensions import db
+from models import Exercise, Workout, WorkoutExercise
+from schemas.exercise_schema import exercises_schema
+from schemas.workout_schema import workouts_schema
+from schemas.workout_exercise_schema import workout_exercises_schema
+from serializers import exercise_serializer, workout_exercise_serializer, workout_serializer
+
+
+def seed(app):
+    with app.app_context():
+        db.session.add_all([
+            Exercise(name="Push-ups", category="strength", equipment_needed=False),
+            Exercise(name="Rowing", category="cardio", equipment_needed=True),
+            Workout(date=date(2024, 1, 15), duration_minutes=45, notes="Morning"),
+            Workout(date=date(2024, 1, 16), duration_minutes=30),
+        ])
+        db.session.flush()
+        db.session.add_all([
+            WorkoutExercise(workout_id=1, exercise_id=1, reps=15, sets=3),
+            WorkoutExercise(workout_id=1, exercise_id=2, duration_seconds=600),
+        ])
+        db.session.commit()
+        # Microseconds and NULL timestamps must render like marshmallow
+        db.session.get(Workout, 2).created_at = datetime(2024, 1, 16, 7, 30, 0, 123456)
+        db.session.commit()
+        db.session.execute(db.update(Exercise).where(Exercise.id == 2).values(updated_at=None))
+        db.session.commit()
+
+
+def test_fast_serializers_match_marshmallow_byte_for_byte(app):
+    seed(app)
+    
+    cases = [
+        (workout_serializer, Workout, workouts_schema),
+        (exercise_serializer, Exercise, exercises_schema),
+        (workout_exercise_serializer, WorkoutExercise, workout_exercises_schema),
+    ]
+    with app.test_request_context():
+        for serializer, model, schema in cases:
+            rows = db.session.execute(db.select(*serializer.columns).order_by(model.id)).all()
+            objects = model.query.order_by(model.id).all()
+            
+            fast = jsonify(serializer.dump_many(rows)).get_data()
+            expected = jsonify(schema.dump(objects)).get_data()
+            assert fast == expected
+            assert json.loads(fast)
+
+
+def test_offset_serializer_reads_a_slice_of_a_wider_row(app):
+    seed(app)
+    
+    with app.app_context():
+        row = db.session.execute(
+            db.select(*workout_serializer.columns, *exercise_serializer.columns)
+            .select_from(Workout).join(Exercise, Exercise.id == 1).where(Workout.id == 1)
+        ).one()
+        
+        assert workout_serializer.dump(row)['notes'] == "Morning"
+        assert exercise_serializer.at(len(workout_serializer.columns)).dump(row)['name'] == "Push-ups"
+
+
+def test_get_exercise_lists_workouts_with_details(app, client):
+    seed(app)
+    
+    data = client.get('/exercises/1').get_json()
+    
+    assert data['name'] == "Push-ups"
+    assert data['total_workouts'] == 1
+    assert data['workouts'][0]['notes'] == "Morning"
+    assert (data['workouts'][0]['reps'], data['workouts'][0]['sets']) == (15, 3)
+    assert client.get('/exercises/99').status_code == 404
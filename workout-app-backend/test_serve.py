@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+
+import argparse
+
+import pytest
+
+pytest.importorskip('gunicorn')
+
+import serve
+from extensions import db
+
+
+def parse(argv, monkeypatch, **environ):
+    for name, value in environ.items():
+        monkeypatch.setenv(name, value)
+    parser = argparse.ArgumentParser()
+    serve.add_arguments(parser)
+    return serve.options_from_args(parser.parse_args(argv))
+
+
+def test_workers_and_threads_are_sized_from_cpus_and_environment(monkeypatch):
+    monkeypatch.setattr(serve.multiprocessing, 'cpu_count', lambda: 4)
+    monkeypatch.delenv('WEB_CONCURRENCY', raising=False)
+    monkeypatch.delenv('THREADS', raising=False)
+    
+    options = parse([], monkeypatch)
+    assert (options['workers'], options['threads'], options['worker_class']) == (9, 4, 'gthread')
+    
+    options = parse(['--threads', '1'], monkeypatch, WEB_CONCURRENCY='3')
+    assert (options['workers'], options['threads'], options['worker_class']) == (3, 1, 'sync')
+
+
+def test_server_preloads_the_app_once(monkeypatch):
+    options = parse(['--workers', '2', '--max-requests', '1000'], monkeypatch)
+    server = serve.Server(options, {'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite://'})
+    
+    assert server.cfg.preload_app
+    assert (server.cfg.workers, server.cfg.max_requests, server.cfg.max_requests_jitter) == (2, 1000, 100)
+    
+    app = server.wsgi()
+    assert server.wsgi() is app
+    assert server.load_ms > 0
+
+
+def test_forked_workers_drop_inherited_connections(app):
+    with app.app_context():
+        db.session.execute(db.text('SELECT 1'))
+        db.session.remove()
+        pool = db.engine.pool
+    
+    serve.dispose_engines(app)
+    
+    with app.app_context():
+        assert db.engine.pool is not pool
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+
+from routes import workouts as workout_routes
+
+
+def seed_calendar(client, days=6):
+    for name in ('Squat', 'Bench', 'Plank'):
+        client.post('/exercises', json={'name': name, 'category': 'core' if name == 'Plank' else 'strength'})
+    for day in range(1, days + 1):
+        client.post('/workouts', json={'date': f'2024-03-{day:02d}', 'duration_minutes': 30 + day})
+        # Every other day is a rest day with no exercises logged
+        if day % 2:
+            client.post(f'/workouts/{day}/exercises/1/workout_exercises', json={'reps': 5, 'sets': day})
+            client.post(f'/workouts/{day}/exercises/3/workout_exercises', json={'duration_seconds': 60})
+
+
+def test_batch_by_ids_matches_the_detail_endpoint(client):
+    seed_calendar(client)
+    
+    response = client.get('/workouts/batch?ids=5,2,99,3,5')
+    body = response.get_json()
+    
+    assert response.status_code == 200
+    assert [workout['id'] for workout in body['workouts']] == [5, 2, 3]
+    assert body['missing_ids'] == [99]
+    for workout in body['workouts']:
+        assert workout == client.get(f"/workouts/{workout['id']}").get_json()
+    assert body['workouts'][1]['exercises'] == []
+
+
+def test_batch_by_date_range(client):
+    seed_calendar(client)
+    
+    body = client.get('/workouts/batch?start_date=2024-03-02&end_date=2024-03-04').get_json()
+    
+    assert [workout['date'] for workout in body['workouts']] == ['2024-03-02', '2024-03-03', '2024-03-04']
+    assert body['workouts'][1] == client.get('/workouts/3').get_json()
+
+
+def test_batch_query_count_is_constant(client, count_queries):
+    seed_calendar(client, days=30)
+    
+    with count_queries() as small:
+        assert client.get('/workouts/batch?ids=1,2').status_code == 200
+    with count_queries() as large:
+        response = client.get(f"/workouts/batch?ids={','.join(map(str, range(1, 31)))}")
+    with count_queries() as date_range:
+        assert client.get('/workouts/batch?start_date=2024-03-01&end_date=2024-03-31').status_code == 200
+    
+    assert len(response.get_json()['workouts']) == 30
+    # The ETag version lookup plus one joined query for all the workouts and their exercises
+    assert len(small) == len(large) == len(date_range) == 2
+
+
+def test_batch_rejects_bad_requests(client, monkeypatch):
+    seed_calendar(client)
+    monkeypatch.setattr(workout_routes, 'BATCH_MAX_WORKOUTS', 4)
+    
+    assert client.get('/workouts/batch').status_code == 400
+    assert client.get('/workouts/batch?ids=1,two').status_code == 400
+    assert client.get('/workouts/batch?ids=,').status_code == 400
+    assert client.get('/workouts/batch?ids=1&start_date=2024-03-01&end_date=2024-03-02').status_code == 400
+    assert client.get('/workouts/batch?start_date=2024-03-01').status_code == 400
+    assert client.get('/workouts/batch?ids=1,2,3,4,5').status_code == 400
+    # Four workouts fit, a range holding five does not
+    assert client.get('/workouts/batch?start_date=2024-03-01&end_date=2024-03-04').status_code == 200
+    assert client.get('/workouts/batch?start_date=2024-03-01&end_date=2024-03-05').status_code == 400
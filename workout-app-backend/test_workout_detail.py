@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+
+from datetime import date
+
+from extensions import db
+from models import Exercise, Workout, WorkoutExercise
+
+
+def seed_workout(app, exercise_count):
+    with app.app_context():
+        workout = Workout(date=date(2024, 1, 15), duration_minutes=45, notes="Detail test")
+        db.session.add(workout)
+        exercises = [
+            Exercise(name=f"Exercise {i}", category="strength", equipment_needed=False)
+            for i in range(exercise_count)
+        ]
+        db.session.add_all(exercises)
+        db.session.flush()
+        
+        for exercise in exercises:
+            db.session.add(WorkoutExercise(
+                workout_id=workout.id,
+                exercise_id=exercise.id,
+                reps=10,
+                sets=3
+            ))
+        db.session.commit()
+        return workout.id
+
+
+def test_get_workout_returns_exercise_details(app, client):
+    workout_id = seed_workout(app, 2)
+    
+    response = client.get(f'/workouts/{workout_id}')
+    data = response.get_json()
+    
+    assert response.status_code == 200
+    assert data['notes'] == "Detail test"
+    assert [e['exercise_name'] for e in data['exercises']] == ["Exercise 0", "Exercise 1"]
+    assert data['exercises'][0]['category'] == "strength"
+    assert data['exercises'][0]['reps'] == 10
+    assert data['exercises'][0]['workout_id'] == workout_id
+
+
+def test_get_workout_query_count_is_constant(app, client, count_queries):
+    small_id = seed_workout(app, 1)
+    with count_queries() as small:
+        assert client.get(f'/workouts/{small_id}').status_code == 200
+    
+    with app.app_context():
+        db.session.query(WorkoutExercise).delete()
+        db.session.query(Exercise).delete()
+        db.session.commit()
+    
+    large_id = seed_workout(app, 40)
+    with count_queries() as large:
+        response = client.get(f'/workouts/{large_id}')
+    
+    assert response.status_code == 200
+    assert len(response.get_json()['exercises']) == 40
+    # The ETag version lookup plus one joined query for the workout and its exercises
+    assert len(small) == len(large) == 2
+
+
+def test_get_missing_workout_returns_404(client):
+    assert client.get('/workouts/999').status_code == 404
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+
+import json
+from datetime import date
+
+from extensions import db
+from models import Exercise, Workout, WorkoutExercise
+
+
+def seed(app):
+    with app.app_context():
+        push_ups = Exercise(name="Push-ups", category="strength")
+        plank = Exercise(name="Plank", category="core")
+        later = Workout(date=date(2024, 1, 16), duration_minutes=30, notes="Evening")
+        earlier = Workout(date=date(2024, 1, 15), duration_minutes=45, notes="Morning")
+        rest = Workout(date=date(2024, 1, 17), duration_minutes=10, notes="Stretch only")
+        db.session.add_all([push_ups, plank, later, earlier, rest])
+        db.session.flush()
+        
+        db.session.add_all([
+            WorkoutExercise(workout_id=earlier.id, exercise_id=push_ups.id, reps=15, sets=3),
+            WorkoutExercise(workout_id=earlier.id, exercise_id=plank.id, duration_seconds=60),
+            WorkoutExercise(workout_id=later.id, exercise_id=plank.id, duration_seconds=90),
+        ])
+        db.session.commit()
+
+
+def test_ndjson_export_streams_one_workout_per_line(app, client):
+    seed(app)
+    
+    response = client.get('/workouts/export?format=ndjson')
+    assert response.status_code == 200
+    assert response.is_streamed
+    assert response.mimetype == 'application/x-ndjson'
+    
+    workouts = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert [w['notes'] for w in workouts] == ["Morning", "Evening", "Stretch only"]
+    assert [e['exercise_name'] for e in workouts[0]['exercises']] == ["Push-ups", "Plank"]
+    assert workouts[2]['exercises'] == []
+    
+    # Each exported workout matches the detail endpoint
+    detail = client.get(f"/workouts/{workouts[0]['id']}").get_json()
+    assert workouts[0] == detail
+
+
+def test_json_export_is_a_single_array(app, client):
+    seed(app)
+    
+    response = client.get('/workouts/export?format=json')
+    assert response.status_code == 200
+    assert [w['date'] for w in response.get_json()] == ['2024-01-15', '2024-01-16', '2024-01-17']
+
+
+def test_export_of_empty_history_and_bad_format(client):
+    assert client.get('/workouts/export?format=json').get_json() == []
+    assert client.get('/workouts/export').get_data(as_text=True) == ''
+    assert client.get('/workouts/export?format=xml').status_code == 400